@@ -1,13 +1,7 @@
 
 import streamlit as st
 import pandas as pd
-from docx import Document
-from docx.shared import Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-import zipfile
-from io import BytesIO
 import time
-import re
 import sys
 import os
 
@@ -16,6 +10,21 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from database.models import DatabaseManager
 from database.auth import AuthManager
 from database.user_data import UserDataManager
+from database.generation_jobs import GenerationJobManager, parse_timestamp, STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED
+from gerador_os.modelo import ModeloCompilado, ModeloDoLote, MOTORES_RENDERIZACAO, hash_do_conteudo
+from gerador_os.paralelo import gerar_documentos
+from gerador_os.contextos import mapear_e_renomear_colunas_funcionarios, contextos_dos_funcionarios, caminhos_no_zip, grupos_no_zip
+from gerador_os.riscos import CATEGORIAS_RISCO, RISCOS_PGR_DADOS, get_danos_por_riscos_pgr, consolidar_riscos_pgr, tabela_de_riscos, montar_contexto_lote
+from gerador_os.cache_documentos import CacheDeDocumentos
+from gerador_os.cache_planilhas import CacheDePlanilhas
+from gerador_os.planilhas import FORMATOS_PLANILHA, formato_da_planilha
+from gerador_os.validacao import VERIFICACOES, validar_funcionarios, resumo_da_validacao, linhas_sinalizadas, descricao_dos_problemas
+from gerador_os.pipeline import MedidorDePipeline, encadear, CAPACIDADE_PADRAO
+from gerador_os.tarefas import GerenciadorDeTarefas, CANCELADA, FALHOU, formatar_duracao
+from gerador_os.arquivamento import (
+    EstrategiaArquivo, ESTRATEGIAS_ARQUIVO, DIVISOES_ARQUIVO, ARMAZENAR_DOCX, DEFLATE, DEFLATE_PARALELO,
+    comparar_estrategias, ler_arquivo, nome_da_parte, ordenar_por_grupo,
+)
 
 st.set_page_config(
     page_title="Gerador de Ordens de Serviço (OS)",
@@ -30,289 +39,43 @@ AGENTES_DE_RISCO = sorted([
     "Fumos", "Névoas", "Neblinas", "Gases", "Vapores", "Produtos Químicos em Geral", "Vírus", "Bactérias", 
     "Protozoários", "Fungos", "Parasitas", "Bacilos"
 ])
-CATEGORIAS_RISCO = {'fisico': '🔥 Físicos', 'quimico': '⚗️ Químicos', 'biologico': '🦠 Biológicos', 'ergonomico': '🏃 Ergonômicos', 'acidente': '⚠️ Acidentes'}
-
-RISCOS_PGR_DADOS = {
-    'quimico': {
-        'riscos': ['Exposição a Produto Químico'],
-        'danos': ['Irritação/lesão ocular, na pele e mucosas; Dermatites; Queimadura Química; Intoxicação; Náuseas; Vômitos.']
-    },
-    'fisico': {
-        'riscos': [
-            'Ambiente Artificialmente Frio', 'Exposição ao Ruído', 'Vibrações Localizadas (mão/braço)',
-            'Vibração de Corpo Inteiro (AREN)', 'Vibração de Corpo Inteiro (VDVR)', 'Exposição à Radiações Ionizantes',
-            'Exposição à Radiações Não-ionizantes', 'Exposição à Temperatura Ambiente Elevada',
-            'Exposição à Temperatura Ambiente Baixa', 'Pressão Atmosférica Anormal (condições hiperbáricas)', 'Umidade'
-        ],
-        'danos': [
-            'Estresse, desconforto, dormência, rigidez nas partes com maior intensidade de exposição ao frio, redução da destreza, formigamento, redução da sensibilidade dos dedos e flexibilidade das articulações.',
-            'Perda Auditiva Induzida pelo Ruído Ocupacional (PAIRO).',
-            'Alterações articulares e vasomotoras.',
-            'Alterações no sistema digestivo, sistema musculoesquelético, sistema nervoso, alterações na visão, enjoos, náuseas, palidez.',
-            'Alterações no sistema digestivo, sistema musculoesquelético, sistema nervoso, alterações na visão, enjoos, náuseas, palidez.',
-            'Dano às células do corpo humano, causando doenças graves, inclusive fatais, como câncer.',
-            'Depressão imunológica, fotoenvelhecimento, lesões oculares como ceratoconjuntivite, pterígio e catarata; Doenças graves, inclusives fatais, como câncer.',
-            'Desidratação, erupções cutâneas, câibras, fadiga física, problemas cardiocirculatórios, distúrbios psicológicos.',
-            'Estresse, desconforto, dormência, rigidez nas partes com maior intensidade de exposição ao frio, redução da destreza, formigamento, redução da sensibilidade dos dedos e flexibilidade das articulações.',
-            'Barotrauma pulmonar, lesão de tecido pulmonar ou pneumotórax, embolia arterial gasosa, barotrauma de ouvido, barotrauma sinusal, barotrauma dental, barotrauma facial, doença descompressiva.',
-            'Doenças do aparelho respiratório, quedas, doenças de pele, doenças circulatórias, entre outras.'
-        ]
-    },
-    'biologico': {
-        'riscos': [
-            'Água e/ou alimentos contaminados',
-            'Contato com Fluido Orgânico (sangue, hemoderivados, secreções, excreções)',
-            'Contato com Pessoas Doentes e/ou Material Infectocontagiante',
-            'Contaminação pelo Corona Vírus',
-            'Exposição à Agentes Microbiológicos (fungos, bactérias, vírus, protozoários, parasitas)'
-        ],
-        'danos': [
-            'Intoxicação, diarreias, infecções intestinais.',
-            'Doenças infectocontagiosas.',
-            'Doenças infectocontagiosas.',
-            'COVID-19, podendo causar gripes, febre, tosse seca, cansaço, dores e desconfortos, dor de garganta, diarreia, perda de paladar ou olfato, dificuldade de respirar ou falta de ar, dor ou pressão no peito, perda de fala ou movimentos.',
-            'Doenças infectocontagiosas, dermatites, irritação, desconforto, infecção do sistema respiratório.'
-        ]
-    },
-    'ergonomico': {
-        'riscos': [
-            'Posturas incômodas/pouco confortáveis por longos períodos', 'Postura sentada por longos períodos',
-            'Postura em pé por longos períodos', 'Frequente deslocamento à pé durante à jornada de trabalho',
-            'Esforço físico intenso', 'Levantamento e transporte manual de cargas ou volumes',
-            'Frequente ação de empurrar/puxar cargas ou volumes', 'Frequente execução de movimentos repetitivos',
-            'Manuseio de ferramentas e/ou objetos pesados por longos períodos',
-            'Uso frequente de força, pressão, preensão, flexão, extensão ou torção dos segmentos corporais',
-            'Compressão de partes do corpo por superfícies rígidas ou com quinas vivas',
-            'Flexões da coluna vertebral frequentes', 'Uso frequente de pedais', 'Uso frequente de alavancas',
-            'Elevação frequente de membros superiores',
-            'Manuseio ou movimentação de cargas e volumes sem pega ou com "pega pobre"',
-            'Exposição à vibração de corpo inteiro', 'Exposição à vibrações localizadas (mão, braço)',
-            'Uso frequente de escadas', 'Trabalho intensivo com teclado ou outros dispositivos de entrada de dados',
-            'Posto de trabalho improvisado/inadequado', 'Mobiliário sem meios de regulagem de ajustes',
-            'Equipamentos e/ou máquinas sem meios de regulagem de ajustes ou sem condições de uso',
-            'Posto de trabalho não planejado/adaptado para à posição sentada', 'Assento inadequado',
-            'Encosto do assento inadequado ou ausente',
-            'Mobiliário ou equipamento sem espaço para movimentação de segmentos corporais',
-            'Necessidade de alcançar objetos, documentos, controles, etc, além das zonas de alcance ideais',
-            'Equipamentos/mobiliário não adaptados à antropometria do trabalhador',
-            'Trabalho realizado sem pausas pré-definidas para descanso',
-            'Necessidade de manter ritmos intensos de trabalho', 'Trabalho com necessidade de variação de turnos',
-            'Monotonia', 'Trabalho noturno', 'Insuficiência de capacitação para à execução da tarefa',
-            'Trabalho com utilização rigorosa de metas de produção', 'Trabalho remunerado por produção',
-            'Cadência do trabalho imposta por um equipamento',
-            'Desequilíbrio entre tempo de trabalho e tempo de repouso',
-            'Pressão sonora fora dos parâmetros de conforto', 'Temperatura efetiva fora dos parâmetros de conforto',
-            'Velocidade do ar fora dos parâmetros de conforto', 'Umidade do ar fora dos parâmetros de conforto',
-            'Iluminação inadequada', 'Reflexos que causem desconforto ou prejudiquem à visão',
-            'Piso escorregadio ou irregular', 'Situações de estresse no local de trabalho',
-            'Situações de sobrecarga de trabalho mental', 'Exigência de concentração, atenção e memória',
-            'Trabalho em condições de difícil comunicação', 'Conflitos hierárquicos no trabalho',
-            'Problemas de relacionamento no trabalho', 'Assédio de qualquer natureza no trabalho',
-            'Dificuldades para cumprir ordens e determinações da chefia relacionadas ao trabalho',
-            'Realização de múltiplas tarefas com alta demanda mental/cognitiva', 'Insatisfação no trabalho',
-            'Falta de autonomia para a realização de tarefas no trabalho'
-        ],
-        'danos': [
-            'Distúrbios musculoesqueléticos em músculos e articulações dos membros superiores, inferiores e coluna.',
-            'Sobrecarga dos membros superiores e coluna vertebral; Aumento na pressão dos discos intervertebrais; Dor localizada.',
-            'Sobrecarga corporal, dores nos membros inferiores e em alguns casos na coluna vertebral e cansaço físico.',
-            'Sobrecarga corporal, dores nos membros inferiores e em alguns casos na coluna vertebral e cansaço físico.',
-            'Distúrbios musculoesqueléticos; Fadiga, Dor localizada; Redução da produtividade e da percepção de risco.',
-            'Distúrbios musculoesqueléticos; Fadiga, Dor localizada; Redução da produtividade e da percepção de risco.',
-            'Distúrbios musculoesqueléticos em músculos e articulações dos membros superiores, inferiores e coluna lombar.',
-            'Distúrbios osteomusculares em músculos e articulações dos membros utilizados na execução dos movimentos repetitivos.',
-            'Fadiga muscular; Dor localizada; Lesões musculares; Redução da produtividade e da percepção de risco.',
-            'Sobrecarga muscular, fadiga, dor localizada e perda de produtividade.',
-            'Restrição localizada temporária do fluxo cardiovascular.',
-            'Tensão na parte inferior das costas (coluna lombar), podendo causar fadiga, dor localizada e/ou lesões musculoesqueléticas.',
-            'Distúrbio musculoesqueléticos em músculos e articulações dos membros inferiores.',
-            'Distúrbios musculoesqueléticos em músculos e articulações dos membros superiores.',
-            'Sobrecarga na região do pescoço, ombros e braços, podendo causar fadiga e/ou dor localizada.',
-            'Sobrecarga corporal, aumento da força durante o manuseio, fadiga, dor localizada e perda de produtividade.',
-            'Alterações no sistema digestivo, sistema musculoesquelético, sistema nervoso, alterações na visão, enjoos, náuseas, palidez.',
-            'Alterações articulares e vasomotoras.',
-            'Distúrbios musculoesqueléticos em músculos e articulações dos membros inferiores.',
-            'Sobrecarga nas articulações das mãos, punhos e antebraços, podendo causar lesões como artrite e dificuldade de flexão.',
-            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
-            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
-            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
-            'Sobrecarga dos membros superiores e coluna vertebral; Aumento na pressão dos discos intervertebrais; Dor localizada.',
-            'Sobrecarga corporal e dores nos membros superiores, inferiores e coluna vertebral.',
-            'Sobrecarga corporal e dores na região da coluna vertebral.',
-            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
-            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
-            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
-            'Alterações psicofisiológicas; Sobrecarga e fadiga física e cognitiva; Perda de Produtividade e Redução da Percepção de Riscos.',
-            'Sobrecarga e fadiga física e cognitiva; Redução da Percepção de Risco.',
-            'Alterações psicofisiológicas e/ou sociais.',
-            'Fadiga cognitiva; Sonolência; Morosidade e Redução da Percepção de Riscos.',
-            'Alterações psicofisiológicas e/ou sociais.',
-            'Desconhecimento dos riscos aos quais se expõe e consequente redução da percepção de riscos.',
-            'Sobrecarga e fadiga física e cognitiva; Redução da Percepção de Risco.',
-            'Sobrecarga e fadiga física e cognitiva; Redução da Percepção de Risco.',
-            'Fadiga física e cognitiva.',
-            'Alterações psicofisiológicas; Sobrecarga e fadiga física e cognitiva; Perda de Produtividade e Redução da Percepção de Riscos.',
-            'Irritabilidade, estresse, dores de cabeça, perda de foco no trabalho e redução da produtividade.',
-            'Irritabilidade, estresse, dores de cabeça, perda de foco no trabalho e redução da produtividade.',
-            'Estresse, desconforto térmico, irritabilidade, dores de cabeça, perda foco no trabalho e redução da produtividade.',
-            'Cansaço, estresse, dor de cabeça, alergias, ressecamento da pele, crise de asma, infecções virais ou bacterianas.',
-            'Fadiga visual e cognitiva; Desconforto e Redução da Percepção de Riscos.',
-            'Fadiga visual e cognitiva; Desconforto; Perda de desempenho e Redução da Percepção de Riscos.',
-            'Fadiga muscular; Perda de desempenho; Escoriação; Ferimento; Luxação; Torção.',
-            'Alterações psicofisiológicas e sociais; Fadiga cognitiva; Perda de desempenho; Redução da percepção de risco.',
-            'Alterações psicofisiológicas, Fadiga cognitiva, Perda de desempenho e Redução da percepção de risco.',
-            'Alterações psicofisiológicas, Fadiga cognitiva, Perda de desempenho e Redução da percepção de risco.',
-            'Fadiga cognitiva e perda de desempenho.',
-            'Alterações psicofisiológicas e sociais; Fadiga cognitiva.',
-            'Alterações psicofisiológicas e sociais; Fadiga cognitiva.',
-            'Alterações psicofisiológicas e sociais; Fadiga cognitiva; Perda de desempenho; Redução da percepção de risco.',
-            'Alterações psicofisiológicas; Desconforto, Fadiga cognitiva, Perda de desempenho e Redução da percepção de risco.',
-            'Alterações psicofisiológicas; Desconforto, Fadiga muscular e cognitiva, Perda de desempenho e Redução da percepção de risco.',
-            'Alterações psicofisiológicas e sociais; Fadiga cognitiva; Irritabilidade; Perda de desempenho; Redução da percepção de risco.',
-            'Alterações psicofisiológicas; Desconforto, Fadiga cognitiva e Perda de desempenho.'
-        ]
-    },
-    'acidente': {
-        'riscos': [
-            'Absorção (por contato) de substância cáustica, tóxica ou nociva.', 'Afogamento, imersão, engolfamento.',
-            'Aprisionamento em, sob ou entre', 'Aprisionamento em, sob ou entre um objeto parado e outro em movimento.',
-            'Aprisionamento em, sob ou entre objetos em movimento convergente.',
-            'Aprisionamento em, sob ou entre dois ou mais objetos em movimento (sem encaixe).',
-            'Aprisionamento em, sob ou entre um objeto parado e outro em movimento.',
-            'Aprisionamento em, sob ou entre desabamento ou desmoronamento de edificação, estrutura, barreira, etc.',
-            'Arestas cortantes, superfícies com rebarbas, farpas ou elementos de fixação espostos',
-            'Ataque de ser vivo por mordedura, picada, chifrada, coice, etc.', 'Ataque de ser vivo com peçonha',
-            'Ataque de ser vivo com transmissão de doença', 'Ataque de ser vivo (inclusive humano)',
-            'Atrito ou abrasão por encostar em objeto', 'Atrito ou abrasão por manusear objeto',
-            'Atrito ou abrasão por corpo estranho no olho', 'Atrito ou abrasão', 'Atropelamento',
-            'Batida contra objeto parado ou em movimento', 'Carga Suspensa',
-            'Colisão entre veículos e/ou equipamentos autopropelidos',
-            'Condições climáticas adversas (sol, chuva, vento, etc.)',
-            'Contato com objeto ou substância em movimento',
-            'Contato com objeto ou substância a temperatura muito alta',
-            'Contato com objeto ou substância a temperatura muito baixa',
-            'Desabamento/Desmoronamento de edificação, estrutura e/ou materiais diversos.',
-            'Elementos Móveis e/ou Rotativos', 'Emergências na circunvizinhança',
-            'Equipamento pressurizado hidráulico ou pressurizado.', 'Exposição à Energia Elétrica',
-            'Ferramentas manuais', 'Ferramentas elétricas', 'Gases/vapores/poeiras (tóxicos ou não tóxicos)',
-            'Gases/vapores/poeiras inflamáveis', 'Impacto de pessoa contra objeto parado',
-            'Impacto de pessoa contra objeto em movimento', 'Impacto sofrido por pessoa.',
-            'Impacto sofrido por pessoa, de objeto em movimento', 'Impacto sofrido poe pessoa, de objeto que cai',
-            'Impacto sofrido poe pessoa, de objeto projetado', 'Inalação de substância tóxica/nociva.',
-            'Ingestão de substância cáustica, tóxica ou nociva.', 'Inalação, ingestão e/ou absorção.',
-            'Incêndio/Explosão', 'Objetos cortantes/perfurocortantes',
-            'Pessoas não autorizadas e/ou visitantes no local de trabalho',
-            'Portas, escotilhas, tampas, "bocas de visita", flanges',
-            'Projeção de Partículas sólidas e/ou líquidas',
-            'Queda de pessoa com diferença de nível de andaime, passarela, plataforma, etc.',
-            'Queda de pessoa com diferença de nível de escada (móvel ou fixa).',
-            'Queda de pessoa com diferença de nível de material empilhado.',
-            'Queda de pessoa com diferença de nível de veículo.',
-            'Queda de pessoa com diferença de nível em poço, escavação, abertura no piso, etc.',
-            'Queda de pessoa com diferença de nível ≤ 2m', 'Queda de pessoa com diferença de nível > 2m',
-            'Queda de pessoa em mesmo nível', 'Reação do corpo a seus movimentos (escorregão sem queda, etc.)',
-            'Vidro (recipientes, portas, bancadas, janelas, objetos diversos).', 'Soterramento',
-            'Substâncias tóxicas e/ou inflamáveis', 'Superfícies, substâncias e/ou objetos aquecidos',
-            'Superfícies, substâncias e/ou objetos em baixa temperatura',
-            'Tombamento, quebra e/ou ruptura de estrutura (fixa ou móvel)', 'Tombamento de máquina/equipamento',
-            'Trabalho à céu aberto', 'Trabalho em espaços confinados',
-            'Trabalho com máquinas portáteis rotativas.', 'Trabalho com máquinas e/ou equipamentos'
-        ],
-        'danos': [
-            'Intoxicação, envenenamento, queimadura, irritação ou reação alérgica.',
-            'Asfixia, desconforto respiratório, nível de consciência alterado, letargia, palidez, pele azulada, tosse, transtorno neurológico.',
-            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Corte, laceração, ferida contusa, punctura (ferida aberta).',
-            'Perfurações, cortes, arranhões, escoriações, fraturas.',
-            'Dor, inchaço, manchas arroxeadas, sangramento, hemorragia em regiões vitais, infecção, necrose, insuficiência renal.',
-            'Arranhões, lacerações, infecções bacterianas, raiva, entre outros tipos de doenças.',
-            'Ferimentos de diversos tipos, incluindo com uso de armas, cortes, perfurações, luxações, escoriações, fraturas.',
-            'Cortes, ferimentos, esfoladura, escoriações, raspagem superficial da pele, mucosas, etc.',
-            'Cortes, ferimentos, esfoladura, escoriações, raspagem superficial da pele, mucosas, etc.',
-            'Raspagem superficial das córneas.',
-            'Cortes, ferimentos, esfoladura, escoriações, raspagem superficial da pele, mucosas, etc.',
-            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Cortes, escoriações, luxações, fraturas, amputações.',
-            'Esmagamento, prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Intermação, insolação, câibra, exaustão, desidratação, resfriados.',
-            'Cortes, escoriações, luxações, fraturas, amputações.',
-            'Queimadura ou escaldadura.',
-            'Congelamento, geladura e outros efeitos da exposição à baixa temperatura.',
-            'Compressão e/ou esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Escoriação, ferimento, corte, luxação, fratura, amputação.',
-            'Danos materiais, danos pessoais (queimaduras, contusões, asfixia, aprosionamento, fraturas, etc.).',
-            'Ferimentos, rompimento do tímpano, deslocamento de retina ocular, projeção de partículas sólidas e liquidas, queimaduras, choque elétrico.',
-            'Choque elétrico e eletroplessão (eletrocussão).',
-            'Cortes, ferimentos, escoriações.',
-            'Cortes, ferimentos, escoriações, choque elétrico.',
-            'Irritação os olhos e/ou da pele, dermatites, doenças respiratórias, intoxicação.',
-            'Asfixia, queimaduras, morte por explosão.',
-            'Cortes, escoriações, luxações, fraturas, amputações.',
-            'Cortes, escoriações, luxações, fraturas, amputações.',
-            'Cortes, escoriações, luxações, fraturas, amputações.',
-            'Cortes, escoriações, luxações, fraturas, amputações.',
-            'Esmagamento, prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Escoriação, ferimento, perfuração, corte, luxação, fratura, prensamento.',
-            'Intoxicação, envenenamento, queimadura, irritação ou reação alérgica.',
-            'Intoxicação, envenenamento, queimadura, irritação ou reação alérgica.',
-            'Intoxicação, envenenamento, queimadura, irritação ou reação alérgica.',
-            'Queimadura de 1º, 2º ou 3º grau, asfixia,  arremessos, cortes, escoriações, luxações, fraturas.',
-            'Corte, laceração, ferida contusa, punctura (ferida aberta), perfuração.',
-            'Escoriação, ferimento, corte, luxação, fratura, entre outros danos devido às características do local e atividades realizadas.',
-            'Prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações, exposição à gases tóxicos.',
-            'Ferimento, corte, queimadura, perfuração, intoxicação.',
-            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
-            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
-            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
-            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
-            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
-            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
-            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
-            'Escoriações, ferimentos, cortes, luxações, fraturas.',
-            'Torções, distensões, rupturas ou outras lesões musculares internas.',
-            'Corte, ferimento, perfuração.',
-            'Asfixia, desconforto respiratório, nível de consciência alterado, letargia, palidez, pele azulada, tosse, transtorno neurológico.',
-            'Intoxicação, asfixia, queimaduras de  1º, 2º ou 3º grau.',
-            'Queimadura de 1º, 2º ou 3º grau.',
-            'Queimadura de 1º, 2º ou 3º grau.',
-            'Prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
-            'Intermação, insolação, câibra, exaustão, desidratação, resfriados.',
-            'Asfixia, hiperóxia, contaminação por poeiras e/ou gases tóxicos, queimadura de 1º, 2º ou 3º grau, arremessos, cortes, escoriações, luxações, fraturas.',
-            'Cortes, ferimentos, escoriações, amputações.',
-            'Prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações, choque elétrico.'
-        ]
-    },
-}
 
-def get_danos_por_riscos_pgr(categoria, riscos_selecionados):
-    """Retorna os danos associados aos riscos selecionados da planilha PGR"""
-    if categoria not in RISCOS_PGR_DADOS or not riscos_selecionados:
-        return ""
-    danos_lista = []
-    riscos_categoria = RISCOS_PGR_DADOS[categoria]["riscos"]
-    danos_categoria = RISCOS_PGR_DADOS[categoria]["danos"]
-    for risco in riscos_selecionados:
-        if risco in riscos_categoria:
-            indice = riscos_categoria.index(risco)
-            if indice < len(danos_categoria):
-                danos_lista.append(danos_categoria[indice])
-    return "; ".join(danos_lista) if danos_lista else ""
+SAIDA_ZIP = "ZIP com um .docx por funcionário"
+SAIDA_DOCUMENTO_UNICO = "Documento único para impressão (.docx)"
+
+PLACEHOLDERS_OS = (
+    "[NOME EMPRESA]", "[UNIDADE]", "[NOME FUNCIONÁRIO]", "[DATA DE ADMISSÃO]", "[SETOR]", "[FUNÇÃO]",
+    "[DESCRIÇÃO DE ATIVIDADES]", "[RISCOS FÍSICOS]", "[RISCOS DE ACIDENTE]", "[RISCOS QUÍMICOS]",
+    "[RISCOS BIOLÓGICOS]", "[RISCOS ERGONÔMICOS]", "[POSSÍVEIS DANOS RISCOS FÍSICOS]",
+    "[POSSÍVEIS DANOS RISCOS ACIDENTE]", "[POSSÍVEIS DANOS RISCOS QUÍMICOS]",
+    "[POSSÍVEIS DANOS RISCOS BIOLÓGICOS]", "[POSSÍVEIS DANOS RISCOS ERGONÔMICOS]", "[EPIS]", "[MEDIÇÕES]",
+)
 
 @st.cache_resource
 def init_managers():
     db_manager = DatabaseManager()
     auth_manager = AuthManager(db_manager)
     user_data_manager = UserDataManager(db_manager)
-    return db_manager, auth_manager, user_data_manager
+    generation_job_manager = GenerationJobManager(db_manager)
+    return db_manager, auth_manager, user_data_manager, generation_job_manager
+
+db_manager, auth_manager, user_data_manager, generation_job_manager = init_managers()
 
-db_manager, auth_manager, user_data_manager = init_managers()
+@st.cache_resource
+def obter_gerenciador_de_tarefas():
+    return GerenciadorDeTarefas()
+
+gerenciador_tarefas = obter_gerenciador_de_tarefas()
+
+@st.cache_resource
+def obter_cache_de_documentos():
+    # Compartilhado entre sessões; os mais antigos são descartados acima de 1 GB
+    return CacheDeDocumentos("os_generator_cache", limite_bytes=1024 * 1024 * 1024)
+
+@st.cache_resource
+def obter_cache_de_planilhas():
+    # Planilhas já lidas, por hash do conteúdo: reabrir a mesma planilha (outro dia, outra sessão) não a lê de novo
+    return CacheDePlanilhas("os_generator_planilhas", limite_bytes=512 * 1024 * 1024)
 
 st.markdown("""
 <style>
@@ -411,41 +174,24 @@ def init_user_session_state():
     if 'cargos_concluidos' not in st.session_state:
         st.session_state.cargos_concluidos = set()
 
-def normalizar_texto(texto):
-    if not isinstance(texto, str): return ""
-    return re.sub(r'[\s\W_]+', '', texto.lower().strip())
-
-def mapear_e_renomear_colunas_funcionarios(df):
-    df_copia = df.copy()
-    mapeamento = {
-        'nome_do_funcionario': ['nomedofuncionario', 'nome', 'funcionario', 'funcionário', 'colaborador', 'nomecompleto'],
-        'funcao': ['funcao', 'função', 'cargo'],
-        'data_de_admissao': ['datadeadmissao', 'dataadmissao', 'admissao', 'admissão'],
-        'setor': ['setordetrabalho', 'setor', 'area', 'área', 'departamento'],
-        'descricao_de_atividades': ['descricaodeatividades', 'atividades', 'descricaoatividades', 'descriçãodeatividades', 'tarefas', 'descricaodasTarefas'],
-        'empresa': ['empresa'],
-        'unidade': ['unidade']
-    }
-    colunas_renomeadas = {}
-    colunas_df_normalizadas = {normalizar_texto(col): col for col in df_copia.columns}
-    for nome_padrao, nomes_possiveis in mapeamento.items():
-        for nome_possivel in nomes_possiveis:
-            if nome_possivel in colunas_df_normalizadas:
-                coluna_original = colunas_df_normalizadas[nome_possivel]
-                colunas_renomeadas[coluna_original] = nome_padrao
-                break
-    df_copia.rename(columns=colunas_renomeadas, inplace=True)
-    return df_copia
-
-@st.cache_data
 def carregar_planilha(arquivo):
     if arquivo is None: return None
     try:
-        return pd.read_excel(arquivo)
+        # Só as colunas usadas na geração, lidas uma vez e depois mapeadas do cache em disco
+        return obter_cache_de_planilhas().ler_planilha(arquivo.getvalue(), formato_da_planilha(arquivo))
     except Exception as e:
-        st.error(f"Erro ao ler o ficheiro Excel: {e}")
+        st.error(f"Erro ao ler a planilha: {e}")
         return None
 
+@st.cache_data(max_entries=4)
+def validar_planilha(df_funcionarios):
+    return validar_funcionarios(df_funcionarios)
+
+@st.cache_resource(max_entries=8, show_spinner="Compilando o modelo de OS...")
+def compilar_modelo_os(hash_modelo, motor, _conteudo):
+    # Compartilhado entre sessões: o mesmo modelo enviado de novo (ou por outro usuário) não é recompilado
+    return ModeloCompilado(_conteudo, motor)
+
 @st.cache_data
 def obter_dados_pgr():
     data = [
@@ -478,174 +224,232 @@ def obter_dados_pgr():
     ]
     return pd.DataFrame(data)
 
-def substituir_placeholders(doc, contexto):
-    def aplicar_formatacao_padrao(run):
-        run.font.name = 'Segoe UI'
-        run.font.size = Pt(9)
-        return run
-
-    def processar_paragrafo(p):
-        texto_original_paragrafo = p.text
-        if "[MEDIÇÕES]" in texto_original_paragrafo:
-            for run in p.runs:
-                run.text = ''
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            medicoes_valor = contexto.get("[MEDIÇÕES]", "Não aplicável")
-            if medicoes_valor == "Não aplicável" or not medicoes_valor.strip():
-                run = aplicar_formatacao_padrao(p.add_run("Não aplicável"))
-                run.font.bold = False
-            else:
-                linhas = medicoes_valor.split('\n')
-                for i, linha in enumerate(linhas):
-                    if not linha.strip(): continue
-                    if i > 0: p.add_run().add_break()
-                    if ":" in linha:
-                        partes = linha.split(":", 1)
-                        agente_texto = partes[0].strip() + ":"
-                        valor_texto = partes[1].strip()
-                        run_agente = aplicar_formatacao_padrao(p.add_run(agente_texto + " "))
-                        run_agente.font.bold = True
-                        run_valor = aplicar_formatacao_padrao(p.add_run(valor_texto))
-                        run_valor.font.bold = False
-                    else:
-                        run_simples = aplicar_formatacao_padrao(p.add_run(linha))
-                        run_simples.font.bold = False
-            return
-        placeholders_no_paragrafo = [key for key in contexto if key in texto_original_paragrafo]
-        if not placeholders_no_paragrafo:
-            return
-        estilo_rotulo = {
-            'bold': p.runs[0].bold if p.runs else False,
-            'italic': p.runs[0].italic if p.runs else False,
-            'underline': p.runs[0].underline if p.runs else False,
-        }
-        texto_final = texto_original_paragrafo
-        for key in placeholders_no_paragrafo:
-            texto_final = texto_final.replace(key, str(contexto[key]))
-        p.clear()
-        texto_restante = texto_final
-        for i, key in enumerate(placeholders_no_paragrafo):
-            valor_placeholder = str(contexto[key])
-            partes = texto_restante.split(valor_placeholder, 1)
-            if partes[0]:
-                run_rotulo = aplicar_formatacao_padrao(p.add_run(partes[0]))
-                run_rotulo.font.bold = estilo_rotulo['bold']
-                run_rotulo.font.italic = estilo_rotulo['italic']
-                run_rotulo.underline = estilo_rotulo['underline']
-            run_valor = aplicar_formatacao_padrao(p.add_run(valor_placeholder))
-            run_valor.font.bold = False
-            run_valor.font.italic = False
-            run_valor.font.underline = False
-            texto_restante = partes[1]
-        if texto_restante:
-            run_final = aplicar_formatacao_padrao(p.add_run(texto_restante))
-            run_final.font.bold = estilo_rotulo['bold']
-            run_final.font.italic = estilo_rotulo['italic']
-            run_final.underline = estilo_rotulo['underline']
-
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for p in cell.paragraphs:
-                    processar_paragrafo(p)
-    for p in doc.paragraphs:
-        processar_paragrafo(p)
-
-def gerar_os(funcionario, df_pgr, riscos_selecionados, epis_manuais, medicoes_manuais, riscos_manuais, modelo_doc_carregado):
-    doc = Document(modelo_doc_carregado)
-    riscos_info = df_pgr[df_pgr['risco'].isin(riscos_selecionados)]
-    riscos_por_categoria = {cat: [] for cat in CATEGORIAS_RISCO.keys()}
-    danos_por_categoria = {cat: [] for cat in CATEGORIAS_RISCO.keys()}
-
-    for _, risco_row in riscos_info.iterrows():
-        categoria = str(risco_row.get("categoria", "")).lower()
-        if categoria in riscos_por_categoria:
-            riscos_por_categoria[categoria].append(str(risco_row.get("risco", "")))
-            danos = risco_row.get("possiveis_danos")
-            if pd.notna(danos): 
-                danos_por_categoria[categoria].append(str(danos))
-
-    if riscos_manuais:
-        map_categorias_rev = {v: k for k, v in CATEGORIAS_RISCO.items()}
-        for risco_manual in riscos_manuais:
-            categoria_display = risco_manual.get('category')
-            categoria_alvo = map_categorias_rev.get(categoria_display)
-            if categoria_alvo:
-                riscos_por_categoria[categoria_alvo].append(risco_manual.get('risk_name', ''))
-                if risco_manual.get('possible_damages'):
-                    danos_por_categoria[categoria_alvo].append(risco_manual.get('possible_damages'))
-
-    for cat in danos_por_categoria:
-        danos_por_categoria[cat] = sorted(list(set(danos_por_categoria[cat])))
-
-    medicoes_formatadas = []
-    for med in medicoes_manuais:
-        agente = str(med.get('agent', '')).strip()
-        valor = str(med.get('value', '')).strip()
-        unidade = str(med.get('unit', '')).strip()
-        epi_associado = str(med.get('epi_name', med.get('epi', ''))).strip()
-        if agente and agente not in ['', 'N/A', 'nan', 'None'] and valor and valor not in ['', 'N/A', 'nan', 'None']:
-            linha = f"{agente}: {valor}"
-            if unidade and unidade not in ['', 'N/A', 'nan', 'None']:
-                linha += f" {unidade}"
-            if epi_associado and epi_associado not in ['', 'N/A', 'nan', 'None']:
-                linha += f" | EPI: {epi_associado}"
-            medicoes_formatadas.append(linha)
-    medicoes_texto = "\n".join(medicoes_formatadas) if medicoes_formatadas else "Não aplicável"
-
-    data_admissao = "Não informado"
-    if 'data_de_admissao' in funcionario and pd.notna(funcionario['data_de_admissao']):
-        try: 
-            data_admissao = pd.to_datetime(funcionario['data_de_admissao']).strftime('%d/%m/%Y')
-        except Exception: 
-            data_admissao = str(funcionario['data_de_admissao'])
-    elif 'Data de Admissão' in funcionario and pd.notna(funcionario['Data de Admissão']):
-        try: 
-            data_admissao = pd.to_datetime(funcionario['Data de Admissão']).strftime('%d/%m/%Y')
-        except Exception: 
-            data_admissao = str(funcionario['Data de Admissão'])
-
-    descricao_atividades = "Não informado"
-    if 'descricao_de_atividades' in funcionario and pd.notna(funcionario['descricao_de_atividades']):
-        descricao_atividades = str(funcionario['descricao_de_atividades']).strip()
-    elif 'Descrição de Atividades' in funcionario and pd.notna(funcionario['Descrição de Atividades']):
-        descricao_atividades = str(funcionario['Descrição de Atividades']).strip()
-    if descricao_atividades == "Não informado" or descricao_atividades == "" or descricao_atividades == "nan":
-        funcao = str(funcionario.get('funcao', funcionario.get('Função', 'N/A')))
-        setor = str(funcionario.get('setor', funcionario.get('Setor', 'N/A')))
-        if funcao != 'N/A' and setor != 'N/A':
-            descricao_atividades = f"Atividades relacionadas à função de {funcao} no setor {setor}, incluindo todas as tarefas operacionais, administrativas e de apoio inerentes ao cargo."
-        else:
-            descricao_atividades = "Atividades operacionais, administrativas e de apoio conforme definido pela chefia imediata."
-
-    def tratar_lista_vazia(lista, separador=", "):
-        if not lista or all(not item.strip() for item in lista): 
-            return "Não identificado"
-        return separador.join(sorted(list(set(item for item in lista if item and item.strip()))))
-
-    contexto = {
-        "[NOME EMPRESA]": str(funcionario.get("empresa", funcionario.get("Empresa", "N/A"))), 
-        "[UNIDADE]": str(funcionario.get("unidade", funcionario.get("Unidade", "N/A"))),
-        "[NOME FUNCIONÁRIO]": str(funcionario.get("nome_do_funcionario", funcionario.get("Nome", "N/A"))), 
-        "[DATA DE ADMISSÃO]": data_admissao,
-        "[SETOR]": str(funcionario.get("setor", funcionario.get("Setor", "N/A"))), 
-        "[FUNÇÃO]": str(funcionario.get("funcao", funcionario.get("Função", "N/A"))),
-        "[DESCRIÇÃO DE ATIVIDADES]": descricao_atividades,
-        "[RISCOS FÍSICOS]": tratar_lista_vazia(riscos_por_categoria["fisico"]),
-        "[RISCOS DE ACIDENTE]": tratar_lista_vazia(riscos_por_categoria["acidente"]),
-        "[RISCOS QUÍMICOS]": tratar_lista_vazia(riscos_por_categoria["quimico"]),
-        "[RISCOS BIOLÓGICOS]": tratar_lista_vazia(riscos_por_categoria["biologico"]),
-        "[RISCOS ERGONÔMICOS]": tratar_lista_vazia(riscos_por_categoria["ergonomico"]),
-        "[POSSÍVEIS DANOS RISCOS FÍSICOS]": tratar_lista_vazia(danos_por_categoria["fisico"], "; "),
-        "[POSSÍVEIS DANOS RISCOS ACIDENTE]": tratar_lista_vazia(danos_por_categoria["acidente"], "; "),
-        "[POSSÍVEIS DANOS RISCOS QUÍMICOS]": tratar_lista_vazia(danos_por_categoria["quimico"], "; "),
-        "[POSSÍVEIS DANOS RISCOS BIOLÓGICOS]": tratar_lista_vazia(danos_por_categoria["biologico"], "; "),
-        "[POSSÍVEIS DANOS RISCOS ERGONÔMICOS]": tratar_lista_vazia(danos_por_categoria["ergonomico"], "; "),
-        "[EPIS]": tratar_lista_vazia([epi['epi_name'] for epi in epis_manuais]),
-        "[MEDIÇÕES]": medicoes_texto,
+def executar_geracao_zip(tarefa, modelo_do_lote, funcionarios, processos, estrategia_arquivo, comparar, nivel_compressao, cache=None):
+    """Tarefa em segundo plano: gera as OS direto num ZIP temporário"""
+    contextos = contextos_dos_funcionarios(funcionarios)
+    caminhos = caminhos_no_zip(funcionarios)
+    if estrategia_arquivo.divide_em_partes:
+        # Grupos contíguos: cada parte fecha assim que o último funcionário dela é gerado
+        grupos = grupos_no_zip(funcionarios, estrategia_arquivo.divisao)
+        ordem = ordenar_por_grupo(grupos)
+        contextos = [contextos[n] for n in ordem]
+        caminhos = [caminhos[n] for n in ordem]
+        grupos = [grupos[n] for n in ordem]
+
+    estatisticas = {}
+    # Renderização numa thread e gravação do ZIP nesta, ligadas por uma fila limitada
+    tarefa.metricas = MedidorDePipeline()
+    resultados = gerar_documentos(modelo_do_lote, contextos, processos, cache=cache, estatisticas=estatisticas)
+    renderizados = encadear(
+        zip(caminhos, resultados),
+        capacidade=max(CAPACIDADE_PADRAO, 4 * processos),
+        medidor=tarefa.metricas,
+        produtor="Renderização",
+        consumidor="Gravação do ZIP",
+    )
+
+    def documentos_gerados():
+        try:
+            for caminho, conteudo in renderizados:
+                tarefa.avancar()
+                yield caminho, conteudo
+        finally:
+            renderizados.close()
+            # Cancelamento: encerra também o pool de processos da renderização
+            resultados.close()
+
+    # Cada documento vai direto para o ZIP (em memória até 32 MB, depois em disco)
+    documentos = list(documentos_gerados()) if comparar else documentos_gerados()
+    prefixo = f"OS_Geradas_{time.strftime('%Y%m%d')}"
+    if estrategia_arquivo.divide_em_partes:
+        arquivo_zip = None
+        tamanho_zip = 0
+        nomes_usados = set()
+        # Sem capturar erros, cada documento gerado corresponde ao funcionário na mesma posição
+        documentos_com_grupo = ((caminho, conteudo, grupo) for (caminho, conteudo), grupo in zip(documentos, grupos))
+        for parte in estrategia_arquivo.criar_partes_temporarias(documentos_com_grupo):
+            parte['nome_arquivo'] = nome_da_parte(
+                prefixo, parte, numerar=bool(estrategia_arquivo.tamanho_parte), usados=nomes_usados
+            )
+            tamanho_zip += parte['arquivo'].seek(0, os.SEEK_END)
+            tarefa.publicar(parte)
+    else:
+        arquivo_zip = estrategia_arquivo.criar_zip_temporario(documentos)
+        tamanho_zip = arquivo_zip.seek(0, os.SEEK_END)
+    comparacao = None
+    if comparar:
+        comparacao = comparar_estrategias(documentos, [
+            EstrategiaArquivo(ARMAZENAR_DOCX),
+            EstrategiaArquivo(DEFLATE, 1),
+            EstrategiaArquivo(DEFLATE, nivel_compressao),
+            EstrategiaArquivo(DEFLATE_PARALELO, nivel_compressao),
+        ])
+    detalhe = f"ZIP: {tamanho_zip / (1024 * 1024):.2f} MB com {processos} processo(s) ({estrategia_arquivo})"
+    if cache is not None:
+        detalhe += f" · {estatisticas['reaproveitados']} OS reaproveitadas do cache, {estatisticas['gerados']} geradas"
+    if arquivo_zip is None:
+        detalhe += f" · {len(tarefa.partes_prontas())} partes"
+    return {
+        'arquivo': arquivo_zip,
+        'mensagem': f"🎉 **{len(contextos)} Ordens de Serviço geradas!**",
+        'detalhe': detalhe,
+        'comparacao': comparacao,
+        'pipeline': tarefa.metricas,
+        'rotulo': "📥 Baixar Todas as OS (.zip)",
+        'nome_arquivo': f"{prefixo}.zip",
+        'mime': "application/zip",
     }
-    substituir_placeholders(doc, contexto)
-    return doc
+
+def executar_documento_unico(tarefa, modelo_do_lote, funcionarios):
+    """Tarefa em segundo plano: todas as OS num único .docx para impressão"""
+    def contextos_com_progresso():
+        for contexto in contextos_dos_funcionarios(funcionarios):
+            tarefa.verificar_cancelamento()
+            yield contexto
+            tarefa.avancar()
+
+    try:
+        docx_bytes = modelo_do_lote.gerar_docx_unico(contextos_com_progresso())
+    except ValueError as e:
+        raise ValueError(f"Não foi possível gerar o documento único com este modelo: {e}") from e
+    return {
+        'arquivo': docx_bytes,
+        'mensagem': f"🎉 **{len(funcionarios)} Ordens de Serviço geradas em um único documento!**",
+        'detalhe': f"Documento: {len(docx_bytes) / (1024 * 1024):.2f} MB",
+        'comparacao': None,
+        'rotulo': "📥 Baixar Documento Único (.docx)",
+        'nome_arquivo': f"OS_Impressao_{time.strftime('%Y%m%d')}.docx",
+        'mime': "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    }
+
+@st.fragment(run_every=1.0)
+def acompanhar_tarefa(tarefa_id, user_id):
+    tarefa = gerenciador_tarefas.obter(tarefa_id, dono=user_id)
+    if tarefa is None or tarefa.finalizada:
+        # Sai do modo de acompanhamento e mostra o resultado na próxima execução completa
+        st.rerun()
+    progresso = tarefa.progresso()
+    st.progress(progresso['fracao'], text=f"{tarefa.descricao}: {progresso['feitos']}/{progresso['total']} documentos")
+    st.caption(f"{progresso['docs_por_segundo']:.1f} documentos/s · tempo restante estimado: {formatar_duracao(progresso['eta'])}")
+    if tarefa.metricas is not None:
+        etapas = " · ".join(
+            f"{estagio.nome}: {100 * tarefa.metricas.utilizacao(estagio):.0f}%" for estagio in tarefa.metricas.estagios
+        )
+        filas = " · ".join(f"fila {fila.profundidade}/{fila.capacidade}" for fila in tarefa.metricas.filas)
+        st.caption(f"Utilização — {etapas} · {filas}")
+    mostrar_partes_prontas(tarefa)
+    if tarefa.cancelamento_pedido:
+        st.info("Cancelando após o documento atual...")
+    elif st.button("⏹️ Cancelar geração", key=f"cancelar_{tarefa_id}"):
+        tarefa.cancelar()
+
+def mostrar_partes_prontas(tarefa):
+    """Botões de download dos ZIPs já fechados de um lote dividido em partes"""
+    partes = tarefa.partes_prontas()
+    if not partes:
+        return
+    st.markdown(f"**Partes prontas ({len(partes)})**")
+    for n, parte in enumerate(partes):
+        st.download_button(
+            label=f"📦 {parte['nome_arquivo']} ({parte['documentos']} OS)",
+            data=lambda arquivo=parte['arquivo']: ler_arquivo(arquivo),
+            file_name=parte['nome_arquivo'],
+            mime="application/zip",
+            key=f"parte_{tarefa.id}_{n}",
+        )
+
+def mostrar_resultado_da_tarefa(tarefa):
+    progresso = tarefa.progresso()
+    if progresso['situacao'] == CANCELADA:
+        st.warning(f"Geração cancelada após {progresso['feitos']} de {progresso['total']} documentos.")
+        mostrar_partes_prontas(tarefa)
+    elif progresso['situacao'] == FALHOU:
+        st.error(f"Erro na geração: {progresso['erro']}")
+    else:
+        resultado = tarefa.resultado
+        st.success(resultado['mensagem'])
+        st.caption(f"{resultado['detalhe']} em {formatar_duracao(progresso['decorrido'])} ({progresso['docs_por_segundo']:.1f} documentos/s)")
+        if resultado['comparacao']:
+            st.dataframe(pd.DataFrame(resultado['comparacao']), hide_index=True)
+        if resultado.get('pipeline') is not None:
+            with st.expander(f"⏱️ Etapas da geração (gargalo: {resultado['pipeline'].gargalo().nome})"):
+                st.dataframe(pd.DataFrame(resultado['pipeline'].relatorio()), hide_index=True)
+        arquivo = resultado['arquivo']
+        if arquivo is None:
+            mostrar_partes_prontas(tarefa)
+            return
+        st.download_button(
+            label=resultado['rotulo'], 
+            # Lido do arquivo temporário só quando o download é pedido
+            data=arquivo if isinstance(arquivo, bytes) else (lambda: ler_arquivo(arquivo)), 
+            file_name=resultado['nome_arquivo'], 
+            mime=resultado['mime'],
+            use_container_width=True
+        )
+
+SITUACOES_FILA = {
+    STATUS_QUEUED: "⏳ Na fila",
+    STATUS_RUNNING: "⚙️ Gerando",
+    STATUS_DONE: "✅ Concluído",
+    STATUS_FAILED: "❌ Falhou",
+    STATUS_CANCELLED: "⏹️ Cancelado",
+}
+
+def ler_resultado_do_lote(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+def mostrar_fila_persistente(user_id):
+    lotes = generation_job_manager.get_user_jobs(user_id)
+    if not lotes:
+        return
+    with st.expander(f"📬 Minhas gerações na fila ({len(lotes)})"):
+        for lote in lotes:
+            col1, col2 = st.columns([3, 1])
+            feitos = lote['done_items'] + lote['failed_items']
+            col1.markdown(f"**Lote #{lote['id']}** · {SITUACOES_FILA.get(lote['status'], lote['status'])} · {feitos}/{lote['total_items']} OS · criado em {parse_timestamp(lote['created_at']).astimezone():%d/%m/%Y %H:%M}")
+            if lote['failed_items']:
+                col1.caption(f"{lote['failed_items']} OS com erro não entraram no ZIP.")
+            if lote['error']:
+                col1.caption(f"Erro: {lote['error']}")
+            if lote['status'] in (STATUS_QUEUED, STATUS_RUNNING):
+                col1.progress(feitos / lote['total_items'] if lote['total_items'] else 0.0)
+                if col2.button("Cancelar", key=f"cancelar_lote_{lote['id']}"):
+                    generation_job_manager.cancel_job(lote['id'], user_id)
+                    st.rerun()
+            elif lote['status'] == STATUS_DONE and lote['result_path'] and os.path.exists(lote['result_path']):
+                col2.download_button(
+                    "📥 Baixar",
+                    data=lambda caminho=lote['result_path']: ler_resultado_do_lote(caminho),
+                    file_name=f"OS_Lote_{lote['id']}.zip",
+                    mime="application/zip",
+                    key=f"baixar_lote_{lote['id']}"
+                )
+        if st.button("🔄 Atualizar fila"):
+            st.rerun()
+
+def mostrar_validacao(df_funcionarios, linha_cabecalho):
+    """Resumo das verificações da planilha; devolve df sem as linhas que o usuário escolheu excluir"""
+    problemas = validar_planilha(df_funcionarios)
+    resumo = resumo_da_validacao(problemas)
+    sinalizadas = linhas_sinalizadas(problemas)
+    with st.expander(f"🩺 Validação da planilha ({int(sinalizadas.sum())} linha(s) com problema)", expanded=bool(sinalizadas.any())):
+        st.dataframe(resumo, hide_index=True, use_container_width=True)
+        if not sinalizadas.any():
+            st.success("Nenhum problema encontrado.")
+            return df_funcionarios
+        colunas = [col for col in ('nome_do_funcionario', 'setor', 'funcao', 'data_de_admissao') if col in df_funcionarios.columns]
+        detalhes = df_funcionarios.loc[sinalizadas, colunas].copy()
+        detalhes.insert(0, 'Linha', detalhes.index + linha_cabecalho + 1)
+        detalhes['Problemas'] = descricao_dos_problemas(problemas[sinalizadas])
+        st.dataframe(detalhes, hide_index=True, use_container_width=True)
+        encontradas = [v for v in VERIFICACOES if problemas[v].any()]
+        excluir = st.multiselect("Excluir da geração as linhas com:", encontradas, key="validacao_excluir")
+    if not excluir:
+        return df_funcionarios
+    excluidas = linhas_sinalizadas(problemas, excluir)
+    st.caption(f"{int(excluidas.sum())} linha(s) excluída(s) da geração pela validação.")
+    return df_funcionarios[~excluidas]
 
 def main():
     check_authentication()
@@ -661,19 +465,41 @@ def main():
         st.markdown("##### 📂 1. Carregue os Documentos")
         col1, col2 = st.columns(2)
         with col1:
-            arquivo_funcionarios = st.file_uploader("📄 **Planilha de Funcionários (.xlsx)**", type="xlsx")
+            arquivo_funcionarios = st.file_uploader(
+                "📄 **Planilha de Funcionários (.xlsx, .csv, .ods, .parquet)**", type=list(FORMATOS_PLANILHA)
+            )
         with col2:
             arquivo_modelo_os = st.file_uploader("📝 **Modelo de OS (.docx)**", type="docx")
 
+        motor_renderizacao = st.selectbox(
+            "Motor de renderização",
+            options=list(MOTORES_RENDERIZACAO),
+            format_func=MOTORES_RENDERIZACAO.get,
+            help="O XML direto preenche o word/document.xml do modelo sem passar pelo python-docx; use o python-docx se algum modelo não for gerado corretamente."
+        )
+
     if not arquivo_funcionarios or not arquivo_modelo_os:
         st.info("📋 Por favor, carregue a Planilha de Funcionários e o Modelo de OS para continuar.")
         return
+
+    conteudo_modelo = arquivo_modelo_os.getvalue()
+    modelo_compilado = compilar_modelo_os(hash_do_conteudo(conteudo_modelo), motor_renderizacao, conteudo_modelo)
+    relatorio_modelo = pd.DataFrame(modelo_compilado.relatorio_placeholders(PLACEHOLDERS_OS))
+    problemas_modelo = relatorio_modelo[~relatorio_modelo['Situação'].isin(['OK', 'Dividido em runs (normalizado)'])]
+    with st.expander(f"🔎 Placeholders do modelo ({len(modelo_compilado.diagnostico)} encontrados)", expanded=not problemas_modelo.empty):
+        if not problemas_modelo.empty:
+            st.warning(f"{len(problemas_modelo)} placeholder(s) precisam de atenção no modelo.")
+        st.dataframe(relatorio_modelo, hide_index=True, use_container_width=True)
     
     df_funcionarios_raw = carregar_planilha(arquivo_funcionarios)
     if df_funcionarios_raw is None:
         st.stop()
+    origem = df_funcionarios_raw.attrs.get('origem')
+    if origem and origem['detectada']:
+        st.info(f"Cabeçalho encontrado na aba **{origem['aba']}**, linha {origem['linha']}.")
 
     df_funcionarios = mapear_e_renomear_colunas_funcionarios(df_funcionarios_raw)
+    df_funcionarios = mostrar_validacao(df_funcionarios, origem['linha'] if origem else 1)
     df_pgr = obter_dados_pgr()
 
     with st.container(border=True):
@@ -801,16 +627,7 @@ def main():
                         st.rerun()
 
         # CORREÇÃO PRINCIPAL: Consolidar riscos em formato compatível com df_pgr
-        riscos_selecionados_para_df_pgr = []
-        for categoria_key in riscos_selecionados_pgr:
-            if riscos_selecionados_pgr[categoria_key]:
-                for risco_nome in riscos_selecionados_pgr[categoria_key]:
-                    danos = get_danos_por_riscos_pgr(categoria_key, [risco_nome])
-                    riscos_selecionados_para_df_pgr.append({
-                        'categoria': categoria_key,
-                        'risco': risco_nome,
-                        'possiveis_danos': danos
-                    })
+        riscos_selecionados_para_df_pgr = consolidar_riscos_pgr(riscos_selecionados_pgr)
 
         total_riscos = len(riscos_selecionados_para_df_pgr) + len(st.session_state.riscos_manuais_adicionados)
         if total_riscos > 0:
@@ -879,50 +696,103 @@ def main():
                             st.rerun()
 
     st.divider()
+    formato_saida = st.radio(
+        "Formato de saída",
+        options=[SAIDA_ZIP, SAIDA_DOCUMENTO_UNICO],
+        horizontal=True,
+        help="O documento único reúne todas as OS em um só .docx, uma por seção, pronto para impressão."
+    )
+    if formato_saida == SAIDA_ZIP:
+        with st.expander("🗜️ Compressão do arquivo .zip"):
+            modo_arquivo = st.selectbox("Estratégia", options=list(ESTRATEGIAS_ARQUIVO), format_func=ESTRATEGIAS_ARQUIVO.get)
+            nivel_compressao = st.slider("Nível de compressão (deflate)", min_value=1, max_value=9, value=6, disabled=modo_arquivo == ARMAZENAR_DOCX)
+            comparar_arquivo = st.checkbox("Comparar tempo e tamanho de todas as estratégias após gerar")
+        with st.expander("🗂️ Divisão do arquivo .zip"):
+            divisao_arquivo = st.selectbox("Dividir em", options=list(DIVISOES_ARQUIVO), format_func=DIVISOES_ARQUIVO.get)
+            tamanho_parte_mb = st.number_input(
+                "Tamanho máximo de cada parte (MB, 0 = sem limite)",
+                min_value=0,
+                value=0,
+                step=100,
+                help="Lotes muito grandes viram vários .zip menores; cada parte pode ser baixada assim que fica pronta."
+            )
+        estrategia_arquivo = EstrategiaArquivo(
+            modo_arquivo, nivel_compressao, divisao=divisao_arquivo, tamanho_parte=tamanho_parte_mb * 1024 * 1024
+        )
+        processos_geracao = st.number_input(
+            "Processos de geração",
+            min_value=1,
+            max_value=os.cpu_count() or 1,
+            value=1,
+            help="Com mais de um processo, os documentos são gerados em paralelo; cada processo compila o modelo uma vez. Compensa em lotes grandes."
+        )
+        usar_cache_documentos = st.checkbox(
+            "Reaproveitar OS já geradas",
+            value=True,
+            help="OS com o mesmo modelo e os mesmos dados já geradas antes são copiadas do cache em disco; só as linhas alteradas são geradas de novo."
+        )
+        usar_fila_persistente = st.checkbox(
+            "Enviar para a fila persistente",
+            help="O lote é gravado no banco e processado pelo trabalhador (python -m gerador_os.trabalhador); continua após reinícios do servidor e fica disponível para download depois."
+        )
+        if usar_fila_persistente and estrategia_arquivo.divide_em_partes:
+            st.caption("A fila persistente gera um único .zip por lote; a divisão em partes vale para a geração imediata.")
+    else:
+        usar_fila_persistente = False
+        st.caption("Cabeçalhos e rodapés do modelo são compartilhados por todas as OS do documento único: placeholders neles só podem ter dados comuns ao lote.")
     if st.button("🚀 Gerar OS para Funcionários Selecionados", type="primary", use_container_width=True, disabled=df_final_filtrado.empty):
-        with st.spinner(f"Gerando {len(df_final_filtrado)} documentos..."):
-            documentos_gerados = []
-            combinacoes_processadas = set()
-            
-            for _, func in df_final_filtrado.iterrows():
-                combinacoes_processadas.add((func['setor'], func['funcao']))
-                
-                # CORREÇÃO: Criar DataFrame consolidado com riscos selecionados
-                df_riscos_consolidado = pd.DataFrame(riscos_selecionados_para_df_pgr) if riscos_selecionados_para_df_pgr else pd.DataFrame(columns=['categoria', 'risco', 'possiveis_danos'])
-                nomes_riscos = df_riscos_consolidado['risco'].tolist() if not df_riscos_consolidado.empty else []
-                
-                doc = gerar_os(
-                    func, 
-                    df_riscos_consolidado,
-                    nomes_riscos,
-                    st.session_state.epis_adicionados,
-                    st.session_state.medicoes_adicionadas, 
-                    st.session_state.riscos_manuais_adicionados, 
-                    arquivo_modelo_os
-                )
-                doc_io = BytesIO()
-                doc.save(doc_io)
-                doc_io.seek(0)
-                nome_limpo = re.sub(r'[^\w\s-]', '', func.get("nome_do_funcionario", "Func_Sem_Nome")).strip().replace(" ", "_")
-                caminho_no_zip = f"{func.get('setor', 'SemSetor')}/{func.get('funcao', 'SemFuncao')}/OS_{nome_limpo}.docx"
-                documentos_gerados.append((caminho_no_zip, doc_io.getvalue()))
-            
-            st.session_state.cargos_concluidos.update(combinacoes_processadas)
-            
-            if documentos_gerados:
-                zip_buffer = BytesIO()
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for nome_arquivo, conteudo_doc in documentos_gerados:
-                        zip_file.writestr(nome_arquivo, conteudo_doc)
-                nome_arquivo_zip = f"OS_Geradas_{time.strftime('%Y%m%d')}.zip"
-                st.success(f"🎉 **{len(documentos_gerados)} Ordens de Serviço geradas!**")
-                st.download_button(
-                    label="📥 Baixar Todas as OS (.zip)", 
-                    data=zip_buffer.getvalue(), 
-                    file_name=nome_arquivo_zip, 
-                    mime="application/zip",
-                    use_container_width=True
-                )
+        df_riscos_consolidado = tabela_de_riscos(riscos_selecionados_para_df_pgr)
+        nomes_riscos = df_riscos_consolidado['risco'].tolist() if not df_riscos_consolidado.empty else []
+        # Riscos, danos, EPIs e medições são os mesmos para todo o lote: montados e renderizados uma vez
+        modelo_do_lote = ModeloDoLote(modelo_compilado, montar_contexto_lote(
+            df_riscos_consolidado,
+            nomes_riscos,
+            st.session_state.epis_adicionados,
+            st.session_state.medicoes_adicionadas,
+            st.session_state.riscos_manuais_adicionados
+        ))
+        st.session_state.cargos_concluidos.update(zip(df_final_filtrado['setor'], df_final_filtrado['funcao']))
+
+        if usar_fila_persistente:
+            itens_do_lote = list(zip(caminhos_no_zip(df_final_filtrado), contextos_dos_funcionarios(df_final_filtrado)))
+            sucesso, mensagem, job_id = generation_job_manager.create_job(
+                user_id, conteudo_modelo, modelo_compilado.motor, modelo_do_lote.contexto_lote,
+                itens_do_lote, estrategia_arquivo.modo, estrategia_arquivo.nivel
+            )
+            if sucesso:
+                st.success(f"📬 Lote #{job_id} enfileirado com {len(itens_do_lote)} OS. Acompanhe em \"Minhas gerações na fila\".")
+            else:
+                st.error(mensagem)
+        elif formato_saida == SAIDA_DOCUMENTO_UNICO:
+            tarefa = gerenciador_tarefas.iniciar(
+                len(df_final_filtrado), executar_documento_unico, modelo_do_lote, df_final_filtrado.copy(),
+                descricao="Documento único", dono=user_id
+            )
+            st.session_state.tarefa_geracao = tarefa.id
+            st.query_params['tarefa'] = tarefa.id
+        else:
+            tarefa = gerenciador_tarefas.iniciar(
+                len(df_final_filtrado), executar_geracao_zip, modelo_do_lote, df_final_filtrado.copy(),
+                processos_geracao, estrategia_arquivo, comparar_arquivo, nivel_compressao,
+                obter_cache_de_documentos() if usar_cache_documentos else None,
+                descricao="OS em .zip", dono=user_id
+            )
+            st.session_state.tarefa_geracao = tarefa.id
+            st.query_params['tarefa'] = tarefa.id
+
+    mostrar_fila_persistente(user_id)
+
+    # A tarefa continua no servidor se a página for recarregada: o id fica na URL
+    tarefa_id = st.session_state.get('tarefa_geracao') or st.query_params.get('tarefa')
+    tarefa = gerenciador_tarefas.obter(tarefa_id, dono=user_id) if tarefa_id else None
+    if tarefa is None:
+        if tarefa_id:
+            st.session_state.pop('tarefa_geracao', None)
+            st.query_params.pop('tarefa', None)
+    elif tarefa.finalizada:
+        mostrar_resultado_da_tarefa(tarefa)
+    else:
+        acompanhar_tarefa(tarefa.id, user_id)
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,7 @@
 import streamlit as st
 import pandas as pd
-from docx import Document
 from docx.shared import Pt
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-import zipfile
-from io import BytesIO
 import time
 import re
 from datetime import datetime, timedelta
@@ -15,6 +12,10 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from gerador_os.arquivamento import EstrategiaArquivo, ler_arquivo
+from gerador_os.modelo import ModeloSubstituicaoSimples
+from gerador_os.paralelo import gerar_documentos
+
 # Configuração da página
 st.set_page_config(
     page_title="Gerador de OS Profissional",
@@ -270,12 +271,9 @@ def logout():
     st.rerun()
 
 # Função para gerar OS (mantém a funcionalidade original)
-def gerar_os_do_funcionario(funcionario, modelo_docx):
-    """Gera OS individual para um funcionário"""
-    doc = Document(modelo_docx)
-
-    # Dicionário de substituições
-    substituicoes = {
+def substituicoes_do_funcionario(funcionario):
+    """Dicionário de substituições de um funcionário"""
+    return {
         '{NOME_FUNCIONARIO}': str(funcionario.get('NOME', '')),
         '{FUNCAO}': str(funcionario.get('FUNCAO', '')),
         '{SETOR}': str(funcionario.get('SETOR', '')),
@@ -293,74 +291,53 @@ def gerar_os_do_funcionario(funcionario, modelo_docx):
         '{OBSERVACOES}': str(funcionario.get('OBSERVACOES', ''))
     }
 
-    # Substituir nos parágrafos
-    for paragraph in doc.paragraphs:
-        for placeholder, value in substituicoes.items():
-            if placeholder in paragraph.text:
-                paragraph.text = paragraph.text.replace(placeholder, value)
-
-    # Substituir nas tabelas
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for placeholder, value in substituicoes.items():
-                    if placeholder in cell.text:
-                        cell.text = cell.text.replace(placeholder, value)
-
-    return doc
-
-def processar_os_lote(df_funcionarios, modelo_docx):
-    """Processa lote de funcionários e gera todas as OS"""
-    documentos_gerados = []
-
+def processar_os_lote(df_funcionarios, modelo_docx, processos=1):
+    """Processa lote de funcionários e gera cada OS à medida que fica pronta"""
     progress_bar = st.progress(0)
     status_text = st.empty()
 
-    for index, funcionario in df_funcionarios.iterrows():
-        try:
-            status_text.text(f"Gerando OS para: {funcionario.get('NOME', 'Funcionário')} ({index+1}/{len(df_funcionarios)})")
-
-            doc_gerado = gerar_os_do_funcionario(funcionario, modelo_docx)
-
-            # Gerar nome do arquivo
-            nome_funcionario = str(funcionario.get('NOME', f'Funcionario_{index}')).strip()
-            nome_funcionario = re.sub(r'[^\w\s-]', '', nome_funcionario).strip()
-            nome_funcionario = re.sub(r'[-\s]+', '_', nome_funcionario)
-
-            if not nome_funcionario:
-                nome_funcionario = f'Funcionario_{index}'
-
-            nome_arquivo = f"OS_{nome_funcionario}.docx"
+    modelo = ModeloSubstituicaoSimples(modelo_docx)
+    funcionarios = [funcionario for _, funcionario in df_funcionarios.iterrows()]
+    resultados = gerar_documentos(
+        modelo,
+        [substituicoes_do_funcionario(funcionario) for funcionario in funcionarios],
+        processos,
+        capturar_erros=True
+    )
+
+    for index, (funcionario, resultado) in enumerate(zip(funcionarios, resultados)):
+        status_text.text(f"Gerando OS para: {funcionario.get('NOME', 'Funcionário')} ({index+1}/{len(df_funcionarios)})")
+        progress_bar.progress((index + 1) / len(df_funcionarios))
+
+        if isinstance(resultado, Exception):
+            st.error(f"Erro ao gerar OS para {funcionario.get('NOME', 'funcionário')}: {str(resultado)}")
+            continue
 
-            # Salvar documento em bytes
-            doc_bytes = BytesIO()
-            doc_gerado.save(doc_bytes)
-            doc_bytes.seek(0)
+        # Gerar nome do arquivo
+        nome_funcionario = str(funcionario.get('NOME', f'Funcionario_{index}')).strip()
+        nome_funcionario = re.sub(r'[^\w\s-]', '', nome_funcionario).strip()
+        nome_funcionario = re.sub(r'[-\s]+', '_', nome_funcionario)
 
-            documentos_gerados.append({
-                'nome': nome_arquivo,
-                'conteudo': doc_bytes.getvalue()
-            })
+        if not nome_funcionario:
+            nome_funcionario = f'Funcionario_{index}'
 
-            progress_bar.progress((index + 1) / len(df_funcionarios))
+        nome_arquivo = f"OS_{nome_funcionario}.docx"
 
-        except Exception as e:
-            st.error(f"Erro ao gerar OS para {funcionario.get('NOME', 'funcionário')}: {str(e)}")
-            continue
+        yield {
+            'nome': nome_arquivo,
+            'conteudo': resultado
+        }
 
     status_text.text("✅ Processamento concluído!")
-    return documentos_gerados
 
-def criar_zip_documentos(documentos):
-    """Cria arquivo ZIP com todos os documentos"""
-    zip_buffer = BytesIO()
+def criar_zip_documentos(documentos, estrategia=None):
+    """Bytes do ZIP com todos os documentos, montado num arquivo temporário (em disco se for grande)
 
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for doc in documentos:
-            zip_file.writestr(doc['nome'], doc['conteudo'])
-
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
+    O temporário é fechado aqui: esta página não guarda o arquivo entre execuções.
+    """
+    estrategia = estrategia or EstrategiaArquivo()
+    with estrategia.criar_zip_temporario((doc['nome'], doc['conteudo']) for doc in documentos) as arquivo:
+        return ler_arquivo(arquivo)
 
 # Página de login com esqueci senha
 def show_login_page():
@@ -621,6 +598,14 @@ def show_generator_page():
             else:
                 st.info(f"💰 Serão utilizados **{creditos_necessarios} créditos** para gerar {creditos_necessarios} OS")
 
+                processos = st.number_input(
+                    "Processos de geração",
+                    min_value=1,
+                    max_value=os.cpu_count() or 1,
+                    value=1,
+                    help="Gera os documentos em paralelo em vários processos (lotes grandes)"
+                )
+
                 if st.button("🚀 GERAR ORDENS DE SERVIÇO", type="primary", use_container_width=True):
                     with st.spinner("Gerando ordens de serviço..."):
                         # Usar créditos
@@ -628,12 +613,20 @@ def show_generator_page():
                         st.session_state.users_db[username]['credits'] -= creditos_necessarios
                         st.session_state.user['credits'] -= creditos_necessarios
 
-                        # Gerar documentos
-                        documentos_gerados = processar_os_lote(df_funcionarios, arquivo_modelo)
+                        # Gerar documentos direto no ZIP, sem acumulá-los em memória
+                        documentos_gerados = []
+
+                        def documentos_do_lote():
+                            for documento in processar_os_lote(df_funcionarios, arquivo_modelo, processos):
+                                documentos_gerados.append(documento['nome'])
+                                yield documento
+
+                        inicio_zip = time.perf_counter()
+                        zip_data = criar_zip_documentos(documentos_do_lote())
+                        tamanho_zip = len(zip_data)
 
                         if documentos_gerados:
-                            # Criar ZIP
-                            zip_data = criar_zip_documentos(documentos_gerados)
+                            st.caption(f"ZIP: {tamanho_zip / (1024 * 1024):.2f} MB em {time.perf_counter() - inicio_zip:.2f}s")
 
                             st.success(f"✅ {len(documentos_gerados)} ordens de serviço geradas com sucesso!")
                             st.balloons()
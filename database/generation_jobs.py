@@ -0,0 +1,278 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+def utc_now():
+    """Instante atual em UTC, em ISO 8601 de largura fixa: a fila grava e compara sempre neste formato"""
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+def parse_timestamp(value):
+    """datetime com fuso de um campo de data da fila (lotes antigos: texto sem fuso, em UTC)"""
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+class GenerationJobManager:
+    # Lote "em execução" sem sinal do trabalhador há mais que isso é considerado abandonado
+    STALE_AFTER = timedelta(minutes=2)
+    # Intervalo do heartbeat enviado pelo trabalhador enquanto processa um lote
+    HEARTBEAT_EVERY = STALE_AFTER / 4
+
+    def __init__(self, db_manager, storage_dir=None):
+        self.db = db_manager
+        self.storage_dir = storage_dir or os.path.join(
+            os.path.dirname(os.path.abspath(db_manager.db_path)), 'os_generator_jobs'
+        )
+
+    def job_dir(self, job_id):
+        """Pasta com o modelo, os documentos já gerados e o ZIP final do lote"""
+        return os.path.join(self.storage_dir, str(job_id))
+
+    # ===== CRIAÇÃO E CONSULTA =====
+
+    def create_job(self, user_id, template_bytes, engine, batch_context, items, archive_mode, compress_level=6):
+        """Enfileira um lote; items é uma lista de (caminho no zip, contexto do funcionário)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                INSERT INTO generation_jobs (user_id, status, template_path, template_hash, engine,
+                                             batch_context, archive_mode, compress_level, total_items, created_at)
+                VALUES (?, ?, '', ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, STATUS_QUEUED, hashlib.sha256(template_bytes).hexdigest(), engine,
+                  json.dumps(batch_context), archive_mode, compress_level, len(items), utc_now()))
+            job_id = cursor.lastrowid
+
+            # O modelo fica em disco antes do commit: o trabalhador nunca vê um lote sem modelo
+            os.makedirs(self.job_dir(job_id), exist_ok=True)
+            template_path = os.path.join(self.job_dir(job_id), 'modelo.docx')
+            with open(template_path, 'wb') as f:
+                f.write(template_bytes)
+            cursor.execute('UPDATE generation_jobs SET template_path = ? WHERE id = ?', (template_path, job_id))
+
+            cursor.executemany('''
+                INSERT INTO generation_job_items (job_id, position, zip_path, context)
+                VALUES (?, ?, ?, ?)
+            ''', [(job_id, position, zip_path, json.dumps(context))
+                  for position, (zip_path, context) in enumerate(items)])
+
+            conn.commit()
+            conn.close()
+
+            self.db.log_activity(user_id, 'queue_generation_job', {'job_id': job_id, 'items': len(items)})
+            return True, "Lote enfileirado com sucesso", job_id
+
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            return False, f"Erro ao enfileirar lote: {str(e)}", None
+
+    def get_job(self, job_id, user_id=None):
+        """Retorna um lote (apenas se pertencer ao usuário, quando informado)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        if user_id is None:
+            cursor.execute('SELECT * FROM generation_jobs WHERE id = ?', (job_id,))
+        else:
+            cursor.execute('SELECT * FROM generation_jobs WHERE id = ? AND user_id = ?', (job_id, user_id))
+
+        row = cursor.fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def get_user_jobs(self, user_id, limit=20):
+        """Retorna os lotes mais recentes do usuário"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, status, total_items, done_items, failed_items, result_path, error,
+                   created_at, started_at, finished_at
+            FROM generation_jobs
+            WHERE user_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (user_id, limit))
+
+        jobs = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return jobs
+
+    def cancel_job(self, job_id, user_id):
+        """Cancela um lote na fila ou em execução; o trabalhador para no próximo documento"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE generation_jobs
+            SET status = ?, finished_at = ?
+            WHERE id = ? AND user_id = ? AND status IN (?, ?)
+        ''', (STATUS_CANCELLED, utc_now(), job_id, user_id, STATUS_QUEUED, STATUS_RUNNING))
+
+        cancelled = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return cancelled
+
+    # ===== USO PELO TRABALHADOR =====
+
+    def claim_next_job(self, worker_id):
+        """Reserva o próximo lote na fila, ou um lote em execução abandonado por um trabalhador que caiu"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        now = datetime.now(timezone.utc)
+        stale_before = (now - self.STALE_AFTER).isoformat(timespec='microseconds')
+        now = now.isoformat(timespec='microseconds')
+
+        # BEGIN IMMEDIATE: dois trabalhadores não reservam o mesmo lote
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('''
+            SELECT * FROM generation_jobs
+            WHERE status = ? OR (status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?))
+            ORDER BY id
+            LIMIT 1
+        ''', (STATUS_QUEUED, STATUS_RUNNING, stale_before))
+
+        row = cursor.fetchone()
+        if not row:
+            conn.rollback()
+            conn.close()
+            return None
+
+        cursor.execute('''
+            UPDATE generation_jobs
+            SET status = ?, worker_id = ?, started_at = COALESCE(started_at, ?), heartbeat_at = ?
+            WHERE id = ?
+        ''', (STATUS_RUNNING, worker_id, now, now, row['id']))
+
+        conn.commit()
+        conn.close()
+        job = dict(row)
+        job['status'] = STATUS_RUNNING
+        return job
+
+    def get_pending_items(self, job_id):
+        """Documentos ainda não gerados do lote, na ordem original"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, position, zip_path, context
+            FROM generation_job_items
+            WHERE job_id = ? AND status = 'pending'
+            ORDER BY position
+        ''', (job_id,))
+
+        items = []
+        for row in cursor.fetchall():
+            items.append({
+                'id': row['id'],
+                'position': row['position'],
+                'zip_path': row['zip_path'],
+                'context': json.loads(row['context'])
+            })
+
+        conn.close()
+        return items
+
+    def _status_for_worker(self, cursor, job_id, worker_id):
+        """Status do lote, ou None se ele foi reservado por outro trabalhador"""
+        cursor.execute('SELECT status, worker_id FROM generation_jobs WHERE id = ?', (job_id,))
+        row = cursor.fetchone()
+        if row is None or row['worker_id'] != worker_id:
+            return None
+        return row['status']
+
+    def checkpoint_item(self, job_id, worker_id, item_id, output_path=None, error=None):
+        """Registra um documento pronto (ou com erro) e retorna o status atual do lote
+
+        Retorna None, sem registrar nada, se o lote já não pertence a este trabalhador.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        now = utc_now()
+
+        cursor.execute('''
+            UPDATE generation_job_items
+            SET status = ?, output_path = ?, error = ?, finished_at = ?
+            WHERE id = ? AND status = 'pending'
+              AND EXISTS (SELECT 1 FROM generation_jobs WHERE id = ? AND worker_id = ? AND status = ?)
+        ''', ('failed' if error else 'done', output_path, error, now, item_id, job_id, worker_id, STATUS_RUNNING))
+
+        if cursor.rowcount:
+            counter = 'failed_items' if error else 'done_items'
+            cursor.execute(f'''
+                UPDATE generation_jobs
+                SET {counter} = {counter} + 1, heartbeat_at = ?
+                WHERE id = ?
+            ''', (now, job_id))
+
+        status = self._status_for_worker(cursor, job_id, worker_id)
+
+        conn.commit()
+        conn.close()
+        return status
+
+    def heartbeat(self, job_id, worker_id):
+        """Sinaliza que o trabalhador segue vivo; retorna o status atual do lote
+
+        Retorna None se o lote foi reservado por outro trabalhador.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE generation_jobs SET heartbeat_at = ?
+            WHERE id = ? AND worker_id = ? AND status = ?
+        ''', (utc_now(), job_id, worker_id, STATUS_RUNNING))
+        status = self._status_for_worker(cursor, job_id, worker_id)
+
+        conn.commit()
+        conn.close()
+        return status
+
+    def get_done_items(self, job_id):
+        """(caminho no zip, arquivo gerado) dos documentos prontos, na ordem original"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT zip_path, output_path
+            FROM generation_job_items
+            WHERE job_id = ? AND status = 'done'
+            ORDER BY position
+        ''', (job_id,))
+
+        items = [(row['zip_path'], row['output_path']) for row in cursor.fetchall()]
+        conn.close()
+        return items
+
+    def finish_job(self, job_id, worker_id, result_path=None, error=None):
+        """Encerra o lote como concluído (com o ZIP final) ou como falho
+
+        Só vale para o trabalhador que detém o lote; retorna se o lote foi encerrado.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE generation_jobs
+            SET status = ?, result_path = ?, error = ?, finished_at = ?
+            WHERE id = ? AND worker_id = ? AND status = ?
+        ''', (STATUS_FAILED if error else STATUS_DONE, result_path, error, utc_now(),
+              job_id, worker_id, STATUS_RUNNING))
+
+        finished = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return finished
@@ -97,6 +97,50 @@ class DatabaseManager:
             )
         ''')
         
+        # Fila persistente de geração: um lote por linha, processado por um trabalhador separado.
+        # Todas as datas da fila são gravadas pelo Python, em UTC (generation_jobs.utc_now)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS generation_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                template_path TEXT NOT NULL,
+                template_hash TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                batch_context TEXT NOT NULL,
+                archive_mode TEXT NOT NULL,
+                compress_level INTEGER NOT NULL DEFAULT 6,
+                total_items INTEGER NOT NULL,
+                done_items INTEGER NOT NULL DEFAULT 0,
+                failed_items INTEGER NOT NULL DEFAULT 0,
+                result_path TEXT,
+                error TEXT,
+                worker_id TEXT,
+                created_at TIMESTAMP,
+                started_at TIMESTAMP,
+                heartbeat_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        # Documentos de cada lote; cada documento pronto é um checkpoint para retomar após reinício
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS generation_job_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                zip_path TEXT NOT NULL,
+                context TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                output_path TEXT,
+                error TEXT,
+                finished_at TIMESTAMP,
+                UNIQUE (job_id, position),
+                FOREIGN KEY (job_id) REFERENCES generation_jobs (id)
+            )
+        ''')
+        
         # Criar índices para melhor performance
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users (email)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_token ON user_sessions (session_token)')
@@ -105,6 +149,12 @@ class DatabaseManager:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_measurements_user ON user_measurements (user_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_epis_user ON user_epis (user_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_risks_user ON user_manual_risks (user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON generation_jobs (status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_user ON generation_jobs (user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_items_job ON generation_job_items (job_id, status, position)')
+        
+        # WAL: o trabalhador grava checkpoints enquanto o app lê o progresso sem bloqueios
+        cursor.execute('PRAGMA journal_mode=WAL')
         
         conn.commit()
         conn.close()
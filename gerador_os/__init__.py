@@ -0,0 +1 @@
+# Motor de geração de OS: modelos .docx compilados e renderização em lote
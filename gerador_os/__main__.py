@@ -0,0 +1,6 @@
+import sys
+
+from gerador_os.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import itertools
+import os
+import re
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from gerador_os.pacote import EntradaZip, escrever_zip
+
+ARMAZENAR_DOCX = 'armazenar_docx'
+DEFLATE = 'deflate'
+DEFLATE_PARALELO = 'deflate_paralelo'
+ESTRATEGIAS_ARQUIVO = {
+    ARMAZENAR_DOCX: 'Armazenar .docx sem recomprimir (mais rápido)',
+    DEFLATE: 'Deflate em todos os arquivos',
+    DEFLATE_PARALELO: 'Deflate paralelo (vários núcleos)',
+}
+
+DIVISAO_UNICA = 'unica'
+DIVISAO_SETOR = 'setor'
+DIVISAO_SETOR_FUNCAO = 'setor_funcao'
+DIVISOES_ARQUIVO = {
+    DIVISAO_UNICA: 'Um único .zip',
+    DIVISAO_SETOR: 'Um .zip por setor',
+    DIVISAO_SETOR_FUNCAO: 'Um .zip por setor e função',
+}
+
+# Cabeçalho local e registro no diretório central de cada membro, sem contar o nome
+SOBRECARGA_POR_ENTRADA = 30 + 46
+
+# Acima deste tamanho o ZIP em construção passa da memória para um arquivo temporário em disco
+LIMITE_ZIP_EM_MEMORIA = 32 * 1024 * 1024
+
+class EstrategiaArquivo:
+    """Como os documentos gerados são gravados no ZIP final"""
+
+    def __init__(self, modo=ARMAZENAR_DOCX, nivel=6, trabalhadores=None, divisao=DIVISAO_UNICA, tamanho_parte=None):
+        self.modo = modo
+        self.nivel = nivel
+        self.trabalhadores = trabalhadores or os.cpu_count() or 1
+        self.divisao = divisao
+        self.tamanho_parte = tamanho_parte
+
+    @property
+    def divide_em_partes(self):
+        return self.divisao != DIVISAO_UNICA or bool(self.tamanho_parte)
+
+    def __str__(self):
+        descricao = ESTRATEGIAS_ARQUIVO.get(self.modo, self.modo)
+        return descricao if self.modo == ARMAZENAR_DOCX else f"{descricao}, nível {self.nivel}"
+
+    def metodo_para(self, nome):
+        """Um .docx já é um ZIP comprimido; armazená-lo evita a segunda compressão"""
+        if self.modo == ARMAZENAR_DOCX and nome.lower().endswith('.docx'):
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def criar_zip(self, documentos):
+        """Bytes do ZIP com os (nome, conteúdo) informados"""
+        zip_buffer = BytesIO()
+        self.escrever_zip(zip_buffer, documentos)
+        return zip_buffer.getvalue()
+
+    def criar_zip_temporario(self, documentos, limite_em_memoria=LIMITE_ZIP_EM_MEMORIA):
+        """ZIP num SpooledTemporaryFile, gravado documento a documento à medida que chegam"""
+        arquivo = tempfile.SpooledTemporaryFile(max_size=limite_em_memoria, suffix='.zip')
+        try:
+            self.escrever_zip(arquivo, documentos)
+        except BaseException:
+            arquivo.close()
+            raise
+        arquivo.seek(0)
+        return arquivo
+
+    def criar_partes_temporarias(self, documentos, limite_em_memoria=LIMITE_ZIP_EM_MEMORIA):
+        """Um ZIP temporário por parte, entregue assim que a parte fecha
+
+        Recebe (nome, conteúdo, grupo), com cada grupo contíguo (ver ordenar_por_grupo).
+        Gera dicts com 'grupo', 'numero', 'documentos' e 'arquivo'.
+        """
+        quantidade = 0
+
+        def contados(membros):
+            nonlocal quantidade
+            for nome, conteudo, _ in membros:
+                quantidade += 1
+                yield nome, conteudo
+
+        chave = ChaveDaParte(self.tamanho_parte)
+        for (grupo, numero), membros in itertools.groupby(documentos, key=chave):
+            quantidade = 0
+            arquivo = self.criar_zip_temporario(contados(membros), limite_em_memoria)
+            yield {'grupo': grupo, 'numero': numero, 'documentos': quantidade, 'arquivo': arquivo}
+
+    def escrever_zip(self, destino, documentos):
+        """Grava no arquivo destino os (nome, conteúdo) do iterável, sem acumulá-los"""
+        if self.modo == DEFLATE_PARALELO:
+            self._escrever_zip_paralelo(destino, documentos)
+            return
+        with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED, compresslevel=self.nivel) as zip_file:
+            for nome_arquivo, conteudo in documentos:
+                zip_file.writestr(nome_arquivo, conteudo, compress_type=self.metodo_para(nome_arquivo))
+
+    def _escrever_zip_paralelo(self, destino, documentos):
+        # zlib libera o GIL durante a compressão, então threads bastam para usar vários núcleos
+        date_time = time.localtime(time.time())[:6]
+        with ThreadPoolExecutor(max_workers=self.trabalhadores) as executor:
+            escrever_zip(destino, mapear_em_ordem(
+                executor,
+                lambda documento: EntradaZip.comprimir(documento[0], documento[1], date_time, self.nivel),
+                documentos,
+                self.trabalhadores * 2,
+            ))
+
+def ordenar_por_grupo(grupos):
+    """Posições dos documentos com cada grupo contíguo, mantendo a ordem original dentro dele"""
+    return sorted(range(len(grupos)), key=grupos.__getitem__)
+
+class ChaveDaParte:
+    """Chave (grupo, número da parte) para itertools.groupby
+
+    Abre uma nova parte quando o grupo muda ou quando o próximo documento passaria
+    do tamanho máximo; uma parte sempre recebe ao menos um documento.
+    """
+
+    def __init__(self, tamanho_maximo=None):
+        self.tamanho_maximo = tamanho_maximo
+        self.grupo = None
+        self.numero = 0
+        self.acumulado = 0
+
+    def __call__(self, documento):
+        caminho, conteudo, grupo = documento
+        tamanho = len(conteudo) + SOBRECARGA_POR_ENTRADA + 2 * len(caminho.encode('utf-8'))
+        if grupo != self.grupo:
+            self.grupo, self.numero, self.acumulado = grupo, 1, 0
+        elif self.tamanho_maximo and self.acumulado + tamanho > self.tamanho_maximo:
+            self.numero += 1
+            self.acumulado = 0
+        self.acumulado += tamanho
+        return self.grupo, self.numero
+
+def nome_da_parte(prefixo, parte, numerar=False, usados=None):
+    """OS_Geradas_AAAAMMDD[_Setor[_Função]][_parteN][_2].zip
+
+    Grupos diferentes podem dar o mesmo nome depois de limpos ('Setor A' e 'Setor_A');
+    com o conjunto `usados`, os nomes repetidos recebem um sufixo numérico.
+    """
+    nome = prefixo
+    for componente in parte['grupo']:
+        nome += '_' + (re.sub(r'[^\w-]+', '_', componente).strip('_') or 'sem_nome')
+    if numerar:
+        nome += f"_parte{parte['numero']}"
+    if usados is not None:
+        base, sufixo = nome, 2
+        # Sem distinguir maiúsculas: sistemas de arquivos como o do Windows não distinguem
+        while nome.lower() in usados:
+            nome, sufixo = f"{base}_{sufixo}", sufixo + 1
+        usados.add(nome.lower())
+    return f"{nome}.zip"
+
+def mapear_em_ordem(executor, funcao, itens, limite):
+    """Como executor.map, mas com no máximo `limite` tarefas pendentes (não consome o iterável todo)"""
+    pendentes = deque()
+    for item in itens:
+        pendentes.append(executor.submit(funcao, item))
+        if len(pendentes) >= limite:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+def ler_arquivo(arquivo):
+    """Conteúdo completo de um arquivo já gravado, lido do início"""
+    arquivo.seek(0)
+    return arquivo.read()
+
+def comparar_estrategias(documentos, estrategias):
+    """Tempo e tamanho do ZIP para cada estrategia, sobre os mesmos documentos"""
+    documentos = list(documentos)
+    resultados = []
+    for estrategia in estrategias:
+        inicio = time.perf_counter()
+        tamanho = len(estrategia.criar_zip(documentos))
+        resultados.append({
+            'Estratégia': str(estrategia),
+            'Tempo (s)': round(time.perf_counter() - inicio, 3),
+            'Tamanho (MB)': round(tamanho / (1024 * 1024), 2),
+        })
+    return resultados
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+# Muda quando a renderização passa a produzir bytes diferentes para o mesmo contexto
+VERSAO_RENDERIZACAO = 1
+
+def chave_de_conteudo(*partes):
+    """SHA-256 de partes serializadas em JSON (a ordem das chaves dos dicionários conta)"""
+    h = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, dict):
+            parte = list(parte.items())
+        h.update(json.dumps(parte, ensure_ascii=False, default=str).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+class CacheDeDocumentos:
+    """.docx gerados guardados em disco pela chave do conteúdo, com descarte LRU pelo tamanho total"""
+
+    EXTENSAO = '.docx'
+
+    def __init__(self, pasta, limite_bytes=1024 * 1024 * 1024):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self._trava = threading.Lock()
+        os.makedirs(pasta, exist_ok=True)
+        self._tamanho_total = sum(tamanho for _, _, tamanho in self._arquivos())
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave[:2], f"{chave}{self.EXTENSAO}")
+
+    def _arquivos(self):
+        for raiz, _, nomes in os.walk(self.pasta):
+            for nome in nomes:
+                if nome.endswith(self.EXTENSAO):
+                    caminho = os.path.join(raiz, nome)
+                    try:
+                        estado = os.stat(caminho)
+                    except FileNotFoundError:
+                        continue
+                    yield caminho, estado.st_mtime, estado.st_size
+
+    def contem(self, chave):
+        return os.path.exists(self._caminho(chave))
+
+    def obter(self, chave):
+        """Bytes guardados ou None; a leitura marca o documento como usado recentemente"""
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as f:
+                conteudo = f.read()
+            os.utime(caminho)
+        except FileNotFoundError:
+            return None
+        return conteudo
+
+    def guardar(self, chave, conteudo):
+        caminho = self._caminho(chave)
+        if os.path.exists(caminho):
+            return
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+        self._registrar(len(conteudo))
+
+    def _registrar(self, tamanho):
+        with self._trava:
+            self._tamanho_total += tamanho
+            if self._tamanho_total > self.limite_bytes:
+                self._descartar_antigos()
+
+    def _descartar_antigos(self):
+        # Recontagem em disco: outros processos também gravam e descartam na mesma pasta
+        arquivos = sorted(self._arquivos(), key=lambda arquivo: arquivo[1])
+        total = sum(tamanho for _, _, tamanho in arquivos)
+        alvo = self.limite_bytes * 0.9
+        for caminho, _, tamanho in arquivos:
+            if total <= alvo:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+        self._tamanho_total = total
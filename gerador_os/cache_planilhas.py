@@ -0,0 +1,65 @@
+import hashlib
+import io
+import os
+import uuid
+
+import numpy as np
+import pyarrow.feather as feather
+
+from gerador_os.cache_documentos import CacheDeDocumentos
+from gerador_os.planilhas import VERSAO_LEITURA, ler_planilha_funcionarios
+
+def chave_da_planilha(conteudo, formato):
+    """SHA-256 dos bytes enviados, junto com o formato e a versão do leitor"""
+    return hashlib.sha256(f"planilha-v{VERSAO_LEITURA}-{formato}\0".encode('utf-8') + conteudo).hexdigest()
+
+class CacheDePlanilhas(CacheDeDocumentos):
+    """Planilhas já lidas guardadas em Feather (Arrow) sem compressão, lidas de volta por mapeamento em memória
+
+    Mesmo descarte LRU pelo tamanho total do cache de documentos. Planilhas que o Arrow não
+    consegue representar (colunas com números e textos misturados, cabeçalhos que não são
+    texto) não são guardadas e voltam a ser lidas do arquivo.
+    """
+
+    EXTENSAO = '.feather'
+
+    def obter(self, chave):
+        """DataFrame guardado ou None; a leitura marca a planilha como usada recentemente"""
+        caminho = self._caminho(chave)
+        try:
+            df = feather.read_table(caminho, memory_map=True).to_pandas()
+            os.utime(caminho)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Arquivo truncado ou de outra versão do Arrow: lê a planilha de novo
+            return None
+        # O Arrow devolve None nos vazios de colunas de objetos; pd.read_excel dá NaN
+        for coluna in df.columns[df.dtypes == object]:
+            df[coluna] = df[coluna].where(df[coluna].notna(), np.nan)
+        return df
+
+    def guardar(self, chave, df):
+        caminho = self._caminho(chave)
+        if os.path.exists(caminho):
+            return True
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_feather(temporario, compression='uncompressed')
+        except (ValueError, TypeError):
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return False
+        os.replace(temporario, caminho)
+        self._registrar(os.path.getsize(caminho))
+        return True
+
+    def ler_planilha(self, conteudo, formato):
+        """Planilha de funcionários dos bytes enviados, lida do arquivo só na primeira vez"""
+        chave = chave_da_planilha(conteudo, formato)
+        df = self.obter(chave)
+        if df is None:
+            df = ler_planilha_funcionarios(io.BytesIO(conteudo), formato)
+            self.guardar(chave, df)
+        return df
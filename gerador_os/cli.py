@@ -0,0 +1,218 @@
+"""Geração de OS em lote pela linha de comando, sem o Streamlit
+
+    python -m gerador_os generate --planilha funcionarios.xlsx --modelo "Modelo de OS.docx" \\
+        --riscos perfil.json --out OS_Geradas.zip --workers 4
+
+Com --out terminado em .zip as OS vão para um único ZIP; caso contrário, para a pasta
+informada, em Setor/Função/OS_<nome>.docx. Com --dividir ou --tamanho-parte, --out é a
+pasta onde cada parte .zip é gravada assim que fica pronta. O perfil de riscos é um JSON como:
+
+    {
+        "riscos": {"fisico": ["Exposição ao Ruído"], "acidente": ["Trabalho em Altura"]},
+        "riscos_manuais": [{"category": "fisico", "risk_name": "...", "possible_damages": "..."}],
+        "epis": ["Protetor auricular"],
+        "medicoes": [{"agent": "Ruído", "value": "85", "unit": "dB(A)", "epi_name": "Protetor auricular"}]
+    }
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+from gerador_os.arquivamento import (
+    EstrategiaArquivo, ESTRATEGIAS_ARQUIVO, DIVISOES_ARQUIVO, ARMAZENAR_DOCX, DIVISAO_UNICA,
+    nome_da_parte, ordenar_por_grupo,
+)
+from gerador_os.cache_documentos import CacheDeDocumentos
+from gerador_os.contextos import mapear_e_renomear_colunas_funcionarios, contextos_dos_funcionarios, caminhos_no_zip, grupos_no_zip
+from gerador_os.modelo import ModeloCompilado, ModeloDoLote, MOTORES_RENDERIZACAO, MOTOR_XML
+from gerador_os.paralelo import gerar_documentos
+from gerador_os.pipeline import MedidorDePipeline, encadear, CAPACIDADE_PADRAO
+from gerador_os.planilhas import FormatoNaoSuportado, ler_planilha_funcionarios
+from gerador_os.riscos import CATEGORIAS_RISCO, RISCOS_PGR_DADOS, consolidar_riscos_pgr, tabela_de_riscos, montar_contexto_lote
+from gerador_os.validacao import validar_funcionarios, resumo_da_validacao, linhas_sinalizadas
+
+class PerfilInvalido(ValueError):
+    pass
+
+def carregar_perfil_de_riscos(caminho):
+    """Contexto do lote a partir do JSON de perfil (ou sem riscos, EPIs e medições)"""
+    perfil = {}
+    if caminho:
+        with open(caminho, encoding='utf-8') as f:
+            perfil = json.load(f)
+
+    riscos_pgr = perfil.get('riscos', {})
+    for categoria, riscos in riscos_pgr.items():
+        if categoria not in RISCOS_PGR_DADOS:
+            raise PerfilInvalido(f"Categoria de risco desconhecida: {categoria}")
+        desconhecidos = [risco for risco in riscos if risco not in RISCOS_PGR_DADOS[categoria]['riscos']]
+        if desconhecidos:
+            raise PerfilInvalido(f"Riscos fora do catálogo do PGR em '{categoria}': {', '.join(desconhecidos)}")
+
+    riscos_manuais = []
+    for risco in perfil.get('riscos_manuais', []):
+        # A categoria pode vir pela chave ('fisico') ou pelo rótulo exibido no app
+        categoria = CATEGORIAS_RISCO.get(risco.get('category'), risco.get('category'))
+        if categoria not in CATEGORIAS_RISCO.values():
+            raise PerfilInvalido(f"Categoria de risco manual desconhecida: {risco.get('category')}")
+        riscos_manuais.append({**risco, 'category': categoria})
+
+    riscos = consolidar_riscos_pgr(riscos_pgr)
+    return montar_contexto_lote(
+        tabela_de_riscos(riscos),
+        [risco['risco'] for risco in riscos],
+        [{'epi_name': epi} for epi in perfil.get('epis', [])],
+        perfil.get('medicoes', []),
+        riscos_manuais,
+    )
+
+def componente_seguro(nome):
+    """Nome de pasta ou arquivo sem separadores, caracteres reservados nem '.'/'..'"""
+    nome = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', nome).strip().rstrip('.')
+    return nome or '_'
+
+def gravar_em_pasta(pasta, documentos):
+    """Grava Setor/Função/OS_<nome>.docx dentro da pasta; setor e função não escapam dela
+
+    Funcionários com o mesmo setor, função e nome recebem OS_<nome>_2.docx, _3... em vez
+    de sobrescrever o arquivo do anterior.
+    """
+    raiz = os.path.realpath(pasta)
+    usados = set()
+    for caminho, conteudo in documentos:
+        destino = os.path.join(raiz, *(componente_seguro(parte) for parte in caminho.split('/')))
+        base, extensao = os.path.splitext(destino)
+        sufixo = 2
+        # Sem distinguir maiúsculas, como em nome_da_parte
+        while os.path.normcase(destino).lower() in usados:
+            destino, sufixo = f"{base}_{sufixo}{extensao}", sufixo + 1
+        usados.add(os.path.normcase(destino).lower())
+        if os.path.commonpath([raiz, os.path.realpath(destino)]) != raiz:
+            raise OSError(f"{caminho} ficaria fora da pasta de saída {pasta}")
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, 'wb') as f:
+            f.write(conteudo)
+
+def gravar_zip(caminho, estrategia, documentos):
+    # Grava ao lado e renomeia: um ZIP interrompido nunca substitui o anterior
+    with open(f"{caminho}.tmp", 'wb') as destino:
+        estrategia.escrever_zip(destino, documentos)
+    os.replace(f"{caminho}.tmp", caminho)
+
+def gravar_partes(pasta, estrategia, documentos, prefixo):
+    """Um .zip por parte na pasta, cada um gravado assim que a parte fecha"""
+    os.makedirs(pasta, exist_ok=True)
+    usados = set()
+    for parte in estrategia.criar_partes_temporarias(documentos):
+        nome = nome_da_parte(prefixo, parte, numerar=bool(estrategia.tamanho_parte), usados=usados)
+        caminho = os.path.join(pasta, nome)
+        with parte['arquivo'] as origem, open(f"{caminho}.tmp", 'wb') as destino:
+            origem.seek(0)
+            shutil.copyfileobj(origem, destino)
+        os.replace(f"{caminho}.tmp", caminho)
+
+def gerar(args):
+    df = mapear_e_renomear_colunas_funcionarios(ler_planilha_funcionarios(args.planilha))
+    if args.setor:
+        if 'setor' not in df.columns:
+            print("Erro: --setor informado, mas a planilha não tem coluna de setor.", file=sys.stderr)
+            return 2
+        df = df[df['setor'].isin(args.setor)]
+    problemas = validar_funcionarios(df)
+    if not args.silencioso:
+        for verificacao, linhas in resumo_da_validacao(problemas).itertuples(index=False):
+            if linhas:
+                print(f"Validação: {linhas} linha(s) com {verificacao.lower()}", file=sys.stderr)
+    if args.excluir_sinalizadas:
+        df = df[~linhas_sinalizadas(problemas)]
+    if df.empty:
+        print("Nenhum funcionário para gerar.", file=sys.stderr)
+        return 1
+
+    with open(args.modelo, 'rb') as f:
+        modelo = ModeloDoLote(ModeloCompilado(f.read(), args.motor), carregar_perfil_de_riscos(args.riscos))
+    contextos = contextos_dos_funcionarios(df)
+    caminhos = caminhos_no_zip(df)
+    estrategia = EstrategiaArquivo(
+        args.arquivamento, args.nivel, divisao=args.dividir, tamanho_parte=args.tamanho_parte * 1024 * 1024
+    )
+    grupos = grupos_no_zip(df, estrategia.divisao)
+    if estrategia.divide_em_partes:
+        ordem = ordenar_por_grupo(grupos)
+        contextos = [contextos[n] for n in ordem]
+        caminhos = [caminhos[n] for n in ordem]
+        grupos = [grupos[n] for n in ordem]
+    cache = CacheDeDocumentos(args.cache) if args.cache else None
+
+    inicio = time.perf_counter()
+    falhas = []
+    estatisticas = {}
+
+    medidor = MedidorDePipeline()
+
+    def documentos_gerados():
+        resultados = gerar_documentos(modelo, contextos, args.workers, capturar_erros=True,
+                                      cache=cache, estatisticas=estatisticas)
+        renderizados = encadear(zip(caminhos, grupos, resultados), max(CAPACIDADE_PADRAO, 4 * args.workers), medidor,
+                                produtor="Renderização", consumidor="Gravação")
+        # O grupo segue junto do documento: as OS com erro são puladas sem desalinhar as partes
+        for n, (caminho, grupo, resultado) in enumerate(renderizados, 1):
+            if isinstance(resultado, Exception):
+                falhas.append((caminho, resultado))
+            else:
+                yield caminho, resultado, grupo
+            if not args.silencioso and (n % 100 == 0 or n == len(contextos)):
+                print(f"{n}/{len(contextos)} OS", file=sys.stderr, flush=True)
+
+    if estrategia.divide_em_partes:
+        gravar_partes(args.out, estrategia, documentos_gerados(), f"OS_Geradas_{time.strftime('%Y%m%d')}")
+    else:
+        documentos = ((caminho, conteudo) for caminho, conteudo, _ in documentos_gerados())
+        if args.out.lower().endswith('.zip'):
+            gravar_zip(args.out, estrategia, documentos)
+        else:
+            gravar_em_pasta(args.out, documentos)
+
+    for caminho, erro in falhas:
+        print(f"Erro em {caminho}: {erro}", file=sys.stderr)
+    resumo = f"{len(contextos) - len(falhas)} OS geradas em {time.perf_counter() - inicio:.1f}s -> {args.out}"
+    if cache is not None:
+        resumo += f" ({estatisticas['reaproveitados']} reaproveitadas do cache)"
+    print(resumo)
+    if not args.silencioso:
+        for estagio in medidor.estagios:
+            print(f"  {estagio.nome}: {100 * medidor.utilizacao(estagio):.0f}% do tempo ocupada", file=sys.stderr)
+    return 1 if falhas else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gerador_os", description="Gerador de Ordens de Serviço em lote")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    generate = comandos.add_parser('generate', help="Gera as OS de uma planilha de funcionários")
+    generate.add_argument('--planilha', required=True, help="Planilha de funcionários (.xlsx, .csv, .ods ou .parquet)")
+    generate.add_argument('--modelo', required=True, help="Modelo de OS (.docx)")
+    generate.add_argument('--riscos', help="Perfil de riscos, EPIs e medições (.json)")
+    generate.add_argument('--out', required=True, help="Arquivo .zip ou pasta de saída")
+    generate.add_argument('--workers', type=int, default=1, help="Processos de geração")
+    generate.add_argument('--setor', action='append', help="Gera só os funcionários deste setor (pode repetir)")
+    generate.add_argument('--motor', choices=list(MOTORES_RENDERIZACAO), default=MOTOR_XML, help="Motor de renderização")
+    generate.add_argument('--arquivamento', choices=list(ESTRATEGIAS_ARQUIVO), default=ARMAZENAR_DOCX, help="Como as OS entram no ZIP")
+    generate.add_argument('--nivel', type=int, default=6, help="Nível de compressão do deflate")
+    generate.add_argument('--dividir', choices=list(DIVISOES_ARQUIVO), default=DIVISAO_UNICA,
+                          help="Um .zip por setor ou por setor e função (--out vira a pasta das partes)")
+    generate.add_argument('--tamanho-parte', type=int, default=0, help="Tamanho máximo de cada .zip em MB (0 = sem limite)")
+    generate.add_argument('--cache', help="Pasta do cache de documentos (a mesma do app: os_generator_cache)")
+    generate.add_argument('--excluir-sinalizadas', action='store_true',
+                          help="Não gera as linhas com problemas na validação (nome ausente, data inválida, duplicadas...)")
+    generate.add_argument('--silencioso', action='store_true', help="Não mostra o progresso")
+
+    args = parser.parse_args(argv)
+    try:
+        return gerar(args)
+    except (OSError, PerfilInvalido, FormatoNaoSuportado, json.JSONDecodeError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
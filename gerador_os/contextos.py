@@ -0,0 +1,151 @@
+import re
+
+import pandas as pd
+
+from gerador_os.arquivamento import DIVISAO_SETOR, DIVISAO_UNICA
+
+NAO_INFORMADO = "Não informado"
+DESCRICAO_PADRAO = "Atividades operacionais, administrativas e de apoio conforme definido pela chefia imediata."
+
+# Nome padronizado (após mapear_e_renomear_colunas_funcionarios) seguido dos nomes originais aceitos
+ALIASES = {
+    'empresa': ('empresa', 'Empresa'),
+    'unidade': ('unidade', 'Unidade'),
+    'nome_do_funcionario': ('nome_do_funcionario', 'Nome'),
+    'data_de_admissao': ('data_de_admissao', 'Data de Admissão'),
+    'setor': ('setor', 'Setor'),
+    'funcao': ('funcao', 'Função'),
+    'descricao_de_atividades': ('descricao_de_atividades', 'Descrição de Atividades'),
+}
+
+def normalizar_texto(texto):
+    if not isinstance(texto, str): return ""
+    return re.sub(r'[\s\W_]+', '', texto.lower().strip())
+
+# Nome padronizado de cada campo e os nomes de coluna aceitos, já normalizados
+MAPEAMENTO_COLUNAS = {
+    'nome_do_funcionario': ['nomedofuncionario', 'nome', 'funcionario', 'funcionário', 'colaborador', 'nomecompleto'],
+    'funcao': ['funcao', 'função', 'cargo'],
+    'data_de_admissao': ['datadeadmissao', 'dataadmissao', 'admissao', 'admissão'],
+    'setor': ['setordetrabalho', 'setor', 'area', 'área', 'departamento'],
+    'descricao_de_atividades': ['descricaodeatividades', 'atividades', 'descricaoatividades', 'descriçãodeatividades', 'tarefas', 'descricaodasTarefas'],
+    'empresa': ['empresa'],
+    'unidade': ['unidade']
+}
+
+def resolver_colunas(colunas):
+    """{coluna original: nome padronizado} das colunas reconhecidas"""
+    colunas_renomeadas = {}
+    colunas_df_normalizadas = {normalizar_texto(col): col for col in colunas}
+    for nome_padrao, nomes_possiveis in MAPEAMENTO_COLUNAS.items():
+        for nome_possivel in nomes_possiveis:
+            if nome_possivel in colunas_df_normalizadas:
+                coluna_original = colunas_df_normalizadas[nome_possivel]
+                colunas_renomeadas[coluna_original] = nome_padrao
+                break
+    return colunas_renomeadas
+
+def colunas_utilizadas(colunas):
+    """Colunas da planilha que a geração lê: as reconhecidas e os nomes originais usados como alternativa"""
+    reconhecidas = resolver_colunas(colunas)
+    alternativas = {alias for aliases in ALIASES.values() for alias in aliases}
+    return [col for col in colunas if col in reconhecidas or col in alternativas]
+
+def mapear_e_renomear_colunas_funcionarios(df):
+    df_copia = df.copy()
+    df_copia.rename(columns=resolver_colunas(df_copia.columns), inplace=True)
+    return df_copia
+
+def resolver_coluna(df, nome):
+    """Coluna do campo com os aliases resolvidos uma vez: cada linha vazia é completada pelo próximo alias"""
+    serie = None
+    for alias in ALIASES[nome]:
+        if alias in df.columns:
+            serie = df[alias] if serie is None else serie.where(serie.notna(), df[alias])
+    return serie
+
+def como_texto(serie, ausente="N/A"):
+    """str() de cada valor (vazios viram 'nan', como antes); ausente quando a coluna não existe"""
+    if serie is None:
+        return ausente
+    return serie.astype(str).fillna('nan')
+
+# Datas que começam pelo ano (ISO, e também o str() de datas e Timestamps) não são lidas dia-primeiro
+PADRAO_DATA_ANO_PRIMEIRO = r'\s*\d{4}-\d{1,2}-\d{1,2}'
+
+def converter_datas(serie):
+    """to_datetime de cada valor: datas em texto como dd/mm/aaaa (planilhas brasileiras, .csv)
+
+    Valores que começam pelo ano seguem como aaaa-mm-dd; os demais são lidos com dayfirst,
+    senão '05/03/2023' viraria 3 de maio enquanto '25/03/2023' continuaria 25 de março.
+    """
+    ano_primeiro = serie.astype(str).str.match(PADRAO_DATA_ANO_PRIMEIRO)
+    dia_primeiro = pd.to_datetime(serie.where(~ano_primeiro), errors='coerce', format='mixed', dayfirst=True)
+    return dia_primeiro.where(~ano_primeiro, pd.to_datetime(serie.where(ano_primeiro), errors='coerce', format='mixed'))
+
+def formatar_datas(serie):
+    """Datas em dd/mm/aaaa com um único to_datetime; valores que não são data ficam como texto"""
+    if serie is None:
+        return NAO_INFORMADO
+    datas = converter_datas(serie)
+    texto = datas.dt.strftime('%d/%m/%Y')
+    texto = texto.where(datas.notna(), como_texto(serie))
+    return texto.where(serie.notna(), NAO_INFORMADO)
+
+def descricoes_de_atividades(descricao, funcao, setor, indice):
+    """Descrição informada ou, quando vazia, o texto padrão montado com a função e o setor"""
+    if descricao is None:
+        descricao = pd.Series(NAO_INFORMADO, index=indice)
+    else:
+        descricao = como_texto(descricao).str.strip().where(descricao.notna(), NAO_INFORMADO)
+    funcao = pd.Series(funcao, index=indice)
+    setor = pd.Series(setor, index=indice)
+    padrao = (
+        "Atividades relacionadas à função de " + funcao + " no setor " + setor
+        + ", incluindo todas as tarefas operacionais, administrativas e de apoio inerentes ao cargo."
+    ).mask((funcao == "N/A") | (setor == "N/A"), DESCRICAO_PADRAO)
+    return descricao.mask(descricao.isin([NAO_INFORMADO, "", "nan"]), padrao)
+
+def contextos_dos_funcionarios(df):
+    """Placeholders pessoais de cada linha, preparados coluna a coluna e devolvidos como dicts simples"""
+    if df.empty:
+        return []
+    funcao = como_texto(resolver_coluna(df, 'funcao'))
+    setor = como_texto(resolver_coluna(df, 'setor'))
+    colunas = {
+        "[NOME EMPRESA]": como_texto(resolver_coluna(df, 'empresa')),
+        "[UNIDADE]": como_texto(resolver_coluna(df, 'unidade')),
+        "[NOME FUNCIONÁRIO]": como_texto(resolver_coluna(df, 'nome_do_funcionario')),
+        "[DATA DE ADMISSÃO]": formatar_datas(resolver_coluna(df, 'data_de_admissao')),
+        "[SETOR]": setor,
+        "[FUNÇÃO]": funcao,
+        "[DESCRIÇÃO DE ATIVIDADES]": descricoes_de_atividades(resolver_coluna(df, 'descricao_de_atividades'), funcao, setor, df.index),
+    }
+    # Colunas sem equivalente na planilha são um valor fixo para todas as linhas
+    valores = [
+        coluna.tolist() if isinstance(coluna, pd.Series) else [coluna] * len(df)
+        for coluna in colunas.values()
+    ]
+    chaves = list(colunas)
+    return [dict(zip(chaves, linha)) for linha in zip(*valores)]
+
+def caminhos_no_zip(df):
+    """Setor/Função/OS_<nome>.docx de cada linha"""
+    nome = df['nome_do_funcionario'] if 'nome_do_funcionario' in df.columns else pd.Series("Func_Sem_Nome", index=df.index)
+    nome_limpo = (
+        como_texto(nome.where(nome.notna(), "Func_Sem_Nome"))
+        .str.replace(r'[^\w\s-]', '', regex=True).str.strip().str.replace(" ", "_", regex=False)
+    )
+    setor = como_texto(df['setor']) if 'setor' in df.columns else "SemSetor"
+    funcao = como_texto(df['funcao']) if 'funcao' in df.columns else "SemFuncao"
+    return (setor + "/" + funcao + "/OS_" + nome_limpo + ".docx").tolist()
+
+def grupos_no_zip(df, divisao):
+    """(setor,) ou (setor, função) de cada linha: o grupo que decide a parte do ZIP dividido"""
+    if divisao == DIVISAO_UNICA:
+        return [()] * len(df)
+    setor = como_texto(df['setor']) if 'setor' in df.columns else pd.Series("SemSetor", index=df.index)
+    if divisao == DIVISAO_SETOR:
+        return [(valor,) for valor in setor]
+    funcao = como_texto(df['funcao']) if 'funcao' in df.columns else pd.Series("SemFuncao", index=df.index)
+    return list(zip(setor, funcao))
@@ -0,0 +1,477 @@
+import copy
+import hashlib
+import re
+from io import BytesIO
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt
+from docx.text.hyperlink import Hyperlink
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+from lxml import etree
+
+from gerador_os.cache_documentos import VERSAO_RENDERIZACAO, chave_de_conteudo
+from gerador_os.pacote import PacoteModelo
+from gerador_os.travessia import W_R, iterar_paragrafos, iterar_paragrafos_do_pacote, iterar_partes_de_texto, raiz_de_texto
+
+PADRAO_PLACEHOLDER = re.compile(r'\[[^\[\]]+\]')
+W_T = qn('w:t')
+W_RPR = qn('w:rPr')
+W_PROOF_ERR = qn('w:proofErr')
+W_PPR = qn('w:pPr')
+W_HYPERLINK = qn('w:hyperlink')
+# Conteúdo de run que não é texto: imagens, formas e caixas de texto
+OBJETOS_DE_RUN = frozenset((
+    qn('w:drawing'), qn('w:pict'), qn('w:object'),
+    '{http://schemas.openxmlformats.org/markup-compatibility/2006}AlternateContent',
+))
+
+MOTOR_XML = 'xml'
+MOTOR_DOCX = 'docx'
+MOTORES_RENDERIZACAO = {
+    MOTOR_XML: 'XML direto (rápido)',
+    MOTOR_DOCX: 'python-docx (compatível)',
+}
+
+def ler_conteudo(arquivo):
+    """Retorna os bytes de um upload do Streamlit, ficheiro aberto ou bytes"""
+    if isinstance(arquivo, (bytes, bytearray)):
+        return bytes(arquivo)
+    if hasattr(arquivo, 'getvalue'):
+        return arquivo.getvalue()
+    arquivo.seek(0)
+    return arquivo.read()
+
+def hash_do_conteudo(conteudo):
+    """SHA-256 dos bytes do modelo, usado como chave dos caches"""
+    return hashlib.sha256(conteudo).hexdigest()
+
+def caminho_do_elemento(elemento, raiz):
+    """Caminho XML (índices dos filhos a partir da raiz) até o elemento"""
+    caminho = []
+    while elemento is not raiz:
+        pai = elemento.getparent()
+        caminho.append(pai.index(elemento))
+        elemento = pai
+    return tuple(reversed(caminho))
+
+def localizar_elemento(raiz, caminho):
+    elemento = raiz
+    for indice in caminho:
+        elemento = elemento[indice]
+    return elemento
+
+def indexar_placeholders(doc):
+    """Índice {parte: {caminho XML: placeholders}} dos parágrafos que contêm placeholders"""
+    indice = {}
+    for parte, raiz, p in iterar_paragrafos_do_pacote(doc):
+        encontrados = PADRAO_PLACEHOLDER.findall(p.text)
+        if encontrados:
+            indice_da_parte = indice.setdefault(str(parte.partname), {})
+            indice_da_parte.setdefault(caminho_do_elemento(p, raiz), tuple(dict.fromkeys(encontrados)))
+    return indice
+
+def textos_dos_runs(p):
+    return [''.join(t.text or '' for t in r.iter(W_T)) for r in p.iterchildren(W_R)]
+
+def normalizar_runs(p):
+    """Junta runs vizinhos só de texto e com a mesma formatação (o Word os divide ao revisar)"""
+    for marca in p.findall(W_PROOF_ERR):
+        p.remove(marca)
+    anterior = chave_anterior = None
+    for r in list(p.iterchildren(W_R)):
+        if any(filho.tag not in (W_RPR, W_T) for filho in r):
+            anterior = None
+            continue
+        rpr = r.find(W_RPR)
+        chave = etree.tostring(rpr) if rpr is not None else b''
+        if anterior is not None and chave == chave_anterior and r.getprevious() is anterior:
+            Run(anterior, None).text = Run(anterior, None).text + Run(r, None).text
+            p.remove(r)
+        else:
+            anterior, chave_anterior = r, chave
+
+def normalizar_placeholders(doc):
+    """Normaliza os runs dos parágrafos com placeholders e retorna o diagnóstico de cada um
+
+    {placeholder: {'ocorrencias', 'partes', 'dividido', 'dividido_apos_normalizar'}}
+    """
+    diagnostico = {}
+    for parte, raiz, p in iterar_paragrafos_do_pacote(doc):
+        encontrados = PADRAO_PLACEHOLDER.findall(p.text)
+        if not encontrados:
+            continue
+        antes = textos_dos_runs(p)
+        normalizar_runs(p)
+        depois = textos_dos_runs(p)
+        for chave in encontrados:
+            item = diagnostico.setdefault(chave, {
+                'ocorrencias': 0, 'partes': set(), 'dividido': False, 'dividido_apos_normalizar': False,
+            })
+            item['ocorrencias'] += 1
+            item['partes'].add(str(parte.partname).lstrip('/'))
+            item['dividido'] |= not any(chave in texto for texto in antes)
+            item['dividido_apos_normalizar'] |= not any(chave in texto for texto in depois)
+    return diagnostico
+
+class ModeloCompilado:
+    """Modelo de OS analisado uma única vez e reutilizado para todo o lote"""
+
+    def __init__(self, arquivo_modelo, motor=MOTOR_XML):
+        self.conteudo = ler_conteudo(arquivo_modelo)
+        self.hash = hash_do_conteudo(self.conteudo)
+        self._documento = Document(BytesIO(self.conteudo))
+        self.diagnostico = normalizar_placeholders(self._documento)
+        estilos = registrar_estilos_de_run(self._documento)
+        self.formatacao = FormatacaoDeRuns(estilos)
+        # Partes alteradas na compilação e iguais em todos os documentos do lote
+        self.partes_compiladas = {}
+        if estilos is not None:
+            parte_estilos = self._documento.part.part_related_by(RT.STYLES)
+            self.partes_compiladas[str(parte_estilos.partname).lstrip('/')] = parte_estilos.blob
+        self.pacote = PacoteModelo(self.conteudo)
+        self.indice = indexar_placeholders(self._documento)
+        self.placeholders = frozenset(
+            key for indice_da_parte in self.indice.values() for chaves in indice_da_parte.values() for key in chaves
+        )
+        self.motor = motor
+        self.plano_xml = None
+        self._plano_impressao = None
+        if motor == MOTOR_XML:
+            from gerador_os.render_xml import PlanoXML
+            try:
+                self.plano_xml = PlanoXML(self._documento, self.indice, self.formatacao)
+            except Exception:
+                # Modelos que o plano XML não consegue cortar seguem pelo python-docx
+                self.motor = MOTOR_DOCX
+
+    def relatorio_placeholders(self, conhecidos=()):
+        """Linhas do relatório de placeholders encontrados, desconhecidos e ausentes no modelo"""
+        linhas = []
+        for chave, item in sorted(self.diagnostico.items()):
+            if conhecidos and chave not in conhecidos:
+                situacao = 'Desconhecido (não será preenchido)'
+            elif item['dividido_apos_normalizar']:
+                situacao = 'Dividido em runs com formatações diferentes'
+            elif item['dividido']:
+                situacao = 'Dividido em runs (normalizado)'
+            else:
+                situacao = 'OK'
+            linhas.append({
+                'Placeholder': chave,
+                'Situação': situacao,
+                'Ocorrências': item['ocorrencias'],
+                'Partes': ', '.join(sorted(item['partes'])),
+            })
+        for chave in conhecidos:
+            if chave not in self.diagnostico:
+                linhas.append({'Placeholder': chave, 'Situação': 'Ausente no modelo', 'Ocorrências': 0, 'Partes': ''})
+        return linhas
+
+    def renderizar_partes(self, contexto):
+        """{nome da parte no ZIP: XML} das partes com placeholders, pelo python-docx"""
+        partes = {}
+        for parte in iterar_partes_de_texto(self._documento):
+            indice_da_parte = self.indice.get(str(parte.partname))
+            if not indice_da_parte:
+                continue
+            elemento = copy.deepcopy(parte.element)
+            preencher_parte(raiz_de_texto(elemento), indice_da_parte, contexto, self.formatacao)
+            partes[str(parte.partname).lstrip('/')] = serialize_part_xml(elemento)
+        return partes
+
+    def chave_de_cache(self, contexto):
+        """Identifica o documento gerado: mesmo modelo, motor e contexto produzem os mesmos bytes"""
+        return chave_de_conteudo(VERSAO_RENDERIZACAO, self.hash, self.motor, contexto)
+
+    def gerar_docx(self, contexto):
+        """Bytes do .docx de um funcionário; só as partes renderizadas são recomprimidas"""
+        partes_renderizadas = dict(self.partes_compiladas)
+        if self.motor == MOTOR_XML:
+            partes_renderizadas.update(self.plano_xml.renderizar(contexto))
+        else:
+            partes_renderizadas.update(self.renderizar_partes(contexto))
+        return self.pacote.montar(partes_renderizadas)
+
+    def gerar_docx_unico(self, contextos):
+        """Bytes de um único .docx com a OS de cada contexto em sequência, uma por seção
+
+        Estilos e imagens do modelo entram uma só vez e os ids de desenhos e marcadores
+        são renumerados em cada cópia do corpo. Cabeçalhos e rodapés são compartilhados:
+        levanta ValueError sem nenhum contexto, se o modelo não puder ser cortado ou se um placeholder de
+        cabeçalho ou rodapé tiver valores diferentes entre os contextos.
+        """
+        if self._plano_impressao is None:
+            from gerador_os.render_xml import PlanoImpressao
+            self._plano_impressao = PlanoImpressao(self._documento, self.indice, self.formatacao)
+        partes_renderizadas = dict(self.partes_compiladas)
+        partes_renderizadas.update(self._plano_impressao.renderizar(contextos))
+        return self.pacote.montar(partes_renderizadas)
+
+class ModeloDoLote:
+    """Modelo compilado com o contexto comum a todo o lote já renderizado
+
+    gerar_docx recebe só os placeholders pessoais do funcionário; os parágrafos que
+    dependem apenas do lote (riscos, danos, EPIs, medições) saem prontos do plano XML.
+    """
+
+    def __init__(self, modelo, contexto_lote):
+        self.modelo = modelo
+        self.contexto_lote = dict(contexto_lote)
+        self.conteudo = modelo.conteudo
+        self.plano_xml = modelo.plano_xml.fixar(self.contexto_lote) if modelo.motor == MOTOR_XML else None
+        self._chave_do_lote = chave_de_conteudo(VERSAO_RENDERIZACAO, modelo.hash, modelo.motor, self.contexto_lote)
+
+    def chave_de_cache(self, contexto_funcionario):
+        return chave_de_conteudo(self._chave_do_lote, contexto_funcionario)
+
+    def contexto_completo(self, contexto_funcionario):
+        # Chaves pessoais primeiro, como no contexto completo montado de uma vez
+        return {**contexto_funcionario, **self.contexto_lote}
+
+    def gerar_docx(self, contexto_funcionario):
+        contexto = self.contexto_completo(contexto_funcionario)
+        if self.plano_xml is None:
+            return self.modelo.gerar_docx(contexto)
+        partes_renderizadas = dict(self.modelo.partes_compiladas)
+        partes_renderizadas.update(self.plano_xml.renderizar(contexto))
+        return self.modelo.pacote.montar(partes_renderizadas)
+
+    def gerar_docx_unico(self, contextos_funcionarios):
+        return self.modelo.gerar_docx_unico(self.contexto_completo(contexto) for contexto in contextos_funcionarios)
+
+class ModeloSubstituicaoSimples:
+    """Modelo com placeholders {CHAVE}: o texto do parágrafo inteiro é reescrito, sem formatação"""
+
+    def __init__(self, arquivo_modelo):
+        self.conteudo = ler_conteudo(arquivo_modelo)
+        self._documento = Document(BytesIO(self.conteudo))
+
+    def renderizar(self, substituicoes):
+        doc = copy.deepcopy(self._documento)
+        # Parágrafos do corpo e das tabelas (cada célula uma única vez)
+        for p in iterar_paragrafos(doc.element.body):
+            paragraph = Paragraph(p, doc._body)
+            for placeholder, value in substituicoes.items():
+                if placeholder in paragraph.text:
+                    paragraph.text = paragraph.text.replace(placeholder, value)
+        return doc
+
+    def gerar_docx(self, substituicoes):
+        buffer = BytesIO()
+        self.renderizar(substituicoes).save(buffer)
+        return buffer.getvalue()
+
+# Tipos de trecho gerados na substituição; cada tipo tem uma formatação fixa
+ROTULO, VALOR, AGENTE, TEXTO, QUEBRA = 'rotulo', 'valor', 'agente', 'texto', 'quebra'
+# Run com desenho ou caixa de texto do modelo, mantido entre os trechos
+OBJETO = 'objeto'
+
+def segmentos_de_medicoes(medicoes_valor):
+    """Trechos do parágrafo [MEDIÇÕES]: uma medição por linha, agente em negrito"""
+    if medicoes_valor == "Não aplicável" or not medicoes_valor.strip():
+        return [(TEXTO, "Não aplicável")]
+    segmentos = []
+    for i, linha in enumerate(medicoes_valor.split('\n')):
+        if not linha.strip(): continue
+        if i > 0: segmentos.append((QUEBRA, ''))
+        if ":" in linha:
+            partes = linha.split(":", 1)
+            segmentos.append((AGENTE, partes[0].strip() + ": "))
+            segmentos.append((TEXTO, partes[1].strip()))
+        else:
+            segmentos.append((TEXTO, linha))
+    return segmentos
+
+def segmentos_do_paragrafo(texto_original_paragrafo, contexto, chaves):
+    """Divide o texto já substituído em trechos de rótulo e de valor"""
+    placeholders_no_paragrafo = [key for key in contexto if key in chaves]
+    if not placeholders_no_paragrafo:
+        return None
+    texto_final = texto_original_paragrafo
+    for key in placeholders_no_paragrafo:
+        texto_final = texto_final.replace(key, str(contexto[key]))
+    segmentos = []
+    texto_restante = texto_final
+    for key in placeholders_no_paragrafo:
+        valor_placeholder = str(contexto[key])
+        partes = texto_restante.split(valor_placeholder, 1)
+        if partes[0]:
+            segmentos.append((ROTULO, partes[0]))
+        segmentos.append((VALOR, valor_placeholder))
+        texto_restante = partes[1]
+    if texto_restante:
+        segmentos.append((ROTULO, texto_restante))
+    return segmentos
+
+def estilo_do_rotulo(p):
+    """Formatação do primeiro run do parágrafo, reaplicada aos rótulos"""
+    return {
+        'bold': p.runs[0].bold if p.runs else False,
+        'italic': p.runs[0].italic if p.runs else False,
+        'underline': p.runs[0].underline if p.runs else False,
+    }
+
+def aplicar_formatacao_padrao(run):
+    run.font.name = 'Segoe UI'
+    run.font.size = Pt(9)
+    return run
+
+# Estilos de caractere criados no styles.xml do modelo: (nome, styleId, sublinhado)
+ESTILOS_DE_RUN = {
+    ROTULO: ('OS Rótulo', 'OSRotulo', None),
+    VALOR: ('OS Valor', 'OSValor', False),
+}
+
+def registrar_estilos_de_run(documento):
+    """Cria uma única vez os estilos Segoe UI 9pt; retorna {tipo: styleId} ou None"""
+    try:
+        documento.part.part_related_by(RT.STYLES)
+    except KeyError:
+        # Sem styles.xml no pacote: os runs recebem a formatação direta
+        return None
+    estilos = documento.styles
+    ids = {}
+    for tipo, (nome, style_id, sublinhado) in ESTILOS_DE_RUN.items():
+        if nome not in estilos:
+            estilo = estilos.add_style(nome, WD_STYLE_TYPE.CHARACTER)
+            estilo.style_id = style_id
+            estilo.font.name = 'Segoe UI'
+            estilo.font.size = Pt(9)
+            estilo.font.underline = sublinhado
+        ids[tipo] = estilos[nome].style_id
+    return ids
+
+class FormatacaoDeRuns:
+    """<w:rPr> montados uma vez por tipo de trecho e clonados em cada run gerado"""
+
+    def __init__(self, estilos=None):
+        self.estilos = estilos
+        self._rpr = {}
+
+    def _montar_rpr(self, tipo, estilo_rotulo):
+        run = Run(OxmlElement('w:r'), None)
+        if self.estilos is None:
+            aplicar_formatacao_padrao(run)
+        else:
+            run._r.get_or_add_rPr().style = self.estilos[VALOR if tipo == VALOR else ROTULO]
+        if tipo == ROTULO:
+            run.font.bold = estilo_rotulo['bold']
+            run.font.italic = estilo_rotulo['italic']
+            run.underline = estilo_rotulo['underline']
+        elif tipo == VALOR:
+            run.font.bold = False
+            run.font.italic = False
+            if self.estilos is None:
+                run.font.underline = False
+        else:
+            run.font.bold = tipo == AGENTE
+        return run._r.rPr
+
+    def rpr(self, tipo, estilo_rotulo=None):
+        chave = (tipo, tuple(estilo_rotulo.values()) if tipo == ROTULO else None)
+        rpr = self._rpr.get(chave)
+        if rpr is None:
+            rpr = self._rpr[chave] = self._montar_rpr(tipo, estilo_rotulo)
+        return rpr
+
+    def adicionar(self, p, tipo, texto, estilo_rotulo=None):
+        """Acrescenta ao parágrafo um run com a formatação do tipo de trecho"""
+        if tipo == QUEBRA:
+            p.add_run().add_break()
+            return
+        r = p._p.add_r()
+        r.append(copy.deepcopy(self.rpr(tipo, estilo_rotulo)))
+        if texto:
+            Run(r, p).text = texto
+
+def contem_objeto(r):
+    return any(filho.tag in OBJETOS_DE_RUN for filho in r)
+
+def separar_objetos(p):
+    """Esvazia o parágrafo como Paragraph.clear e devolve os runs com desenhos (e caixas de texto já
+    preenchidas) que estavam nele, cada um com a sua posição no texto original do parágrafo"""
+    objetos = []
+    posicao = 0
+    for filho in list(p._p):
+        if filho.tag == W_PPR:
+            continue
+        if filho.tag == W_R:
+            if contem_objeto(filho):
+                objetos.append((posicao, filho))
+            posicao += len(Run(filho, None).text)
+        elif filho.tag == W_HYPERLINK:
+            posicao += len(Hyperlink(filho, None).text)
+        p._p.remove(filho)
+    return objetos
+
+def posicao_no_texto_final(texto, contexto, chaves, posicao):
+    """Posição no texto já substituído que corresponde a `posicao` no texto original
+
+    Um objeto que estava dentro de um placeholder vai para logo depois do valor.
+    """
+    final = posicao
+    for key in [key for key in contexto if key in chaves]:
+        diferenca = len(str(contexto[key])) - len(key)
+        inicio = texto.find(key)
+        while inicio != -1 and inicio < posicao:
+            fim = inicio + len(key)
+            final += diferenca if fim <= posicao else fim - posicao + diferenca
+            inicio = texto.find(key, fim)
+    return final
+
+def intercalar_objetos(segmentos, posicoes):
+    """Trechos cortados nas posições dos objetos: gera (tipo, texto) e, no lugar de cada objeto, (OBJETO, n)"""
+    n = 0
+    inicio = 0
+    for tipo, texto in segmentos:
+        corte = 0
+        while n < len(posicoes) and posicoes[n] - inicio < len(texto):
+            meio = max(posicoes[n] - inicio, corte)
+            if meio > corte:
+                yield tipo, texto[corte:meio]
+                corte = meio
+            yield OBJETO, n
+            n += 1
+        if corte < len(texto) or not texto:
+            yield tipo, texto[corte:]
+        inicio += len(texto)
+    for resto in range(n, len(posicoes)):
+        yield OBJETO, resto
+
+def preparar_paragrafo_medicoes(p):
+    """Esvazia os runs de texto existentes e alinha o parágrafo [MEDIÇÕES] à esquerda"""
+    for run in p.runs:
+        if not contem_objeto(run._r):
+            run.text = ''
+    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
+
+def processar_paragrafo(p, contexto, chaves, formatacao):
+    if "[MEDIÇÕES]" in chaves:
+        preparar_paragrafo_medicoes(p)
+        for tipo, texto in segmentos_de_medicoes(contexto.get("[MEDIÇÕES]", "Não aplicável")):
+            formatacao.adicionar(p, tipo, texto)
+        return
+    segmentos = segmentos_do_paragrafo(p.text, contexto, chaves)
+    if not segmentos:
+        return
+    estilo_rotulo = estilo_do_rotulo(p)
+    texto_original = p.text
+    objetos = separar_objetos(p)
+    posicoes = [posicao_no_texto_final(texto_original, contexto, chaves, posicao) for posicao, _ in objetos]
+    # Desenhos e caixas de texto voltam entre os trechos, no ponto do texto em que estavam
+    for tipo, item in intercalar_objetos(segmentos, posicoes):
+        if tipo == OBJETO:
+            p._p.append(objetos[item][1])
+        else:
+            formatacao.adicionar(p, tipo, item, estilo_rotulo)
+
+def preencher_parte(raiz, indice_da_parte, contexto, formatacao):
+    for caminho, chaves in indice_da_parte.items():
+        processar_paragrafo(Paragraph(localizar_elemento(raiz, caminho), None), contexto, chaves, formatacao)
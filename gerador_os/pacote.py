@@ -0,0 +1,165 @@
+import struct
+import zipfile
+import zlib
+from io import BytesIO
+
+# Posições dos comprimentos de nome e de campo extra no cabeçalho local do ZIP
+_FH_TAMANHO_NOME = 10
+_FH_TAMANHO_EXTRA = 11
+_TAMANHO_CABECALHO_LOCAL = struct.calcsize(zipfile.structFileHeader)
+_FLAG_NOME_UTF8 = 0x800
+# Valores a partir dos quais o campo vai para os registros ZIP64 (no campo fica 0xFFFF...)
+_LIMITE_ZIP32 = 0xFFFFFFFF
+_LIMITE_ENTRADAS_ZIP32 = 0xFFFF
+_EXTRA_ZIP64 = 0x0001
+_VERSAO_ZIP = 20
+_VERSAO_ZIP64 = 45
+
+def data_hora_dos(date_time):
+    ano, mes, dia, hora, minuto, segundo = date_time
+    return (hora << 11) | (minuto << 5) | (segundo // 2), ((ano - 1980) << 9) | (mes << 5) | dia
+
+class EntradaZip:
+    """Membro do ZIP já comprimido, pronto para ser gravado sem recompressão"""
+
+    def __init__(self, nome, metodo, crc, dados, tamanho, date_time, external_attr=0, create_system=0):
+        self.nome = nome
+        self.metodo = metodo
+        self.crc = crc
+        self.dados = dados
+        self.tamanho = tamanho
+        self.date_time = date_time
+        self.external_attr = external_attr
+        self.create_system = create_system
+
+    @classmethod
+    def comprimir(cls, nome, conteudo, date_time, nivel=zlib.Z_DEFAULT_COMPRESSION):
+        compressor = zlib.compressobj(nivel, zlib.DEFLATED, -15)
+        dados = compressor.compress(conteudo) + compressor.flush()
+        return cls(nome, zipfile.ZIP_DEFLATED, zlib.crc32(conteudo), dados, len(conteudo), date_time)
+
+    @classmethod
+    def comprimir_fluxo(cls, nome, trechos, date_time, nivel=zlib.Z_DEFAULT_COMPRESSION):
+        """Comprime os trechos à medida que são gerados, sem juntar o conteúdo em memória"""
+        compressor = zlib.compressobj(nivel, zlib.DEFLATED, -15)
+        dados = []
+        crc = tamanho = 0
+        for trecho in trechos:
+            crc = zlib.crc32(trecho, crc)
+            tamanho += len(trecho)
+            dados.append(compressor.compress(trecho))
+        dados.append(compressor.flush())
+        return cls(nome, zipfile.ZIP_DEFLATED, crc, b''.join(dados), tamanho, date_time)
+
+def campos_zip64(*valores):
+    """Valores dos campos de 32 bits e o campo extra ZIP64 com os que não cabem neles"""
+    grandes = [valor for valor in valores if valor >= _LIMITE_ZIP32]
+    campos = tuple(0xFFFFFFFF if valor >= _LIMITE_ZIP32 else valor for valor in valores)
+    if not grandes:
+        return campos, b''
+    return campos, struct.pack(f'<2H{len(grandes)}Q', _EXTRA_ZIP64, 8 * len(grandes), *grandes)
+
+def escrever_zip(destino, entradas):
+    """Grava as entradas no arquivo destino à medida que chegam; só o diretório central fica em memória
+
+    Tamanhos, posições e quantidade de entradas que passam dos limites do ZIP
+    clássico vão para os registros ZIP64, como faz o zipfile.
+    """
+    diretorio = []
+    posicao = 0
+    for entrada in entradas:
+        nome = entrada.nome.encode('utf-8')
+        flags = 0 if entrada.nome.isascii() else _FLAG_NOME_UTF8
+        hora, data = data_hora_dos(entrada.date_time)
+        comprimido = len(entrada.dados)
+        # No cabeçalho local o extra ZIP64 traz sempre os dois tamanhos
+        if comprimido >= _LIMITE_ZIP32 or entrada.tamanho >= _LIMITE_ZIP32:
+            tamanhos_locais = (0xFFFFFFFF, 0xFFFFFFFF)
+            extra_local = struct.pack('<2H2Q', _EXTRA_ZIP64, 16, entrada.tamanho, comprimido)
+        else:
+            tamanhos_locais = (comprimido, entrada.tamanho)
+            extra_local = b''
+        (tamanho, tamanho_comprimido, deslocamento), extra = campos_zip64(entrada.tamanho, comprimido, posicao)
+        versao = _VERSAO_ZIP64 if extra else _VERSAO_ZIP
+        cabecalho = struct.pack(
+            zipfile.structFileHeader, zipfile.stringFileHeader, versao, 0, flags, entrada.metodo,
+            hora, data, entrada.crc, *tamanhos_locais, len(nome), len(extra_local),
+        )
+        destino.write(cabecalho)
+        destino.write(nome)
+        destino.write(extra_local)
+        destino.write(entrada.dados)
+        diretorio.append(struct.pack(
+            zipfile.structCentralDir, zipfile.stringCentralDir, versao, entrada.create_system, versao, 0,
+            flags, entrada.metodo, hora, data, entrada.crc, tamanho_comprimido, tamanho,
+            len(nome), len(extra), 0, 0, 0, entrada.external_attr, deslocamento,
+        ) + nome + extra)
+        posicao += len(cabecalho) + len(nome) + len(extra_local) + comprimido
+    tamanho_diretorio = sum(len(registro) for registro in diretorio)
+    for registro in diretorio:
+        destino.write(registro)
+    inicio_fim64 = posicao + tamanho_diretorio
+    quantidade = len(diretorio)
+    if quantidade >= _LIMITE_ENTRADAS_ZIP32 or tamanho_diretorio >= _LIMITE_ZIP32 or posicao >= _LIMITE_ZIP32:
+        destino.write(struct.pack(
+            zipfile.structEndArchive64, zipfile.stringEndArchive64, zipfile.sizeEndCentDir64 - 12,
+            _VERSAO_ZIP64, _VERSAO_ZIP64, 0, 0, quantidade, quantidade, tamanho_diretorio, posicao,
+        ))
+        destino.write(struct.pack(
+            zipfile.structEndArchive64Locator, zipfile.stringEndArchive64Locator, 0, inicio_fim64, 1,
+        ))
+        if quantidade >= _LIMITE_ENTRADAS_ZIP32:
+            quantidade = 0xFFFF
+        (tamanho_diretorio, posicao), _ = campos_zip64(tamanho_diretorio, posicao)
+    destino.write(struct.pack(
+        zipfile.structEndArchive, zipfile.stringEndArchive, 0, 0,
+        quantidade, quantidade, tamanho_diretorio, posicao, 0,
+    ))
+
+def gravar_zip(entradas):
+    """Serializa as entradas num arquivo ZIP (cabeçalhos locais, diretório central e fim)"""
+    destino = BytesIO()
+    escrever_zip(destino, entradas)
+    return destino.getvalue()
+
+class PacoteModelo:
+    """Partes do .docx modelo mantidas comprimidas e copiadas literalmente em cada OS"""
+
+    def __init__(self, conteudo):
+        self.entradas = []
+        with zipfile.ZipFile(BytesIO(conteudo)) as modelo:
+            for info in modelo.infolist():
+                self.entradas.append(self._entrada_do_modelo(modelo, conteudo, info))
+
+    @staticmethod
+    def _entrada_do_modelo(modelo, conteudo, info):
+        if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) or info.flag_bits & 0x1:
+            # Método que não sabemos copiar: descomprime uma vez e recomprime em deflate
+            return EntradaZip.comprimir(info.filename, modelo.read(info), info.date_time)
+        cabecalho = struct.unpack(
+            zipfile.structFileHeader,
+            conteudo[info.header_offset:info.header_offset + _TAMANHO_CABECALHO_LOCAL],
+        )
+        inicio = (info.header_offset + _TAMANHO_CABECALHO_LOCAL
+                  + cabecalho[_FH_TAMANHO_NOME] + cabecalho[_FH_TAMANHO_EXTRA])
+        dados = conteudo[inicio:inicio + info.compress_size]
+        return EntradaZip(
+            info.filename, info.compress_type, info.CRC, dados, info.file_size,
+            info.date_time, info.external_attr, info.create_system,
+        )
+
+    def montar(self, partes_renderizadas):
+        """Bytes do .docx: partes renderizadas comprimidas, as demais copiadas do modelo
+
+        Cada parte renderizada pode ser o XML completo ou um iterável de trechos.
+        """
+        entradas = []
+        for entrada in self.entradas:
+            conteudo = partes_renderizadas.get(entrada.nome)
+            if conteudo is None:
+                entradas.append(entrada)
+            elif isinstance(conteudo, bytes):
+                entradas.append(EntradaZip.comprimir(entrada.nome, conteudo, entrada.date_time))
+            else:
+                entradas.append(EntradaZip.comprimir_fluxo(entrada.nome, conteudo, entrada.date_time))
+        return gravar_zip(entradas)
@@ -0,0 +1,119 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from gerador_os.arquivamento import mapear_em_ordem
+from gerador_os.modelo import ModeloCompilado, ModeloDoLote, ModeloSubstituicaoSimples
+
+# Modelo compilado uma única vez em cada processo trabalhador
+_modelo_do_processo = None
+
+def fabrica_do_modelo(modelo):
+    """Chamável serializável que recompila o modelo num processo trabalhador"""
+    if isinstance(modelo, ModeloDoLote):
+        return partial(compilar_modelo_do_lote, motor=modelo.modelo.motor, contexto_lote=modelo.contexto_lote)
+    if isinstance(modelo, ModeloCompilado):
+        return partial(ModeloCompilado, motor=modelo.motor)
+    if isinstance(modelo, ModeloSubstituicaoSimples):
+        return ModeloSubstituicaoSimples
+    raise TypeError(f"Modelo sem suporte à geração paralela: {type(modelo).__name__}")
+
+def compilar_modelo_do_lote(conteudo, motor, contexto_lote):
+    return ModeloDoLote(ModeloCompilado(conteudo, motor), contexto_lote)
+
+def _inicializar_trabalhador(fabrica, conteudo):
+    global _modelo_do_processo
+    _modelo_do_processo = fabrica(conteudo)
+
+def gerar_fatia(modelo, contextos):
+    """Documentos de uma fatia; a falha de um documento fica na sua posição"""
+    resultados = []
+    for contexto in contextos:
+        try:
+            resultados.append(modelo.gerar_docx(contexto))
+        except Exception as e:
+            resultados.append(e)
+    return resultados
+
+def _gerar_fatia_no_trabalhador(contextos):
+    return gerar_fatia(_modelo_do_processo, contextos)
+
+def tamanho_de_fatia(total, trabalhadores):
+    # Cerca de quatro fatias por processo equilibram a carga sem multiplicar as trocas entre processos
+    return max(1, min(64, math.ceil(total / (trabalhadores * 4))))
+
+def gerar_documentos(modelo, contextos, trabalhadores=1, tamanho_fatia=None, capturar_erros=False,
+                     cache=None, estatisticas=None):
+    """Gera os bytes do .docx de cada contexto, na ordem de entrada
+
+    Com mais de um trabalhador, os contextos vão em fatias para um pool de processos;
+    cada processo compila o modelo uma vez a partir dos bytes. Com capturar_erros, a
+    falha de um documento é gerada como a exceção na sua posição em vez de interromper.
+    Com um CacheDeDocumentos, só os contextos ainda não gerados são renderizados; o
+    dicionário estatisticas recebe as contagens de 'reaproveitados' e 'gerados'.
+    """
+    contextos = list(contextos)
+    if estatisticas is None:
+        estatisticas = {}
+    estatisticas.update(reaproveitados=0, gerados=0)
+    if cache is None:
+        for resultado in _gerar_sem_cache(modelo, contextos, trabalhadores, tamanho_fatia, capturar_erros):
+            estatisticas['gerados'] += 1
+            yield resultado
+        return
+
+    chaves = [modelo.chave_de_cache(contexto) for contexto in contextos]
+    pendentes = [n for n, chave in enumerate(chaves) if not cache.contem(chave)]
+    gerados = _gerar_sem_cache(modelo, [contextos[n] for n in pendentes], trabalhadores, tamanho_fatia, capturar_erros)
+    pendentes = set(pendentes)
+    try:
+        for n, (chave, contexto) in enumerate(zip(chaves, contextos)):
+            conteudo = None if n in pendentes else cache.obter(chave)
+            if conteudo is not None:
+                estatisticas['reaproveitados'] += 1
+                yield conteudo
+                continue
+            if n in pendentes:
+                conteudo = next(gerados)
+            else:
+                # Descartado do cache entre a consulta e a leitura: gera aqui mesmo
+                conteudo = next(_resultados([gerar_fatia(modelo, [contexto])], capturar_erros))
+            if not isinstance(conteudo, Exception):
+                cache.guardar(chave, conteudo)
+            estatisticas['gerados'] += 1
+            yield conteudo
+    finally:
+        gerados.close()
+
+def _gerar_sem_cache(modelo, contextos, trabalhadores, tamanho_fatia, capturar_erros):
+    trabalhadores = max(1, min(trabalhadores or os.cpu_count() or 1, len(contextos)))
+    if trabalhadores == 1:
+        fatias = (gerar_fatia(modelo, [contexto]) for contexto in contextos)
+        yield from _resultados(fatias, capturar_erros)
+        return
+    tamanho_fatia = tamanho_fatia or tamanho_de_fatia(len(contextos), trabalhadores)
+    fatias = [contextos[i:i + tamanho_fatia] for i in range(0, len(contextos), tamanho_fatia)]
+    with ProcessPoolExecutor(
+        max_workers=trabalhadores,
+        # spawn: o servidor do Streamlit tem várias threads, e fork com threads ativas não é seguro
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_inicializar_trabalhador,
+        initargs=(fabrica_do_modelo(modelo), modelo.conteudo),
+    ) as executor:
+        try:
+            # Poucas fatias em andamento por processo: se o consumidor atrasa, os processos esperam
+            # em vez de acumular documentos prontos na memória
+            fatias_prontas = mapear_em_ordem(executor, _gerar_fatia_no_trabalhador, fatias, trabalhadores * 2)
+            yield from _resultados(fatias_prontas, capturar_erros)
+        finally:
+            # Consumidor desistiu (erro ou cancelamento): não processa as fatias ainda na fila
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def _resultados(fatias, capturar_erros):
+    for fatia in fatias:
+        for resultado in fatia:
+            if isinstance(resultado, Exception) and not capturar_erros:
+                raise resultado
+            yield resultado
@@ -0,0 +1,163 @@
+import queue
+import threading
+import time
+
+# Itens em trânsito entre dois estágios: limita a memória e faz o produtor esperar o consumidor
+CAPACIDADE_PADRAO = 16
+
+_FIM = object()
+
+class _Falha:
+    def __init__(self, erro):
+        self.erro = erro
+
+class Estagio:
+    """Contadores de um estágio: itens processados, tempo trabalhando e tempo parado na fila"""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.itens = 0
+        self.ocupado = 0.0
+        self.parado = 0.0
+
+class FilaMedida:
+    """Fila limitada que registra a profundidade a cada item colocado"""
+
+    def __init__(self, nome, capacidade):
+        self.nome = nome
+        self.capacidade = capacidade
+        self._fila = queue.Queue(capacidade)
+        self.maxima = 0
+        self._soma = 0
+        self._amostras = 0
+
+    @property
+    def profundidade(self):
+        return self._fila.qsize()
+
+    @property
+    def media(self):
+        return self._soma / self._amostras if self._amostras else 0.0
+
+    def colocar(self, item, parar):
+        """Espera por espaço na fila; devolve False se o consumidor desistiu nesse meio tempo"""
+        while not parar.is_set():
+            try:
+                self._fila.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            profundidade = self._fila.qsize()
+            self.maxima = max(self.maxima, profundidade)
+            self._soma += profundidade
+            self._amostras += 1
+            return True
+        return False
+
+    def retirar(self):
+        return self._fila.get()
+
+class MedidorDePipeline:
+    """Estágios e filas de um pipeline, para localizar o gargalo"""
+
+    def __init__(self):
+        self.estagios = []
+        self.filas = []
+        self.inicio = None
+        self.fim = None
+
+    def estagio(self, nome):
+        estagio = Estagio(nome)
+        self.estagios.append(estagio)
+        return estagio
+
+    def fila(self, nome, capacidade):
+        fila = FilaMedida(nome, capacidade)
+        self.filas.append(fila)
+        return fila
+
+    @property
+    def decorrido(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    def utilizacao(self, estagio):
+        decorrido = self.decorrido
+        return estagio.ocupado / decorrido if decorrido > 0 else 0.0
+
+    def gargalo(self):
+        """Estágio com a maior fração do tempo ocupada"""
+        return max(self.estagios, key=self.utilizacao, default=None)
+
+    def relatorio(self):
+        linhas = [{
+            'Etapa': estagio.nome,
+            'Itens': estagio.itens,
+            'Ocupado (s)': round(estagio.ocupado, 2),
+            'Parado na fila (s)': round(estagio.parado, 2),
+            'Utilização (%)': round(100 * self.utilizacao(estagio), 1),
+        } for estagio in self.estagios]
+        linhas.extend({
+            'Etapa': f"Fila {fila.nome}",
+            'Capacidade': fila.capacidade,
+            'Profundidade média': round(fila.media, 1),
+            'Profundidade máxima': fila.maxima,
+        } for fila in self.filas)
+        return linhas
+
+def encadear(itens, capacidade=CAPACIDADE_PADRAO, medidor=None, produtor='Produção', consumidor='Consumo'):
+    """Consome o iterável numa thread produtora e entrega os itens por uma fila limitada
+
+    O produtor trabalha enquanto o consumidor processa o item anterior, e para quando a
+    fila enche. Exceções do produtor reaparecem no consumidor; se o consumidor desiste
+    (fecha o gerador), o produtor é interrompido e o iterável fechado.
+    """
+    medidor = medidor or MedidorDePipeline()
+    estagio_produtor = medidor.estagio(produtor)
+    estagio_consumidor = medidor.estagio(consumidor)
+    fila = medidor.fila(f"{produtor} → {consumidor}", capacidade)
+    parar = threading.Event()
+
+    def produzir():
+        iterador = iter(itens)
+        try:
+            while not parar.is_set():
+                inicio = time.perf_counter()
+                try:
+                    item = next(iterador)
+                except StopIteration:
+                    break
+                pronto = time.perf_counter()
+                estagio_produtor.ocupado += pronto - inicio
+                estagio_produtor.itens += 1
+                if not fila.colocar(item, parar):
+                    return
+                estagio_produtor.parado += time.perf_counter() - pronto
+            fila.colocar(_FIM, parar)
+        except BaseException as e:
+            fila.colocar(_Falha(e), parar)
+        finally:
+            if hasattr(iterador, 'close'):
+                iterador.close()
+
+    if medidor.inicio is None:
+        medidor.inicio = time.perf_counter()
+    thread = threading.Thread(target=produzir, name=f'pipeline-{produtor}', daemon=True)
+    thread.start()
+    try:
+        while True:
+            inicio = time.perf_counter()
+            item = fila.retirar()
+            estagio_consumidor.parado += time.perf_counter() - inicio
+            if item is _FIM:
+                break
+            if isinstance(item, _Falha):
+                raise item.erro
+            inicio = time.perf_counter()
+            yield item
+            estagio_consumidor.ocupado += time.perf_counter() - inicio
+            estagio_consumidor.itens += 1
+    finally:
+        parar.set()
+        thread.join()
+        medidor.fim = time.perf_counter()
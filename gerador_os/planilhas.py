@@ -0,0 +1,355 @@
+"""Leitura rápida da planilha de funcionários: só as colunas que a geração usa
+
+O cabeçalho é lido primeiro e os aliases resolvidos (colunas_utilizadas); depois só essas
+colunas são convertidas. Cada formato (.xlsx, .csv, .ods, .parquet) tem seu leitor, e todos
+devolvem o DataFrame que segue para mapear_e_renomear_colunas_funcionarios. Nas pastas de
+trabalho (.xlsx, .ods), a aba e a linha do cabeçalho são detectadas pelas primeiras linhas
+de cada aba.
+
+No .xlsx, com o pacote opcional python-calamine instalado a leitura é feita por ele; senão,
+o XML da aba é percorrido em streaming com lxml. O resultado é o mesmo DataFrame que
+pd.read_excel daria para essas colunas (com header= na linha detectada).
+"""
+import codecs
+import contextlib
+import csv
+import importlib.util
+import os
+import posixpath
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from lxml import etree
+from openpyxl.reader.strings import read_string_table
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+from pandas.io.parsers import TextParser
+
+from gerador_os.contextos import colunas_utilizadas, resolver_colunas
+
+# Muda quando a leitura passa a produzir outro DataFrame para a mesma planilha (invalida o cache)
+VERSAO_LEITURA = 3
+
+MOTOR_CALAMINE = 'calamine'
+MOTOR_STREAMING = 'streaming'
+
+NS_PLANILHA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_RELACOES = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+ATRIBUTO_RID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+S_ROW = NS_PLANILHA + 'row'
+S_C = NS_PLANILHA + 'c'
+S_V = NS_PLANILHA + 'v'
+S_IS = NS_PLANILHA + 'is'
+S_T = NS_PLANILHA + 't'
+
+# Linhas do início de cada aba examinadas para achar o cabeçalho (títulos e logotipos acima dele)
+LINHAS_AMOSTRA_CABECALHO = 20
+
+# Linhas de .csv convertidas por vez: só as colunas usadas de cada bloco ficam na memória
+LINHAS_POR_BLOCO_CSV = 50_000
+SEPARADORES_CSV = ';,\t|'
+
+class FormatoNaoSuportado(ValueError):
+    pass
+
+def motor_disponivel():
+    """calamine quando o pacote opcional está instalado; senão o leitor em streaming"""
+    return MOTOR_CALAMINE if importlib.util.find_spec('python_calamine') else MOTOR_STREAMING
+
+def _rebobinar(arquivo):
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    return arquivo
+
+class LeitorXlsx:
+    """Abas de um .xlsx lidas linha a linha, convertendo só as colunas pedidas"""
+
+    def __init__(self, arquivo):
+        self.pacote = zipfile.ZipFile(_rebobinar(arquivo))
+        self.abas = self._caminhos_das_abas()
+        self.textos = self._textos_compartilhados()
+        self.estilos_data, self.estilos_duracao = self._estilos_de_data()
+
+    def _ler_xml(self, nome):
+        with self.pacote.open(nome) as f:
+            return etree.parse(f).getroot()
+
+    def _caminhos_das_abas(self):
+        """{nome da aba: caminho do XML no pacote}, na ordem da pasta de trabalho"""
+        pasta_de_trabalho = self._ler_xml('xl/workbook.xml')
+        propriedades = pasta_de_trabalho.find(NS_PLANILHA + 'workbookPr')
+        data1904 = propriedades is not None and propriedades.get('date1904') in ('1', 'true')
+        self.epoca = CALENDAR_MAC_1904 if data1904 else CALENDAR_WINDOWS_1900
+        destinos = {
+            relacao.get('Id'): relacao.get('Target')
+            for relacao in self._ler_xml('xl/_rels/workbook.xml.rels').iter(NS_RELACOES + 'Relationship')
+        }
+        abas = {}
+        for aba in pasta_de_trabalho.iter(NS_PLANILHA + 'sheet'):
+            alvo = destinos[aba.get(ATRIBUTO_RID)]
+            abas[aba.get('name')] = alvo.lstrip('/') if alvo.startswith('/') else posixpath.normpath(posixpath.join('xl', alvo))
+        if not abas:
+            raise KeyError("Pasta de trabalho sem abas")
+        return abas
+
+    def _textos_compartilhados(self):
+        if 'xl/sharedStrings.xml' not in self.pacote.namelist():
+            return []
+        with self.pacote.open('xl/sharedStrings.xml') as f:
+            return read_string_table(f)
+
+    def _estilos_de_data(self):
+        """Índices de estilo de célula cujo formato numérico é data (ou duração)"""
+        if 'xl/styles.xml' not in self.pacote.namelist():
+            return frozenset(), frozenset()
+        estilos = self._ler_xml('xl/styles.xml')
+        formatos = dict(BUILTIN_FORMATS)
+        for formato in estilos.iter(NS_PLANILHA + 'numFmt'):
+            formatos[int(formato.get('numFmtId'))] = formato.get('formatCode')
+        datas, duracoes = set(), set()
+        celulas = estilos.find(NS_PLANILHA + 'cellXfs')
+        for indice, xf in enumerate(celulas if celulas is not None else ()):
+            codigo = formatos.get(int(xf.get('numFmtId', 0)))
+            if codigo and is_date_format(codigo):
+                datas.add(indice)
+                if is_timedelta_format(codigo):
+                    duracoes.add(indice)
+        return frozenset(datas), frozenset(duracoes)
+
+    def _valor(self, c):
+        """Mesmo valor que openpyxl (modo somente leitura) e pandas dariam para a célula"""
+        tipo = c.get('t', 'n')
+        if tipo == 'inlineStr':
+            texto = c.find(S_IS)
+            return ''.join(t.text or '' for t in texto.iter(S_T)) if texto is not None else ''
+        v = c.find(S_V)
+        if v is None or v.text is None:
+            return ''
+        valor = v.text
+        if tipo == 's':
+            return self.textos[int(valor)]
+        if tipo == 'str':
+            return valor
+        if tipo == 'b':
+            return bool(int(valor))
+        if tipo == 'e':
+            return np.nan
+        if tipo == 'd':
+            return from_ISO8601(valor)
+        numero = float(valor) if ('.' in valor or 'E' in valor or 'e' in valor) else int(valor)
+        estilo = int(c.get('s', 0))
+        if estilo in self.estilos_data:
+            return from_excel(numero, self.epoca, timedelta=estilo in self.estilos_duracao)
+        return int(numero) if numero == int(numero) else numero
+
+    def _linhas(self, aba, indices=None):
+        """(número da linha, valores das colunas pedidas, linha tem algum valor) de cada <row>
+
+        Sem indices, todas as colunas até a última célula da linha.
+        """
+        colunas_por_letra = {}
+        with self.pacote.open(self.abas[aba]) as f:
+            for _, row in etree.iterparse(f, tag=S_ROW):
+                valores = [''] * len(indices) if indices is not None else []
+                posicao = -1
+                for c in row.iterchildren(S_C):
+                    referencia = c.get('r')
+                    if referencia is None:
+                        posicao += 1
+                    else:
+                        letras = referencia.rstrip('0123456789')
+                        posicao = colunas_por_letra.get(letras)
+                        if posicao is None:
+                            posicao = colunas_por_letra[letras] = column_index_from_string(letras) - 1
+                    if indices is None:
+                        valores.extend([''] * (posicao + 1 - len(valores)))
+                        valores[posicao] = self._valor(c)
+                        continue
+                    destino = indices.get(posicao)
+                    if destino is not None:
+                        valores[destino] = self._valor(c)
+                tem_valor = any(valor != '' for valor in valores) or (
+                    row.find(f'{S_C}/{S_V}') is not None or row.find(f'{S_C}/{S_IS}') is not None
+                )
+                yield int(row.get('r', 0)), valores, tem_valor
+                row.clear()
+                while row.getprevious() is not None:
+                    del row.getparent()[0]
+
+    def amostra(self, aba, quantidade):
+        """Valores das primeiras linhas da aba (linhas ausentes no XML ficam vazias)"""
+        linhas = []
+        for numero, valores, _ in self._linhas(aba):
+            numero = numero or len(linhas) + 1
+            if numero > quantidade:
+                break
+            linhas.extend([] for _ in range(numero - 1 - len(linhas)))
+            while valores and valores[-1] == '':
+                valores.pop()
+            linhas.append(valores)
+        return linhas
+
+    def colunas(self, aba, posicoes, linha_cabecalho=0):
+        """Linhas de dados (após a linha do cabeçalho, contada a partir de 0) só com as colunas pedidas"""
+        indices = {posicao: n for n, posicao in enumerate(posicoes)}
+        linhas = []
+        ultima_com_valor = -1
+        esperado = 1
+        for numero, valores, tem_valor in self._linhas(aba, indices):
+            numero = numero or esperado
+            # Linhas ausentes no XML são linhas vazias na planilha
+            linhas.extend([''] * len(posicoes) for _ in range(numero - esperado))
+            esperado = numero + 1
+            linhas.append(valores)
+            if tem_valor:
+                ultima_com_valor = len(linhas) - 1
+        return linhas[linha_cabecalho + 1:ultima_com_valor + 1]
+
+def detectar_cabecalho(amostras):
+    """(aba, linha a partir de 0) que reconhece mais colunas da tabela de aliases
+
+    amostras: {aba: primeiras linhas}. No empate vale a primeira aba e a linha mais acima;
+    sem nenhuma coluna reconhecida, a primeira linha da primeira aba, como no pd.read_excel.
+    """
+    melhor_aba, melhor_linha, melhor_pontuacao = next(iter(amostras), None), 0, 0
+    for aba, linhas in amostras.items():
+        for numero, valores in enumerate(linhas):
+            pontuacao = len(resolver_colunas(valores))
+            if pontuacao > melhor_pontuacao:
+                melhor_aba, melhor_linha, melhor_pontuacao = aba, numero, pontuacao
+    return melhor_aba, melhor_linha
+
+def _abrir_binario(arquivo):
+    if isinstance(arquivo, (str, os.PathLike)):
+        return open(arquivo, 'rb')
+    return contextlib.nullcontext(_rebobinar(arquivo))
+
+def detectar_codificacao(arquivo, tamanho_bloco=1024 * 1024):
+    """'utf-8-sig' com BOM, 'utf-8' se o arquivo inteiro decodifica como tal, senão 'latin-1'
+
+    O arquivo é percorrido em blocos com um decodificador incremental, sem carregá-lo inteiro.
+    """
+    with _abrir_binario(arquivo) as f:
+        inicio = f.read(len(codecs.BOM_UTF8))
+        if inicio == codecs.BOM_UTF8:
+            return 'utf-8-sig'
+        decodificador = codecs.getincrementaldecoder('utf-8')()
+        bloco = inicio
+        try:
+            while bloco:
+                decodificador.decode(bloco)
+                bloco = f.read(tamanho_bloco)
+            decodificador.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return 'latin-1'
+    return 'utf-8'
+
+def detectar_separador(arquivo, codificacao):
+    """Separador da primeira linha (planilhas brasileiras costumam exportar com ';')"""
+    with _abrir_binario(arquivo) as f:
+        primeira_linha = f.readline().decode(codificacao, errors='replace')
+    try:
+        return csv.Sniffer().sniff(primeira_linha, delimiters=SEPARADORES_CSV).delimiter
+    except csv.Error:
+        return ','
+
+def ler_csv(arquivo):
+    """.csv em blocos de LINHAS_POR_BLOCO_CSV, mantendo só as colunas usadas na geração
+
+    Os valores são lidos como texto: a inferência de tipos bloco a bloco daria tipos
+    diferentes para a mesma coluna, e a geração converte tudo em texto de qualquer forma.
+    """
+    codificacao = detectar_codificacao(arquivo)
+    separador = detectar_separador(arquivo, codificacao)
+    cabecalho = list(pd.read_csv(_rebobinar(arquivo), sep=separador, encoding=codificacao, nrows=0).columns)
+    selecionadas = colunas_utilizadas(cabecalho) or None
+    blocos = pd.read_csv(
+        _rebobinar(arquivo), sep=separador, encoding=codificacao, usecols=selecionadas, dtype=str,
+        chunksize=LINHAS_POR_BLOCO_CSV,
+    )
+    with blocos:
+        return pd.concat(list(blocos), ignore_index=True)
+
+def _com_origem(df, amostras, aba, linha):
+    """Anota em df.attrs onde o cabeçalho foi encontrado (o app avisa quando não é a linha 1 da 1ª aba)"""
+    df.attrs['origem'] = {
+        'aba': aba,
+        'linha': linha + 1,
+        'detectada': (aba, linha) != (next(iter(amostras)), 0),
+    }
+    return df
+
+def _ler_excel_detectando_cabecalho(arquivo, motor):
+    """pd.read_excel da aba e da linha de cabeçalho detectadas, convertendo só as colunas usadas"""
+    amostras = {
+        aba: amostra.fillna('').values.tolist()
+        for aba, amostra in pd.read_excel(
+            _rebobinar(arquivo), engine=motor, sheet_name=None, header=None, nrows=LINHAS_AMOSTRA_CABECALHO
+        ).items()
+    }
+    aba, linha = detectar_cabecalho(amostras)
+    cabecalho = list(pd.read_excel(_rebobinar(arquivo), engine=motor, sheet_name=aba, header=linha, nrows=0).columns)
+    selecionadas = colunas_utilizadas(cabecalho)
+    df = pd.read_excel(_rebobinar(arquivo), engine=motor, sheet_name=aba, header=linha, usecols=selecionadas or None)
+    return _com_origem(df, amostras, aba, linha)
+
+def ler_ods(arquivo):
+    """.ods pelo pd.read_excel (motor odf, pacote opcional odfpy), com a detecção do cabeçalho"""
+    return _ler_excel_detectando_cabecalho(arquivo, 'odf')
+
+def ler_parquet(arquivo):
+    """.parquet lendo do disco só as colunas usadas (o esquema já traz os nomes)"""
+    cabecalho = pq.read_schema(_rebobinar(arquivo)).names
+    selecionadas = colunas_utilizadas(cabecalho)
+    return pd.read_parquet(_rebobinar(arquivo), columns=selecionadas or None)
+
+def ler_xlsx(arquivo, motor=None):
+    """DataFrame com só as colunas usadas na geração, como pd.read_excel daria para elas
+
+    A aba e a linha do cabeçalho são detectadas pelas primeiras linhas de cada aba. Se nenhuma
+    coluna for reconhecida (ou o arquivo não for um .xlsx legível pelo leitor em streaming),
+    a primeira aba é lida inteira com pd.read_excel.
+    """
+    motor = motor or motor_disponivel()
+    if motor == MOTOR_CALAMINE:
+        return _ler_excel_detectando_cabecalho(arquivo, 'calamine')
+
+    try:
+        leitor = LeitorXlsx(arquivo)
+        amostras = {aba: leitor.amostra(aba, LINHAS_AMOSTRA_CABECALHO) for aba in leitor.abas}
+    except (zipfile.BadZipFile, KeyError, AttributeError, etree.XMLSyntaxError):
+        return pd.read_excel(_rebobinar(arquivo))
+    aba, linha = detectar_cabecalho(amostras)
+    cabecalho = amostras[aba][linha] if linha < len(amostras[aba]) else []
+    selecionadas = [col for col in colunas_utilizadas(cabecalho) if col != '']
+    if not selecionadas:
+        return pd.read_excel(_rebobinar(arquivo))
+    # Coluna repetida no cabeçalho: pandas renomeia a segunda ocorrência, só a primeira é usada
+    posicoes = [cabecalho.index(col) for col in dict.fromkeys(selecionadas)]
+    linhas = leitor.colunas(aba, posicoes, linha)
+    # O mesmo TextParser de pd.read_excel: valores ausentes ('', 'NA', 'N/A'...) e tipos por coluna
+    df = TextParser([[cabecalho[p] for p in posicoes]] + linhas, header=0, skip_blank_lines=False).read()
+    return _com_origem(df, amostras, aba, linha)
+
+LEITORES_POR_FORMATO = {
+    'xlsx': ler_xlsx,
+    'csv': ler_csv,
+    'ods': ler_ods,
+    'parquet': ler_parquet,
+}
+FORMATOS_PLANILHA = tuple(LEITORES_POR_FORMATO)
+
+def formato_da_planilha(arquivo):
+    """Extensão do arquivo (caminho ou arquivo enviado), sem o ponto e em minúsculas"""
+    nome = arquivo if isinstance(arquivo, (str, os.PathLike)) else getattr(arquivo, 'name', '')
+    return os.path.splitext(os.fspath(nome))[1].lstrip('.').lower()
+
+def ler_planilha_funcionarios(arquivo, formato=None):
+    """Planilha de funcionários com o leitor do formato (pela extensão, se não informado)"""
+    formato = formato or formato_da_planilha(arquivo) or 'xlsx'
+    if formato not in LEITORES_POR_FORMATO:
+        raise FormatoNaoSuportado(f"Formato de planilha não suportado: .{formato} (use {', '.join(FORMATOS_PLANILHA)})")
+    return LEITORES_POR_FORMATO[formato](arquivo)
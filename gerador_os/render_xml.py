@@ -0,0 +1,285 @@
+import copy
+import itertools
+import re
+import uuid
+from xml.sax.saxutils import escape
+
+from lxml import etree
+from docx.text.paragraph import Paragraph
+
+from gerador_os.modelo import (
+    ROTULO, VALOR, AGENTE, TEXTO, QUEBRA, OBJETO, estilo_do_rotulo, intercalar_objetos,
+    localizar_elemento, posicao_no_texto_final, preparar_paragrafo_medicoes, segmentos_de_medicoes,
+    segmentos_do_paragrafo, separar_objetos,
+)
+from gerador_os.travessia import W_P, W_SECT_PR, iterar_partes_de_texto, raiz_de_texto
+
+PADRAO_XMLNS = re.compile(r' xmlns(?::([\w.-]+))?="([^"]*)"')
+PADRAO_TEXTO_INVALIDO = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+PADRAO_CONTROLE_RUN = re.compile(r'([\t\r\n])')
+# Ids que o Word exige únicos no documento: desenhos (wp:docPr) e marcadores (w:bookmarkStart/End)
+PADRAO_ID_UNICO = re.compile(
+    rb'(<(?:[\w.-]+:)?(?:docPr|bookmarkStart|bookmarkEnd)\s(?:[^>]*?\s)?(?:[\w.-]+:)?id=")(\d+)"'
+)
+
+def serializar_fragmento(elemento, nsmap_raiz):
+    """XML de um elemento sem as declarações de namespace já feitas na raiz do documento"""
+    xml = etree.tostring(elemento, encoding='unicode')
+    fim_abertura = xml.index('>')
+
+    def remover_se_herdado(m):
+        return '' if nsmap_raiz.get(m.group(1)) == m.group(2) else m.group(0)
+
+    return PADRAO_XMLNS.sub(remover_se_herdado, xml[:fim_abertura]) + xml[fim_abertura:]
+
+def abrir_elemento(fragmento, tag):
+    """Separa '<tag ...>conteúdo' do fechamento '</tag>' (ou expande '<tag .../>')"""
+    if fragmento.endswith('/>'):
+        return fragmento[:-2] + '>'
+    return fragmento[:-len(f'</{tag}>')]
+
+def conteudo_do_run(texto):
+    """Mesmo XML que python-docx gera para run.text: tabulações e quebras viram elementos"""
+    if PADRAO_TEXTO_INVALIDO.search(texto):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    partes = []
+    for trecho in PADRAO_CONTROLE_RUN.split(texto):
+        if not trecho:
+            continue
+        if trecho == '\t':
+            partes.append('<w:tab/>')
+        elif trecho in '\r\n':
+            partes.append('<w:br/>')
+        elif len(trecho.strip()) < len(trecho):
+            partes.append(f'<w:t xml:space="preserve">{escape(trecho)}</w:t>')
+        else:
+            partes.append(f'<w:t>{escape(trecho)}</w:t>')
+    return ''.join(partes)
+
+class SlotParagrafo:
+    """Parágrafo com placeholders pré-serializado em abertura, runs e fechamento"""
+
+    def __init__(self, p, chaves, nsmap_raiz, formatacao):
+        self.chaves = chaves
+        self.medicoes = "[MEDIÇÕES]" in chaves
+        self.texto_original = p.text
+        self.original = serializar_fragmento(p, nsmap_raiz)
+
+        preparado = copy.deepcopy(p)
+        paragrafo = Paragraph(preparado, None)
+        estilo_rotulo = estilo_do_rotulo(paragrafo)
+        self.objetos = []
+        if self.medicoes:
+            preparar_paragrafo_medicoes(paragrafo)
+        else:
+            # Desenhos e caixas de texto são reinseridos entre os trechos a cada renderização
+            self.objetos = [
+                (posicao, serializar_fragmento(r, nsmap_raiz)) for posicao, r in separar_objetos(paragrafo)
+            ]
+        self.abertura = abrir_elemento(serializar_fragmento(preparado, nsmap_raiz), 'w:p')
+
+        # Um run de amostra por tipo de trecho fornece o <w:rPr> exato do caminho python-docx
+        self.runs = {}
+        for tipo in (ROTULO, VALOR, AGENTE, TEXTO, QUEBRA):
+            formatacao.adicionar(paragrafo, tipo, '', estilo_rotulo)
+            run = preparado[-1]
+            fragmento = serializar_fragmento(run, nsmap_raiz)
+            preparado.remove(run)
+            self.runs[tipo] = fragmento if tipo == QUEBRA else abrir_elemento(fragmento, 'w:r')
+
+    def renderizar(self, contexto):
+        if self.medicoes:
+            segmentos = segmentos_de_medicoes(contexto.get("[MEDIÇÕES]", "Não aplicável"))
+        else:
+            segmentos = segmentos_do_paragrafo(self.texto_original, contexto, self.chaves)
+            if not segmentos:
+                return self.original
+        if self.objetos:
+            posicoes = [
+                posicao_no_texto_final(self.texto_original, contexto, self.chaves, posicao)
+                for posicao, _ in self.objetos
+            ]
+            segmentos = intercalar_objetos(segmentos, posicoes)
+        partes = [self.abertura]
+        for tipo, texto in segmentos:
+            if tipo == OBJETO:
+                partes.append(self.objetos[texto][1])
+            elif tipo == QUEBRA:
+                partes.append(self.runs[QUEBRA])
+            else:
+                partes.append(self.runs[tipo])
+                partes.append(conteudo_do_run(texto))
+                partes.append('</w:r>')
+        partes.append('</w:p>')
+        return ''.join(partes)
+
+INICIO_CORPO = 'inicio'
+FIM_CORPO = 'fim'
+PADRAO_TIPO_SECAO = re.compile(r'<w:type [^>]*/>')
+
+class PlanoParte:
+    """XML de uma parte de texto do modelo cortado nos parágrafos com placeholders"""
+
+    def __init__(self, parte, indice_da_parte, formatacao, delimitar_corpo=False):
+        self.nome_parte = str(parte.partname).lstrip('/')
+        raiz = copy.deepcopy(parte.element)
+        raiz_texto = raiz_de_texto(raiz)
+        marcador = f'gerador-os-{uuid.uuid4().hex}-'
+
+        paragrafos = [localizar_elemento(raiz_texto, caminho) for caminho in indice_da_parte]
+        conjunto = set(paragrafos)
+        for p in paragrafos:
+            if any(ancestral in conjunto for ancestral in p.iterancestors(W_P)):
+                # Caixa de texto dentro de um parágrafo que também será substituído
+                raise ValueError("Placeholders aninhados em caixas de texto exigem o motor python-docx")
+
+        slots = []
+        for n, (p, chaves) in enumerate(zip(paragrafos, indice_da_parte.values())):
+            slots.append(SlotParagrafo(p, chaves, raiz.nsmap, formatacao))
+            p.getparent().replace(p, etree.Comment(f'{marcador}{n}'))
+
+        self.sect_pr = None
+        if delimitar_corpo:
+            # Conteúdo do corpo sem o <w:sectPr> final, repetido uma vez por funcionário
+            # no documento único de impressão
+            sect_pr = raiz_texto[-1] if len(raiz_texto) and raiz_texto[-1].tag == W_SECT_PR else None
+            raiz_texto.insert(0, etree.Comment(f'{marcador}{INICIO_CORPO}'))
+            if sect_pr is not None:
+                self.sect_pr = serializar_fragmento(sect_pr, raiz.nsmap)
+                sect_pr.addprevious(etree.Comment(f'{marcador}{FIM_CORPO}'))
+            else:
+                raiz_texto.append(etree.Comment(f'{marcador}{FIM_CORPO}'))
+
+        xml = etree.tostring(raiz, encoding='UTF-8', standalone=True)
+        pedacos = re.split(f'<!--{marcador}(\\d+|{INICIO_CORPO}|{FIM_CORPO})-->'.encode('ascii'), xml)
+        self.sequencia = [pedacos[0]]
+        for marca, fixo in zip(pedacos[1::2], pedacos[2::2]):
+            marca = marca.decode('ascii')
+            self.sequencia.append(slots[int(marca)] if marca.isdigit() else marca)
+            self.sequencia.append(fixo)
+
+    @staticmethod
+    def _renderizar_trechos(sequencia, contexto):
+        for item in sequencia:
+            if isinstance(item, bytes):
+                yield item
+            elif isinstance(item, SlotParagrafo):
+                yield item.renderizar(contexto).encode('utf-8')
+
+    def renderizar(self, contexto):
+        return b''.join(self._renderizar_trechos(self.sequencia, contexto))
+
+    def fixar(self, contexto_lote):
+        """Cópia do plano com os parágrafos que só dependem do lote já renderizados nos trechos fixos"""
+        sequencia = []
+        for item in self.sequencia:
+            if isinstance(item, SlotParagrafo) and set(item.chaves) <= contexto_lote.keys():
+                item = item.renderizar(contexto_lote).encode('utf-8')
+            if isinstance(item, bytes) and sequencia and isinstance(sequencia[-1], bytes):
+                sequencia[-1] += item
+            else:
+                sequencia.append(item)
+        plano = copy.copy(self)
+        plano.sequencia = sequencia
+        return plano
+
+    def renderizar_corpo_em_sequencia(self, contextos, renumerar=None):
+        """Trechos do XML com o corpo renderizado uma vez por contexto, separados por seções
+
+        renumerar(trecho, n) ajusta os trechos de cada cópia do corpo a partir da segunda.
+        """
+        inicio = self.sequencia.index(INICIO_CORPO)
+        fim = self.sequencia.index(FIM_CORPO)
+        if self.sect_pr is not None:
+            separador = f'<w:p><w:pPr>{PADRAO_TIPO_SECAO.sub("", self.sect_pr)}</w:pPr></w:p>'.encode('utf-8')
+        else:
+            separador = b'<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+        yield from self._renderizar_trechos(self.sequencia[:inicio], None)
+        for n, contexto in enumerate(contextos):
+            trechos = self._renderizar_trechos(self.sequencia[inicio + 1:fim], contexto)
+            if n:
+                yield separador
+                if renumerar is not None:
+                    trechos = (renumerar(trecho, n) for trecho in trechos)
+            yield from trechos
+        yield from self._renderizar_trechos(self.sequencia[fim + 1:], None)
+
+class PlanoXML:
+    """Planos de todas as partes de texto (corpo, cabeçalhos e rodapés) com placeholders"""
+
+    def __init__(self, documento, indice, formatacao):
+        self.partes = [
+            PlanoParte(parte, indice[str(parte.partname)], formatacao)
+            for parte in iterar_partes_de_texto(documento)
+            if str(parte.partname) in indice
+        ]
+
+    def fixar(self, contexto_lote):
+        plano = copy.copy(self)
+        plano.partes = [parte.fixar(contexto_lote) for parte in self.partes]
+        return plano
+
+    def renderizar(self, contexto):
+        """{nome da parte no ZIP: bytes} das partes renderizadas para um funcionário"""
+        return {plano.nome_parte: plano.renderizar(contexto) for plano in self.partes}
+
+class RenumeradorDeIds:
+    """Desloca os ids de desenhos e marcadores de cada cópia do corpo para que não se repitam"""
+
+    def __init__(self, xmls):
+        maior = max((int(m.group(2)) for xml in xmls for m in PADRAO_ID_UNICO.finditer(xml)), default=0)
+        self.passo = maior + 1
+
+    def __call__(self, trecho, n):
+        deslocamento = n * self.passo
+        return PADRAO_ID_UNICO.sub(lambda m: m.group(1) + str(int(m.group(2)) + deslocamento).encode('ascii') + b'"', trecho)
+
+class PlanoImpressao:
+    """Documento único com a OS de todos os funcionários, uma seção por funcionário"""
+
+    def __init__(self, documento, indice, formatacao):
+        parte_principal = documento.part
+        self.documento = PlanoParte(
+            parte_principal, indice.get(str(parte_principal.partname), {}), formatacao, delimitar_corpo=True,
+        )
+        # Cabeçalhos e rodapés são compartilhados por todas as seções do documento único
+        self.cabecalhos_e_rodapes = [
+            PlanoParte(parte, indice[str(parte.partname)], formatacao)
+            for parte in iterar_partes_de_texto(documento)
+            if parte is not parte_principal and str(parte.partname) in indice
+        ]
+        self.renumerar = RenumeradorDeIds(
+            etree.tostring(parte.element) for parte in iterar_partes_de_texto(documento)
+        )
+
+    def conferir_cabecalhos(self, contextos, renderizados):
+        """Repassa os contextos, exigindo que cabeçalhos e rodapés saiam iguais aos do primeiro"""
+        for contexto in contextos:
+            for plano in self.cabecalhos_e_rodapes:
+                if plano.renderizar(contexto) != renderizados[plano.nome_parte]:
+                    raise ValueError(
+                        "cabeçalhos, rodapés e notas são compartilhados por todas as OS do documento único "
+                        "e não podem ter placeholders com dados diferentes entre os funcionários"
+                    )
+            yield contexto
+
+    def renderizar(self, contextos):
+        """{nome da parte no ZIP: trechos ou bytes}; o corpo é gerado à medida que é comprimido
+
+        Levanta ValueError sem nenhum contexto e, durante a geração, se um cabeçalho ou rodapé
+        mudar de um funcionário para outro.
+        """
+        contextos = iter(contextos)
+        primeiro = next(contextos, None)
+        if primeiro is None:
+            # Sem contextos o resultado seria o modelo com os placeholders por preencher
+            raise ValueError("nenhum funcionário para gerar o documento único")
+        partes = {
+            plano.nome_parte: plano.renderizar(primeiro) for plano in self.cabecalhos_e_rodapes
+        }
+        if self.cabecalhos_e_rodapes:
+            contextos = self.conferir_cabecalhos(contextos, dict(partes))
+        partes[self.documento.nome_parte] = self.documento.renderizar_corpo_em_sequencia(
+            itertools.chain([primeiro], contextos), self.renumerar,
+        )
+        return partes
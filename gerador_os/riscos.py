@@ -0,0 +1,356 @@
+"""Catálogo de riscos do PGR e placeholders comuns a todo o lote (riscos, danos, EPIs e medições)"""
+import pandas as pd
+
+CATEGORIAS_RISCO = {'fisico': '🔥 Físicos', 'quimico': '⚗️ Químicos', 'biologico': '🦠 Biológicos', 'ergonomico': '🏃 Ergonômicos', 'acidente': '⚠️ Acidentes'}
+
+RISCOS_PGR_DADOS = {
+    'quimico': {
+        'riscos': ['Exposição a Produto Químico'],
+        'danos': ['Irritação/lesão ocular, na pele e mucosas; Dermatites; Queimadura Química; Intoxicação; Náuseas; Vômitos.']
+    },
+    'fisico': {
+        'riscos': [
+            'Ambiente Artificialmente Frio', 'Exposição ao Ruído', 'Vibrações Localizadas (mão/braço)',
+            'Vibração de Corpo Inteiro (AREN)', 'Vibração de Corpo Inteiro (VDVR)', 'Exposição à Radiações Ionizantes',
+            'Exposição à Radiações Não-ionizantes', 'Exposição à Temperatura Ambiente Elevada',
+            'Exposição à Temperatura Ambiente Baixa', 'Pressão Atmosférica Anormal (condições hiperbáricas)', 'Umidade'
+        ],
+        'danos': [
+            'Estresse, desconforto, dormência, rigidez nas partes com maior intensidade de exposição ao frio, redução da destreza, formigamento, redução da sensibilidade dos dedos e flexibilidade das articulações.',
+            'Perda Auditiva Induzida pelo Ruído Ocupacional (PAIRO).',
+            'Alterações articulares e vasomotoras.',
+            'Alterações no sistema digestivo, sistema musculoesquelético, sistema nervoso, alterações na visão, enjoos, náuseas, palidez.',
+            'Alterações no sistema digestivo, sistema musculoesquelético, sistema nervoso, alterações na visão, enjoos, náuseas, palidez.',
+            'Dano às células do corpo humano, causando doenças graves, inclusive fatais, como câncer.',
+            'Depressão imunológica, fotoenvelhecimento, lesões oculares como ceratoconjuntivite, pterígio e catarata; Doenças graves, inclusives fatais, como câncer.',
+            'Desidratação, erupções cutâneas, câibras, fadiga física, problemas cardiocirculatórios, distúrbios psicológicos.',
+            'Estresse, desconforto, dormência, rigidez nas partes com maior intensidade de exposição ao frio, redução da destreza, formigamento, redução da sensibilidade dos dedos e flexibilidade das articulações.',
+            'Barotrauma pulmonar, lesão de tecido pulmonar ou pneumotórax, embolia arterial gasosa, barotrauma de ouvido, barotrauma sinusal, barotrauma dental, barotrauma facial, doença descompressiva.',
+            'Doenças do aparelho respiratório, quedas, doenças de pele, doenças circulatórias, entre outras.'
+        ]
+    },
+    'biologico': {
+        'riscos': [
+            'Água e/ou alimentos contaminados',
+            'Contato com Fluido Orgânico (sangue, hemoderivados, secreções, excreções)',
+            'Contato com Pessoas Doentes e/ou Material Infectocontagiante',
+            'Contaminação pelo Corona Vírus',
+            'Exposição à Agentes Microbiológicos (fungos, bactérias, vírus, protozoários, parasitas)'
+        ],
+        'danos': [
+            'Intoxicação, diarreias, infecções intestinais.',
+            'Doenças infectocontagiosas.',
+            'Doenças infectocontagiosas.',
+            'COVID-19, podendo causar gripes, febre, tosse seca, cansaço, dores e desconfortos, dor de garganta, diarreia, perda de paladar ou olfato, dificuldade de respirar ou falta de ar, dor ou pressão no peito, perda de fala ou movimentos.',
+            'Doenças infectocontagiosas, dermatites, irritação, desconforto, infecção do sistema respiratório.'
+        ]
+    },
+    'ergonomico': {
+        'riscos': [
+            'Posturas incômodas/pouco confortáveis por longos períodos', 'Postura sentada por longos períodos',
+            'Postura em pé por longos períodos', 'Frequente deslocamento à pé durante à jornada de trabalho',
+            'Esforço físico intenso', 'Levantamento e transporte manual de cargas ou volumes',
+            'Frequente ação de empurrar/puxar cargas ou volumes', 'Frequente execução de movimentos repetitivos',
+            'Manuseio de ferramentas e/ou objetos pesados por longos períodos',
+            'Uso frequente de força, pressão, preensão, flexão, extensão ou torção dos segmentos corporais',
+            'Compressão de partes do corpo por superfícies rígidas ou com quinas vivas',
+            'Flexões da coluna vertebral frequentes', 'Uso frequente de pedais', 'Uso frequente de alavancas',
+            'Elevação frequente de membros superiores',
+            'Manuseio ou movimentação de cargas e volumes sem pega ou com "pega pobre"',
+            'Exposição à vibração de corpo inteiro', 'Exposição à vibrações localizadas (mão, braço)',
+            'Uso frequente de escadas', 'Trabalho intensivo com teclado ou outros dispositivos de entrada de dados',
+            'Posto de trabalho improvisado/inadequado', 'Mobiliário sem meios de regulagem de ajustes',
+            'Equipamentos e/ou máquinas sem meios de regulagem de ajustes ou sem condições de uso',
+            'Posto de trabalho não planejado/adaptado para à posição sentada', 'Assento inadequado',
+            'Encosto do assento inadequado ou ausente',
+            'Mobiliário ou equipamento sem espaço para movimentação de segmentos corporais',
+            'Necessidade de alcançar objetos, documentos, controles, etc, além das zonas de alcance ideais',
+            'Equipamentos/mobiliário não adaptados à antropometria do trabalhador',
+            'Trabalho realizado sem pausas pré-definidas para descanso',
+            'Necessidade de manter ritmos intensos de trabalho', 'Trabalho com necessidade de variação de turnos',
+            'Monotonia', 'Trabalho noturno', 'Insuficiência de capacitação para à execução da tarefa',
+            'Trabalho com utilização rigorosa de metas de produção', 'Trabalho remunerado por produção',
+            'Cadência do trabalho imposta por um equipamento',
+            'Desequilíbrio entre tempo de trabalho e tempo de repouso',
+            'Pressão sonora fora dos parâmetros de conforto', 'Temperatura efetiva fora dos parâmetros de conforto',
+            'Velocidade do ar fora dos parâmetros de conforto', 'Umidade do ar fora dos parâmetros de conforto',
+            'Iluminação inadequada', 'Reflexos que causem desconforto ou prejudiquem à visão',
+            'Piso escorregadio ou irregular', 'Situações de estresse no local de trabalho',
+            'Situações de sobrecarga de trabalho mental', 'Exigência de concentração, atenção e memória',
+            'Trabalho em condições de difícil comunicação', 'Conflitos hierárquicos no trabalho',
+            'Problemas de relacionamento no trabalho', 'Assédio de qualquer natureza no trabalho',
+            'Dificuldades para cumprir ordens e determinações da chefia relacionadas ao trabalho',
+            'Realização de múltiplas tarefas com alta demanda mental/cognitiva', 'Insatisfação no trabalho',
+            'Falta de autonomia para a realização de tarefas no trabalho'
+        ],
+        'danos': [
+            'Distúrbios musculoesqueléticos em músculos e articulações dos membros superiores, inferiores e coluna.',
+            'Sobrecarga dos membros superiores e coluna vertebral; Aumento na pressão dos discos intervertebrais; Dor localizada.',
+            'Sobrecarga corporal, dores nos membros inferiores e em alguns casos na coluna vertebral e cansaço físico.',
+            'Sobrecarga corporal, dores nos membros inferiores e em alguns casos na coluna vertebral e cansaço físico.',
+            'Distúrbios musculoesqueléticos; Fadiga, Dor localizada; Redução da produtividade e da percepção de risco.',
+            'Distúrbios musculoesqueléticos; Fadiga, Dor localizada; Redução da produtividade e da percepção de risco.',
+            'Distúrbios musculoesqueléticos em músculos e articulações dos membros superiores, inferiores e coluna lombar.',
+            'Distúrbios osteomusculares em músculos e articulações dos membros utilizados na execução dos movimentos repetitivos.',
+            'Fadiga muscular; Dor localizada; Lesões musculares; Redução da produtividade e da percepção de risco.',
+            'Sobrecarga muscular, fadiga, dor localizada e perda de produtividade.',
+            'Restrição localizada temporária do fluxo cardiovascular.',
+            'Tensão na parte inferior das costas (coluna lombar), podendo causar fadiga, dor localizada e/ou lesões musculoesqueléticas.',
+            'Distúrbio musculoesqueléticos em músculos e articulações dos membros inferiores.',
+            'Distúrbios musculoesqueléticos em músculos e articulações dos membros superiores.',
+            'Sobrecarga na região do pescoço, ombros e braços, podendo causar fadiga e/ou dor localizada.',
+            'Sobrecarga corporal, aumento da força durante o manuseio, fadiga, dor localizada e perda de produtividade.',
+            'Alterações no sistema digestivo, sistema musculoesquelético, sistema nervoso, alterações na visão, enjoos, náuseas, palidez.',
+            'Alterações articulares e vasomotoras.',
+            'Distúrbios musculoesqueléticos em músculos e articulações dos membros inferiores.',
+            'Sobrecarga nas articulações das mãos, punhos e antebraços, podendo causar lesões como artrite e dificuldade de flexão.',
+            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
+            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
+            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
+            'Sobrecarga dos membros superiores e coluna vertebral; Aumento na pressão dos discos intervertebrais; Dor localizada.',
+            'Sobrecarga corporal e dores nos membros superiores, inferiores e coluna vertebral.',
+            'Sobrecarga corporal e dores na região da coluna vertebral.',
+            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
+            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
+            'Adoção de movimentos e posturas inadequadas; Fadiga muscular; Dor localizada; Distúrbios musculoesqueléticos.',
+            'Alterações psicofisiológicas; Sobrecarga e fadiga física e cognitiva; Perda de Produtividade e Redução da Percepção de Riscos.',
+            'Sobrecarga e fadiga física e cognitiva; Redução da Percepção de Risco.',
+            'Alterações psicofisiológicas e/ou sociais.',
+            'Fadiga cognitiva; Sonolência; Morosidade e Redução da Percepção de Riscos.',
+            'Alterações psicofisiológicas e/ou sociais.',
+            'Desconhecimento dos riscos aos quais se expõe e consequente redução da percepção de riscos.',
+            'Sobrecarga e fadiga física e cognitiva; Redução da Percepção de Risco.',
+            'Sobrecarga e fadiga física e cognitiva; Redução da Percepção de Risco.',
+            'Fadiga física e cognitiva.',
+            'Alterações psicofisiológicas; Sobrecarga e fadiga física e cognitiva; Perda de Produtividade e Redução da Percepção de Riscos.',
+            'Irritabilidade, estresse, dores de cabeça, perda de foco no trabalho e redução da produtividade.',
+            'Irritabilidade, estresse, dores de cabeça, perda de foco no trabalho e redução da produtividade.',
+            'Estresse, desconforto térmico, irritabilidade, dores de cabeça, perda foco no trabalho e redução da produtividade.',
+            'Cansaço, estresse, dor de cabeça, alergias, ressecamento da pele, crise de asma, infecções virais ou bacterianas.',
+            'Fadiga visual e cognitiva; Desconforto e Redução da Percepção de Riscos.',
+            'Fadiga visual e cognitiva; Desconforto; Perda de desempenho e Redução da Percepção de Riscos.',
+            'Fadiga muscular; Perda de desempenho; Escoriação; Ferimento; Luxação; Torção.',
+            'Alterações psicofisiológicas e sociais; Fadiga cognitiva; Perda de desempenho; Redução da percepção de risco.',
+            'Alterações psicofisiológicas, Fadiga cognitiva, Perda de desempenho e Redução da percepção de risco.',
+            'Alterações psicofisiológicas, Fadiga cognitiva, Perda de desempenho e Redução da percepção de risco.',
+            'Fadiga cognitiva e perda de desempenho.',
+            'Alterações psicofisiológicas e sociais; Fadiga cognitiva.',
+            'Alterações psicofisiológicas e sociais; Fadiga cognitiva.',
+            'Alterações psicofisiológicas e sociais; Fadiga cognitiva; Perda de desempenho; Redução da percepção de risco.',
+            'Alterações psicofisiológicas; Desconforto, Fadiga cognitiva, Perda de desempenho e Redução da percepção de risco.',
+            'Alterações psicofisiológicas; Desconforto, Fadiga muscular e cognitiva, Perda de desempenho e Redução da percepção de risco.',
+            'Alterações psicofisiológicas e sociais; Fadiga cognitiva; Irritabilidade; Perda de desempenho; Redução da percepção de risco.',
+            'Alterações psicofisiológicas; Desconforto, Fadiga cognitiva e Perda de desempenho.'
+        ]
+    },
+    'acidente': {
+        'riscos': [
+            'Absorção (por contato) de substância cáustica, tóxica ou nociva.', 'Afogamento, imersão, engolfamento.',
+            'Aprisionamento em, sob ou entre', 'Aprisionamento em, sob ou entre um objeto parado e outro em movimento.',
+            'Aprisionamento em, sob ou entre objetos em movimento convergente.',
+            'Aprisionamento em, sob ou entre dois ou mais objetos em movimento (sem encaixe).',
+            'Aprisionamento em, sob ou entre um objeto parado e outro em movimento.',
+            'Aprisionamento em, sob ou entre desabamento ou desmoronamento de edificação, estrutura, barreira, etc.',
+            'Arestas cortantes, superfícies com rebarbas, farpas ou elementos de fixação espostos',
+            'Ataque de ser vivo por mordedura, picada, chifrada, coice, etc.', 'Ataque de ser vivo com peçonha',
+            'Ataque de ser vivo com transmissão de doença', 'Ataque de ser vivo (inclusive humano)',
+            'Atrito ou abrasão por encostar em objeto', 'Atrito ou abrasão por manusear objeto',
+            'Atrito ou abrasão por corpo estranho no olho', 'Atrito ou abrasão', 'Atropelamento',
+            'Batida contra objeto parado ou em movimento', 'Carga Suspensa',
+            'Colisão entre veículos e/ou equipamentos autopropelidos',
+            'Condições climáticas adversas (sol, chuva, vento, etc.)',
+            'Contato com objeto ou substância em movimento',
+            'Contato com objeto ou substância a temperatura muito alta',
+            'Contato com objeto ou substância a temperatura muito baixa',
+            'Desabamento/Desmoronamento de edificação, estrutura e/ou materiais diversos.',
+            'Elementos Móveis e/ou Rotativos', 'Emergências na circunvizinhança',
+            'Equipamento pressurizado hidráulico ou pressurizado.', 'Exposição à Energia Elétrica',
+            'Ferramentas manuais', 'Ferramentas elétricas', 'Gases/vapores/poeiras (tóxicos ou não tóxicos)',
+            'Gases/vapores/poeiras inflamáveis', 'Impacto de pessoa contra objeto parado',
+            'Impacto de pessoa contra objeto em movimento', 'Impacto sofrido por pessoa.',
+            'Impacto sofrido por pessoa, de objeto em movimento', 'Impacto sofrido poe pessoa, de objeto que cai',
+            'Impacto sofrido poe pessoa, de objeto projetado', 'Inalação de substância tóxica/nociva.',
+            'Ingestão de substância cáustica, tóxica ou nociva.', 'Inalação, ingestão e/ou absorção.',
+            'Incêndio/Explosão', 'Objetos cortantes/perfurocortantes',
+            'Pessoas não autorizadas e/ou visitantes no local de trabalho',
+            'Portas, escotilhas, tampas, "bocas de visita", flanges',
+            'Projeção de Partículas sólidas e/ou líquidas',
+            'Queda de pessoa com diferença de nível de andaime, passarela, plataforma, etc.',
+            'Queda de pessoa com diferença de nível de escada (móvel ou fixa).',
+            'Queda de pessoa com diferença de nível de material empilhado.',
+            'Queda de pessoa com diferença de nível de veículo.',
+            'Queda de pessoa com diferença de nível em poço, escavação, abertura no piso, etc.',
+            'Queda de pessoa com diferença de nível ≤ 2m', 'Queda de pessoa com diferença de nível > 2m',
+            'Queda de pessoa em mesmo nível', 'Reação do corpo a seus movimentos (escorregão sem queda, etc.)',
+            'Vidro (recipientes, portas, bancadas, janelas, objetos diversos).', 'Soterramento',
+            'Substâncias tóxicas e/ou inflamáveis', 'Superfícies, substâncias e/ou objetos aquecidos',
+            'Superfícies, substâncias e/ou objetos em baixa temperatura',
+            'Tombamento, quebra e/ou ruptura de estrutura (fixa ou móvel)', 'Tombamento de máquina/equipamento',
+            'Trabalho à céu aberto', 'Trabalho em espaços confinados',
+            'Trabalho com máquinas portáteis rotativas.', 'Trabalho com máquinas e/ou equipamentos'
+        ],
+        'danos': [
+            'Intoxicação, envenenamento, queimadura, irritação ou reação alérgica.',
+            'Asfixia, desconforto respiratório, nível de consciência alterado, letargia, palidez, pele azulada, tosse, transtorno neurológico.',
+            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Corte, laceração, ferida contusa, punctura (ferida aberta).',
+            'Perfurações, cortes, arranhões, escoriações, fraturas.',
+            'Dor, inchaço, manchas arroxeadas, sangramento, hemorragia em regiões vitais, infecção, necrose, insuficiência renal.',
+            'Arranhões, lacerações, infecções bacterianas, raiva, entre outros tipos de doenças.',
+            'Ferimentos de diversos tipos, incluindo com uso de armas, cortes, perfurações, luxações, escoriações, fraturas.',
+            'Cortes, ferimentos, esfoladura, escoriações, raspagem superficial da pele, mucosas, etc.',
+            'Cortes, ferimentos, esfoladura, escoriações, raspagem superficial da pele, mucosas, etc.',
+            'Raspagem superficial das córneas.',
+            'Cortes, ferimentos, esfoladura, escoriações, raspagem superficial da pele, mucosas, etc.',
+            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Cortes, escoriações, luxações, fraturas, amputações.',
+            'Esmagamento, prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Compressão/esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Intermação, insolação, câibra, exaustão, desidratação, resfriados.',
+            'Cortes, escoriações, luxações, fraturas, amputações.',
+            'Queimadura ou escaldadura.',
+            'Congelamento, geladura e outros efeitos da exposição à baixa temperatura.',
+            'Compressão e/ou esmagamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Escoriação, ferimento, corte, luxação, fratura, amputação.',
+            'Danos materiais, danos pessoais (queimaduras, contusões, asfixia, aprosionamento, fraturas, etc.).',
+            'Ferimentos, rompimento do tímpano, deslocamento de retina ocular, projeção de partículas sólidas e liquidas, queimaduras, choque elétrico.',
+            'Choque elétrico e eletroplessão (eletrocussão).',
+            'Cortes, ferimentos, escoriações.',
+            'Cortes, ferimentos, escoriações, choque elétrico.',
+            'Irritação os olhos e/ou da pele, dermatites, doenças respiratórias, intoxicação.',
+            'Asfixia, queimaduras, morte por explosão.',
+            'Cortes, escoriações, luxações, fraturas, amputações.',
+            'Cortes, escoriações, luxações, fraturas, amputações.',
+            'Cortes, escoriações, luxações, fraturas, amputações.',
+            'Cortes, escoriações, luxações, fraturas, amputações.',
+            'Esmagamento, prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Escoriação, ferimento, perfuração, corte, luxação, fratura, prensamento.',
+            'Intoxicação, envenenamento, queimadura, irritação ou reação alérgica.',
+            'Intoxicação, envenenamento, queimadura, irritação ou reação alérgica.',
+            'Intoxicação, envenenamento, queimadura, irritação ou reação alérgica.',
+            'Queimadura de 1º, 2º ou 3º grau, asfixia,  arremessos, cortes, escoriações, luxações, fraturas.',
+            'Corte, laceração, ferida contusa, punctura (ferida aberta), perfuração.',
+            'Escoriação, ferimento, corte, luxação, fratura, entre outros danos devido às características do local e atividades realizadas.',
+            'Prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações, exposição à gases tóxicos.',
+            'Ferimento, corte, queimadura, perfuração, intoxicação.',
+            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
+            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
+            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
+            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
+            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
+            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
+            'Escoriações, ferimentos, cortes, luxações, fraturas, morte.',
+            'Escoriações, ferimentos, cortes, luxações, fraturas.',
+            'Torções, distensões, rupturas ou outras lesões musculares internas.',
+            'Corte, ferimento, perfuração.',
+            'Asfixia, desconforto respiratório, nível de consciência alterado, letargia, palidez, pele azulada, tosse, transtorno neurológico.',
+            'Intoxicação, asfixia, queimaduras de  1º, 2º ou 3º grau.',
+            'Queimadura de 1º, 2º ou 3º grau.',
+            'Queimadura de 1º, 2º ou 3º grau.',
+            'Prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações.',
+            'Intermação, insolação, câibra, exaustão, desidratação, resfriados.',
+            'Asfixia, hiperóxia, contaminação por poeiras e/ou gases tóxicos, queimadura de 1º, 2º ou 3º grau, arremessos, cortes, escoriações, luxações, fraturas.',
+            'Cortes, ferimentos, escoriações, amputações.',
+            'Prensamento ou aprisionamento de partes do corpo, cortes, escoriações, luxações, fraturas, amputações, choque elétrico.'
+        ]
+    },
+}
+
+def get_danos_por_riscos_pgr(categoria, riscos_selecionados):
+    """Retorna os danos associados aos riscos selecionados da planilha PGR"""
+    if categoria not in RISCOS_PGR_DADOS or not riscos_selecionados:
+        return ""
+    danos_lista = []
+    riscos_categoria = RISCOS_PGR_DADOS[categoria]["riscos"]
+    danos_categoria = RISCOS_PGR_DADOS[categoria]["danos"]
+    for risco in riscos_selecionados:
+        if risco in riscos_categoria:
+            indice = riscos_categoria.index(risco)
+            if indice < len(danos_categoria):
+                danos_lista.append(danos_categoria[indice])
+    return "; ".join(danos_lista) if danos_lista else ""
+
+def consolidar_riscos_pgr(riscos_selecionados_pgr):
+    """Riscos do PGR escolhidos por categoria no formato de tabela usado por montar_contexto_lote"""
+    riscos = []
+    for categoria_key in riscos_selecionados_pgr:
+        if riscos_selecionados_pgr[categoria_key]:
+            for risco_nome in riscos_selecionados_pgr[categoria_key]:
+                danos = get_danos_por_riscos_pgr(categoria_key, [risco_nome])
+                riscos.append({
+                    'categoria': categoria_key,
+                    'risco': risco_nome,
+                    'possiveis_danos': danos
+                })
+    return riscos
+
+def tabela_de_riscos(riscos):
+    return pd.DataFrame(riscos) if riscos else pd.DataFrame(columns=['categoria', 'risco', 'possiveis_danos'])
+
+def tratar_lista_vazia(lista, separador=", "):
+    if not lista or all(not item.strip() for item in lista): 
+        return "Não identificado"
+    return separador.join(sorted(list(set(item for item in lista if item and item.strip()))))
+
+def montar_contexto_lote(df_pgr, riscos_selecionados, epis_manuais, medicoes_manuais, riscos_manuais):
+    """Placeholders iguais para todos os funcionários do lote: riscos, danos, EPIs e medições"""
+    riscos_info = df_pgr[df_pgr['risco'].isin(riscos_selecionados)]
+    riscos_por_categoria = {cat: [] for cat in CATEGORIAS_RISCO.keys()}
+    danos_por_categoria = {cat: [] for cat in CATEGORIAS_RISCO.keys()}
+
+    for _, risco_row in riscos_info.iterrows():
+        categoria = str(risco_row.get("categoria", "")).lower()
+        if categoria in riscos_por_categoria:
+            riscos_por_categoria[categoria].append(str(risco_row.get("risco", "")))
+            danos = risco_row.get("possiveis_danos")
+            if pd.notna(danos): 
+                danos_por_categoria[categoria].append(str(danos))
+
+    if riscos_manuais:
+        map_categorias_rev = {v: k for k, v in CATEGORIAS_RISCO.items()}
+        for risco_manual in riscos_manuais:
+            categoria_display = risco_manual.get('category')
+            categoria_alvo = map_categorias_rev.get(categoria_display)
+            if categoria_alvo:
+                riscos_por_categoria[categoria_alvo].append(risco_manual.get('risk_name', ''))
+                if risco_manual.get('possible_damages'):
+                    danos_por_categoria[categoria_alvo].append(risco_manual.get('possible_damages'))
+
+    for cat in danos_por_categoria:
+        danos_por_categoria[cat] = sorted(list(set(danos_por_categoria[cat])))
+
+    medicoes_formatadas = []
+    for med in medicoes_manuais:
+        agente = str(med.get('agent', '')).strip()
+        valor = str(med.get('value', '')).strip()
+        unidade = str(med.get('unit', '')).strip()
+        epi_associado = str(med.get('epi_name', med.get('epi', ''))).strip()
+        if agente and agente not in ['', 'N/A', 'nan', 'None'] and valor and valor not in ['', 'N/A', 'nan', 'None']:
+            linha = f"{agente}: {valor}"
+            if unidade and unidade not in ['', 'N/A', 'nan', 'None']:
+                linha += f" {unidade}"
+            if epi_associado and epi_associado not in ['', 'N/A', 'nan', 'None']:
+                linha += f" | EPI: {epi_associado}"
+            medicoes_formatadas.append(linha)
+    medicoes_texto = "\n".join(medicoes_formatadas) if medicoes_formatadas else "Não aplicável"
+
+    return {
+        "[RISCOS FÍSICOS]": tratar_lista_vazia(riscos_por_categoria["fisico"]),
+        "[RISCOS DE ACIDENTE]": tratar_lista_vazia(riscos_por_categoria["acidente"]),
+        "[RISCOS QUÍMICOS]": tratar_lista_vazia(riscos_por_categoria["quimico"]),
+        "[RISCOS BIOLÓGICOS]": tratar_lista_vazia(riscos_por_categoria["biologico"]),
+        "[RISCOS ERGONÔMICOS]": tratar_lista_vazia(riscos_por_categoria["ergonomico"]),
+        "[POSSÍVEIS DANOS RISCOS FÍSICOS]": tratar_lista_vazia(danos_por_categoria["fisico"], "; "),
+        "[POSSÍVEIS DANOS RISCOS ACIDENTE]": tratar_lista_vazia(danos_por_categoria["acidente"], "; "),
+        "[POSSÍVEIS DANOS RISCOS QUÍMICOS]": tratar_lista_vazia(danos_por_categoria["quimico"], "; "),
+        "[POSSÍVEIS DANOS RISCOS BIOLÓGICOS]": tratar_lista_vazia(danos_por_categoria["biologico"], "; "),
+        "[POSSÍVEIS DANOS RISCOS ERGONÔMICOS]": tratar_lista_vazia(danos_por_categoria["ergonomico"], "; "),
+        "[EPIS]": tratar_lista_vazia([epi['epi_name'] for epi in epis_manuais]),
+        "[MEDIÇÕES]": medicoes_texto,
+    }
@@ -0,0 +1,161 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDA = 'concluida'
+CANCELADA = 'cancelada'
+FALHOU = 'falhou'
+SITUACOES_FINAIS = frozenset((CONCLUIDA, CANCELADA, FALHOU))
+
+class TarefaCancelada(Exception):
+    """Levantada entre dois documentos quando o cancelamento foi pedido"""
+
+class TarefaDeGeracao:
+    """Lote gerado numa thread em segundo plano, com progresso e cancelamento entre documentos"""
+
+    def __init__(self, total, descricao='', dono=None):
+        self.id = uuid.uuid4().hex
+        self.total = total
+        self.descricao = descricao
+        self.dono = dono
+        self.situacao = PENDENTE
+        self.feitos = 0
+        self.inicio = None
+        self.fim = None
+        self.erro = None
+        self.resultado = None
+        self.partes = []
+        # MedidorDePipeline da geração, quando houver: filas e utilização das etapas em tempo real
+        self.metricas = None
+        self._cancelamento = threading.Event()
+        self._trava = threading.Lock()
+        self._thread = None
+
+    def iniciar(self, funcao, *args, **kwargs):
+        """Executa funcao(tarefa, *args, **kwargs); o retorno vira o resultado da tarefa"""
+        self.inicio = time.monotonic()
+        self.situacao = EXECUTANDO
+        self._thread = threading.Thread(
+            target=self._executar, args=(funcao, args, kwargs), name=f'tarefa-{self.id[:8]}', daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def _executar(self, funcao, args, kwargs):
+        try:
+            resultado = funcao(self, *args, **kwargs)
+        except TarefaCancelada:
+            situacao, resultado = CANCELADA, None
+        except Exception as e:
+            situacao, resultado = FALHOU, None
+            self.erro = str(e)
+        else:
+            situacao = CONCLUIDA
+        with self._trava:
+            self.resultado = resultado
+            self.fim = time.monotonic()
+            self.situacao = situacao
+        if situacao == FALHOU:
+            # As partes de um lote que falhou não são oferecidas para download
+            self.liberar()
+
+    def avancar(self, quantidade=1):
+        """Registra documentos prontos e interrompe a tarefa se o cancelamento foi pedido"""
+        self.verificar_cancelamento()
+        with self._trava:
+            self.feitos += quantidade
+
+    def publicar(self, parte):
+        """Disponibiliza um resultado parcial (por exemplo, um ZIP já fechado) antes do fim da tarefa"""
+        with self._trava:
+            self.partes.append(parte)
+
+    def partes_prontas(self):
+        with self._trava:
+            return list(self.partes)
+
+    def liberar(self):
+        """Fecha os arquivos temporários do resultado e das partes publicadas"""
+        with self._trava:
+            arquivos = [parte.get('arquivo') for parte in self.partes]
+            if isinstance(self.resultado, dict):
+                arquivos.append(self.resultado.get('arquivo'))
+        for arquivo in arquivos:
+            if hasattr(arquivo, 'close'):
+                arquivo.close()
+
+    def verificar_cancelamento(self):
+        if self._cancelamento.is_set():
+            raise TarefaCancelada()
+
+    def cancelar(self):
+        self._cancelamento.set()
+
+    @property
+    def cancelamento_pedido(self):
+        return self._cancelamento.is_set()
+
+    @property
+    def finalizada(self):
+        return self.situacao in SITUACOES_FINAIS
+
+    def aguardar(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.finalizada
+
+    def progresso(self):
+        """Fotografia do andamento: feitos/total, documentos por segundo e tempo restante estimado"""
+        with self._trava:
+            feitos, situacao = self.feitos, self.situacao
+            decorrido = ((self.fim or time.monotonic()) - self.inicio) if self.inicio is not None else 0.0
+        por_segundo = feitos / decorrido if decorrido > 0 else 0.0
+        restante = (self.total - feitos) / por_segundo if por_segundo > 0 and situacao == EXECUTANDO else None
+        return {
+            'situacao': situacao,
+            'feitos': feitos,
+            'total': self.total,
+            'fracao': feitos / self.total if self.total else 1.0,
+            'decorrido': decorrido,
+            'docs_por_segundo': por_segundo,
+            'eta': restante,
+            'erro': self.erro,
+        }
+
+class GerenciadorDeTarefas:
+    """Tarefas do processo, compartilhadas entre sessões e recuperáveis pelo id após recarregar a página"""
+
+    def __init__(self, limite_finalizadas=20):
+        self.limite_finalizadas = limite_finalizadas
+        self._tarefas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def iniciar(self, total, funcao, *args, descricao='', dono=None, **kwargs):
+        tarefa = TarefaDeGeracao(total, descricao, dono)
+        with self._trava:
+            self._tarefas[tarefa.id] = tarefa
+            self._descartar_antigas()
+        return tarefa.iniciar(funcao, *args, **kwargs)
+
+    def obter(self, tarefa_id, dono=None):
+        """Tarefa pelo id; None se não existir ou pertencer a outro usuário"""
+        with self._trava:
+            tarefa = self._tarefas.get(tarefa_id)
+        if tarefa is None or (dono is not None and tarefa.dono != dono):
+            return None
+        return tarefa
+
+    def _descartar_antigas(self):
+        finalizadas = [tarefa_id for tarefa_id, tarefa in self._tarefas.items() if tarefa.finalizada]
+        for tarefa_id in finalizadas[:max(0, len(finalizadas) - self.limite_finalizadas)]:
+            self._tarefas.pop(tarefa_id).liberar()
+
+def formatar_duracao(segundos):
+    if segundos is None:
+        return '—'
+    minutos, segundos = divmod(int(round(segundos)), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas}h{minutos:02d}m{segundos:02d}s" if horas else f"{minutos}m{segundos:02d}s"
@@ -0,0 +1,175 @@
+"""Trabalhador da fila persistente de geração
+
+Executar em um processo separado do Streamlit (por exemplo, como serviço):
+
+    python -m gerador_os.trabalhador --db os_generator.db --processos 2
+
+Cada documento gerado é gravado em disco e registrado no banco antes do próximo;
+depois de um reinício, o lote é retomado a partir do último documento registrado.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+from database.generation_jobs import GenerationJobManager, STATUS_RUNNING
+from database.models import DatabaseManager
+from gerador_os.arquivamento import EstrategiaArquivo
+from gerador_os.cache_documentos import CacheDeDocumentos
+from gerador_os.modelo import ModeloCompilado, ModeloDoLote
+from gerador_os.paralelo import gerar_documentos
+
+def gravar_atomicamente(caminho, conteudo):
+    """Grava num arquivo temporário e renomeia: um checkpoint nunca aponta para arquivo parcial"""
+    # Nome único: um trabalhador que perdeu o lote não disputa o temporário com o novo dono
+    temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    with open(temporario, 'wb') as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+def ler_bytes(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+class Pulsacao:
+    """Renova o heartbeat do lote numa thread enquanto o trabalhador gera e monta o ZIP
+
+    Um documento lento, a partida do pool ou um ZIP grande não deixam o lote parecer
+    abandonado. Se o lote for cancelado ou reservado por outro trabalhador,
+    `interrompido` passa a ser verdadeiro e o laço principal para.
+    """
+
+    def __init__(self, jobs, job_id, worker_id, intervalo=None):
+        self.jobs = jobs
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.intervalo = intervalo or jobs.HEARTBEAT_EVERY.total_seconds()
+        self.status = STATUS_RUNNING
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name=f'heartbeat-{job_id}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.registrar(self.jobs.heartbeat(self.job_id, self.worker_id))
+            except Exception as e:
+                # Banco momentaneamente bloqueado: tenta de novo no próximo intervalo
+                print(f"[{self.worker_id}] heartbeat do lote {self.job_id} falhou: {e}", flush=True)
+
+    def registrar(self, status):
+        """Guarda o status visto pelo trabalhador (None: o lote passou a outro trabalhador)"""
+        if status != STATUS_RUNNING:
+            self.status = status
+
+    @property
+    def interrompido(self):
+        return self.status != STATUS_RUNNING
+
+def processar_lote(jobs, lote, worker_id, processos=1, cache=None):
+    """Gera os documentos pendentes do lote e monta o ZIP final
+
+    Retorna False se o lote foi cancelado ou reservado por outro trabalhador.
+    """
+    with Pulsacao(jobs, lote['id'], worker_id) as pulsacao:
+        return _processar_lote(jobs, lote, worker_id, pulsacao, processos, cache)
+
+def _processar_lote(jobs, lote, worker_id, pulsacao, processos, cache):
+    with open(lote['template_path'], 'rb') as f:
+        modelo = ModeloDoLote(ModeloCompilado(f.read(), lote['engine']), json.loads(lote['batch_context']))
+
+    pasta_itens = os.path.join(jobs.job_dir(lote['id']), 'itens')
+    os.makedirs(pasta_itens, exist_ok=True)
+    itens = jobs.get_pending_items(lote['id'])
+    resultados = gerar_documentos(
+        modelo, [item['context'] for item in itens], processos, capturar_erros=True, cache=cache
+    )
+    for item, resultado in zip(itens, resultados):
+        if isinstance(resultado, Exception):
+            situacao = jobs.checkpoint_item(lote['id'], worker_id, item['id'], error=str(resultado))
+        else:
+            caminho = os.path.join(pasta_itens, f"{item['position']:06d}.docx")
+            gravar_atomicamente(caminho, resultado)
+            situacao = jobs.checkpoint_item(lote['id'], worker_id, item['id'], caminho)
+        pulsacao.registrar(situacao)
+        if pulsacao.interrompido:
+            resultados.close()
+            return False
+
+    def documentos_prontos():
+        for caminho_no_zip, caminho in jobs.get_done_items(lote['id']):
+            if pulsacao.interrompido:
+                raise InterruptedError()
+            yield caminho_no_zip, ler_bytes(caminho)
+
+    caminho_zip = os.path.join(jobs.job_dir(lote['id']), 'OS_Geradas.zip')
+    temporario = f"{caminho_zip}.{uuid.uuid4().hex}.tmp"
+    estrategia = EstrategiaArquivo(lote['archive_mode'], lote['compress_level'])
+    try:
+        with open(temporario, 'wb') as destino:
+            estrategia.escrever_zip(destino, documentos_prontos())
+    except InterruptedError:
+        os.remove(temporario)
+        return False
+    except BaseException:
+        os.remove(temporario)
+        raise
+    # Confere a posse do lote logo antes de publicar o ZIP
+    pulsacao.registrar(jobs.heartbeat(lote['id'], worker_id))
+    if pulsacao.interrompido:
+        os.remove(temporario)
+        return False
+    os.replace(temporario, caminho_zip)
+    if not jobs.finish_job(lote['id'], worker_id, result_path=caminho_zip):
+        return False
+    # Os documentos avulsos só servem para retomar o lote; o ZIP final já os contém
+    shutil.rmtree(pasta_itens, ignore_errors=True)
+    return True
+
+def executar(db_path, processos=1, intervalo=2.0, uma_vez=False, pasta_cache=None):
+    """Consome a fila indefinidamente (ou até esvaziá-la, com uma_vez)"""
+    jobs = GenerationJobManager(DatabaseManager(db_path))
+    cache = CacheDeDocumentos(pasta_cache) if pasta_cache else None
+    trabalhador_id = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        lote = jobs.claim_next_job(trabalhador_id)
+        if lote is None:
+            if uma_vez:
+                return
+            time.sleep(intervalo)
+            continue
+        print(f"[{trabalhador_id}] lote {lote['id']}: {lote['done_items']}/{lote['total_items']} já gerados", flush=True)
+        try:
+            concluido = processar_lote(jobs, lote, trabalhador_id, processos, cache)
+        except Exception as e:
+            jobs.finish_job(lote['id'], trabalhador_id, error=str(e))
+            print(f"[{trabalhador_id}] lote {lote['id']} falhou: {e}", flush=True)
+        else:
+            situacao = 'concluído' if concluido else 'interrompido (cancelado ou retomado por outro trabalhador)'
+            print(f"[{trabalhador_id}] lote {lote['id']} {situacao}", flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trabalhador da fila persistente de geração de OS")
+    parser.add_argument('--db', default='os_generator.db', help="Banco SQLite do aplicativo")
+    parser.add_argument('--processos', type=int, default=1, help="Processos de geração por lote")
+    parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos entre consultas à fila vazia")
+    parser.add_argument('--uma-vez', action='store_true', help="Sai quando a fila estiver vazia")
+    parser.add_argument('--cache', help="Pasta do cache de documentos (a mesma do app: os_generator_cache)")
+    args = parser.parse_args(argv)
+    executar(args.db, args.processos, args.intervalo, args.uma_vez, args.cache)
+
+if __name__ == "__main__":
+    main()
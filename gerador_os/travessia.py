@@ -0,0 +1,69 @@
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.part import PartFactory, XmlPart
+from docx.oxml.ns import qn
+
+W_P = qn('w:p')
+W_R = qn('w:r')
+W_TXBX_CONTENT = qn('w:txbxContent')
+W_SECT_PR = qn('w:sectPr')
+
+# Elementos que apenas agrupam conteúdo: tabelas (inclusive aninhadas), linhas,
+# células e controles de conteúdo. Cada <w:tc> aparece uma única vez no XML,
+# mesmo quando a célula se estende por várias colunas da grade.
+CONTAINERS_DE_BLOCO = frozenset(qn(tag) for tag in (
+    'w:tbl', 'w:tr', 'w:tc', 'w:sdt', 'w:sdtContent', 'w:customXml', 'w:footnote', 'w:endnote',
+))
+
+RELACOES_DE_TEXTO = (RT.HEADER, RT.FOOTER, RT.FOOTNOTES, RT.ENDNOTES)
+
+# O python-docx carrega notas de rodapé e de fim como partes binárias; como XmlPart elas
+# têm o XML analisado (parte.element), como cabeçalhos e rodapés
+for _tipo in (CT.WML_FOOTNOTES, CT.WML_ENDNOTES):
+    PartFactory.part_type_for.setdefault(_tipo, XmlPart)
+
+def caixas_de_texto(r):
+    """<w:txbxContent> de um run, sem descer nas caixas aninhadas dentro delas"""
+    for caixa in r.iter(W_TXBX_CONTENT):
+        pai = caixa.getparent()
+        while pai is not r and pai.tag != W_TXBX_CONTENT:
+            pai = pai.getparent()
+        if pai is r:
+            yield caixa
+
+def iterar_paragrafos(elemento):
+    """Percorre os <w:p> de um bloco visitando cada célula real exatamente uma vez"""
+    for filho in elemento.iterchildren():
+        if filho.tag == W_P:
+            # Caixas de texto ficam dentro dos runs do parágrafo; são visitadas antes
+            # dele para que o processamento do parágrafo externo não as invalide
+            for r in filho.iterchildren(W_R):
+                for caixa in caixas_de_texto(r):
+                    yield from iterar_paragrafos(caixa)
+            yield filho
+        elif filho.tag in CONTAINERS_DE_BLOCO:
+            yield from iterar_paragrafos(filho)
+
+def raiz_de_texto(elemento):
+    """Elemento que contém os blocos da parte: <w:body> do documento, a raiz (<w:hdr>, <w:ftr>,
+    <w:footnotes>, <w:endnotes>) nos demais"""
+    return elemento.body if elemento.tag == qn('w:document') else elemento
+
+def iterar_partes_de_texto(documento):
+    """Corpo, cabeçalhos, rodapés e notas de rodapé e de fim do pacote, cada parte uma única vez"""
+    parte_principal = documento.part
+    yield parte_principal
+    vistas = set()
+    for rel in parte_principal.rels.values():
+        if rel.is_external or rel.reltype not in RELACOES_DE_TEXTO:
+            continue
+        parte = rel.target_part
+        if parte.partname not in vistas:
+            vistas.add(parte.partname)
+            yield parte
+
+def iterar_paragrafos_do_pacote(documento):
+    """Passada única por todas as partes de texto: gera (parte, raiz, <w:p>)"""
+    for parte in iterar_partes_de_texto(documento):
+        raiz = raiz_de_texto(parte.element)
+        for p in iterar_paragrafos(raiz):
+            yield parte, raiz, p
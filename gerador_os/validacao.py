@@ -0,0 +1,58 @@
+import pandas as pd
+
+from gerador_os.contextos import resolver_coluna, como_texto, caminhos_no_zip, converter_datas
+
+NOME_AUSENTE = "Nome ausente"
+DATA_INVALIDA = "Data de admissão inválida"
+SETOR_VAZIO = "Setor vazio"
+FUNCAO_VAZIA = "Função vazia"
+DUPLICADO = "Funcionário duplicado"
+
+VERIFICACOES = (NOME_AUSENTE, DATA_INVALIDA, SETOR_VAZIO, FUNCAO_VAZIA, DUPLICADO)
+
+def _vazio(serie, indice):
+    """Linhas sem valor ou só com espaços (coluna inexistente: todas)"""
+    if serie is None:
+        return pd.Series(True, index=indice)
+    return serie.isna() | como_texto(serie).str.strip().eq('')
+
+def _data_invalida(serie, indice):
+    """Valor preenchido que a conversão de formatar_datas não reconhece (sairia como texto na OS)"""
+    if serie is None:
+        return pd.Series(False, index=indice)
+    return serie.notna() & converter_datas(serie).isna()
+
+def validar_funcionarios(df):
+    """Uma coluna booleana por verificação, uma linha por funcionário (mesmo índice de df)
+
+    Tudo calculado coluna a coluna. Duplicados são as linhas que cairiam no mesmo caminho
+    do ZIP (mesmo setor, função e nome) que uma linha anterior; a primeira não é sinalizada.
+    """
+    indice = df.index
+    problemas = pd.DataFrame({
+        NOME_AUSENTE: _vazio(resolver_coluna(df, 'nome_do_funcionario'), indice),
+        DATA_INVALIDA: _data_invalida(resolver_coluna(df, 'data_de_admissao'), indice),
+        SETOR_VAZIO: _vazio(resolver_coluna(df, 'setor'), indice),
+        FUNCAO_VAZIA: _vazio(resolver_coluna(df, 'funcao'), indice),
+        DUPLICADO: pd.Series(caminhos_no_zip(df), index=indice, dtype=object).duplicated(),
+    }, index=indice)
+    return problemas.astype(bool)
+
+def resumo_da_validacao(problemas):
+    """Quantidade de linhas sinalizadas por verificação"""
+    return pd.DataFrame({
+        'Verificação': list(problemas.columns),
+        'Linhas': problemas.sum().astype(int).tolist(),
+    })
+
+def linhas_sinalizadas(problemas, verificacoes=VERIFICACOES):
+    """Máscara das linhas com algum problema entre as verificações escolhidas"""
+    verificacoes = [v for v in verificacoes if v in problemas.columns]
+    if not verificacoes:
+        return pd.Series(False, index=problemas.index)
+    return problemas[verificacoes].any(axis=1)
+
+def descricao_dos_problemas(problemas):
+    """Texto com os problemas de cada linha ('Nome ausente; Setor vazio'), sem laço por linha"""
+    rotulos = pd.Series([f"{coluna}; " for coluna in problemas.columns], index=problemas.columns, dtype=object)
+    return problemas.astype(object).dot(rotulos).astype(str).str.rstrip('; ')
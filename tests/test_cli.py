@@ -0,0 +1,28 @@
+from docx import Document
+
+from gerador_os.cli import main
+
+def preparar(tmp_path, linhas):
+    modelo = tmp_path / 'modelo.docx'
+    doc = Document()
+    doc.add_paragraph('Nome: [NOME FUNCIONÁRIO]')
+    doc.save(modelo)
+    planilha = tmp_path / 'funcionarios.csv'
+    planilha.write_text('\n'.join(linhas) + '\n', encoding='utf-8')
+    return ['generate', '--planilha', str(planilha), '--modelo', str(modelo), '--silencioso']
+
+def test_setor_sem_coluna_de_setor(tmp_path, capsys):
+    argumentos = preparar(tmp_path, ['Nome;Função', 'Ana;Servente'])
+    assert main(argumentos + ['--out', str(tmp_path / 'saida'), '--setor', 'Obra']) == 2
+    assert 'coluna de setor' in capsys.readouterr().err
+
+def test_pasta_nao_sobrescreve_nomes_repetidos(tmp_path):
+    argumentos = preparar(tmp_path, ['Nome;Setor;Função', 'Ana;Obra;Servente', 'Ana;Obra;Servente'])
+    assert main(argumentos + ['--out', str(tmp_path / 'saida')]) == 0
+    gerados = sorted(p.name for p in (tmp_path / 'saida' / 'Obra' / 'Servente').iterdir())
+    assert gerados == ['OS_Ana.docx', 'OS_Ana_2.docx']
+
+def test_pasta_nao_escapa_da_saida(tmp_path):
+    argumentos = preparar(tmp_path, ['Nome;Setor;Função', 'Ana;..;..'])
+    assert main(argumentos + ['--out', str(tmp_path / 'saida' / 'sub')]) == 0
+    assert (tmp_path / 'saida' / 'sub' / '_' / '_' / 'OS_Ana.docx').exists()
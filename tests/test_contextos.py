@@ -0,0 +1,57 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from gerador_os.contextos import contextos_dos_funcionarios
+
+def data_por_linha(valor):
+    """Data de admissão como o laço por linha fazia, lendo dd/mm primeiro fora do formato ISO"""
+    try:
+        dia_primeiro = not re.match(r'\s*\d{4}-', str(valor))
+        return pd.to_datetime(valor, dayfirst=dia_primeiro).strftime('%d/%m/%Y')
+    except Exception:
+        return str(valor)
+
+def contexto_por_linha(funcionario):
+    """Referência: os placeholders pessoais montados linha a linha, como no gerar_os antigo"""
+    data_admissao = "Não informado"
+    if 'data_de_admissao' in funcionario and pd.notna(funcionario['data_de_admissao']):
+        data_admissao = data_por_linha(funcionario['data_de_admissao'])
+    descricao_atividades = "Não informado"
+    if 'descricao_de_atividades' in funcionario and pd.notna(funcionario['descricao_de_atividades']):
+        descricao_atividades = str(funcionario['descricao_de_atividades']).strip()
+    funcao = str(funcionario.get('funcao', 'N/A'))
+    setor = str(funcionario.get('setor', 'N/A'))
+    if descricao_atividades in ("Não informado", "", "nan"):
+        if funcao != 'N/A' and setor != 'N/A':
+            descricao_atividades = f"Atividades relacionadas à função de {funcao} no setor {setor}, incluindo todas as tarefas operacionais, administrativas e de apoio inerentes ao cargo."
+        else:
+            descricao_atividades = "Atividades operacionais, administrativas e de apoio conforme definido pela chefia imediata."
+    return {
+        "[NOME EMPRESA]": str(funcionario.get("empresa", "N/A")),
+        "[UNIDADE]": str(funcionario.get("unidade", "N/A")),
+        "[NOME FUNCIONÁRIO]": str(funcionario.get("nome_do_funcionario", "N/A")),
+        "[DATA DE ADMISSÃO]": data_admissao,
+        "[SETOR]": setor,
+        "[FUNÇÃO]": funcao,
+        "[DESCRIÇÃO DE ATIVIDADES]": descricao_atividades,
+    }
+
+def test_contextos_coluna_a_coluna_iguais_aos_por_linha():
+    df = pd.DataFrame({
+        'empresa': ['ACME', 'ACME', np.nan, 'ACME', 'ACME'],
+        'nome_do_funcionario': ['Ana', 'Bia', 'Caio', np.nan, 'Eva'],
+        'data_de_admissao': pd.Series(
+            [pd.Timestamp('2023-03-05'), '25/03/2023', 'sem data', np.nan, '2022-12-01'], dtype=object,
+            index=[10, 11, 12, 13, 14],
+        ),
+        'setor': ['Obra', 'Obra', 'Escritório', 'Obra', np.nan],
+        'funcao': ['Pedreira', 'Servente', 'Analista', 'Servente', 'Vigia'],
+        'descricao_de_atividades': ['  Assentar tijolos  ', np.nan, '', 'nan', np.nan],
+    }, index=[10, 11, 12, 13, 14])
+    esperado = [contexto_por_linha(funcionario) for _, funcionario in df.iterrows()]
+    assert [contexto["[DATA DE ADMISSÃO]"] for contexto in esperado] == [
+        '05/03/2023', '25/03/2023', 'sem data', 'Não informado', '01/12/2022',
+    ]
+    assert contextos_dos_funcionarios(df) == esperado
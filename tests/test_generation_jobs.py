@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+from database.generation_jobs import GenerationJobManager, STATUS_RUNNING, parse_timestamp
+from database.models import DatabaseManager
+
+def criar_fila(tmp_path):
+    jobs = GenerationJobManager(DatabaseManager(str(tmp_path / 'fila.db')))
+    _, _, job_id = jobs.create_job(1, b'modelo', 'xml', {}, [('OS_Ana.docx', {'[NOME]': 'Ana'})], 'armazenar_docx')
+    return jobs, job_id
+
+def test_datas_da_fila_em_utc(tmp_path):
+    jobs, job_id = criar_fila(tmp_path)
+    jobs.claim_next_job('A')
+    lote = jobs.get_job(job_id)
+    agora = datetime.now(timezone.utc)
+    for campo in ('created_at', 'started_at', 'heartbeat_at'):
+        assert abs((parse_timestamp(lote[campo]) - agora).total_seconds()) < 60
+
+def test_lote_parado_passa_a_outro_trabalhador(tmp_path):
+    jobs, job_id = criar_fila(tmp_path)
+    assert jobs.claim_next_job('A')['id'] == job_id
+    assert jobs.claim_next_job('B') is None
+    conn = jobs.db.get_connection()
+    conn.execute('UPDATE generation_jobs SET heartbeat_at = ?', ('2000-01-01T00:00:00.000000+00:00',))
+    conn.commit()
+    conn.close()
+    assert jobs.claim_next_job('B')['id'] == job_id
+
+    item = jobs.get_pending_items(job_id)[0]
+    assert jobs.checkpoint_item(job_id, 'A', item['id'], 'a.docx') is None
+    assert jobs.heartbeat(job_id, 'A') is None
+    assert not jobs.finish_job(job_id, 'A', error='perdeu o lote')
+    assert jobs.checkpoint_item(job_id, 'B', item['id'], 'b.docx') == STATUS_RUNNING
+    assert jobs.finish_job(job_id, 'B', result_path='OS.zip')
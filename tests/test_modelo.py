@@ -0,0 +1,132 @@
+import re
+import zipfile
+from io import BytesIO
+
+import pytest
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+from gerador_os.modelo import MOTOR_DOCX, MOTOR_XML, ModeloCompilado, ModeloDoLote
+
+RUN_COM_DESENHO = (
+    f'<w:r {nsdecls("w")} xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006">'
+    '<mc:AlternateContent><mc:Fallback><w:pict><w:txbxContent>'
+    '<w:p><w:r><w:t>[SETOR]</w:t></w:r></w:p>'
+    '</w:txbxContent></w:pict></mc:Fallback></mc:AlternateContent></w:r>'
+)
+
+NOTAS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<w:footnotes {nsdecls("w")}><w:footnote w:id="1"><w:p><w:r><w:t>Nota de [NOME]</w:t></w:r></w:p></w:footnote></w:footnotes>'
+)
+
+def salvar(doc):
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def com_notas_de_rodape(conteudo):
+    """Acrescenta word/footnotes.xml (que o python-docx não cria) ao pacote"""
+    entrada, saida = zipfile.ZipFile(BytesIO(conteudo)), BytesIO()
+    with zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as pacote:
+        for info in entrada.infolist():
+            dados = entrada.read(info)
+            if info.filename == '[Content_Types].xml':
+                dados = dados.replace(b'</Types>', (
+                    b'<Override PartName="/word/footnotes.xml" ContentType="application/'
+                    b'vnd.openxmlformats-officedocument.wordprocessingml.footnotes+xml"/></Types>'
+                ))
+            elif info.filename == 'word/_rels/document.xml.rels':
+                dados = dados.replace(b'</Relationships>', (
+                    b'<Relationship Id="rIdNotas" Type="http://schemas.openxmlformats.org/officeDocument/'
+                    b'2006/relationships/footnotes" Target="footnotes.xml"/></Relationships>'
+                ))
+            pacote.writestr(info, dados)
+        pacote.writestr('word/footnotes.xml', NOTAS)
+    return saida.getvalue()
+
+def xml_da_parte(docx, nome):
+    return zipfile.ZipFile(BytesIO(docx)).read(nome).decode('utf-8')
+
+CONTEXTO = {
+    '[NOME]': 'Ana', '[FUNÇÃO]': 'Pedreira', '[SETOR]': 'Obra', '[EMPRESA]': 'ACME',
+    '[RISCOS]': 'Ruído', '[EPIS]': 'Protetor auricular', '[MEDIÇÕES]': 'Ruído: 85 dB\nCalor: 28 IBUTG',
+}
+
+def modelo_completo():
+    """Placeholders no corpo (um deles partido em runs), em tabela, no cabeçalho e em [MEDIÇÕES]"""
+    doc = Document()
+    p = doc.add_paragraph('Nome: ')
+    p.add_run('[NO')
+    p.add_run('ME]').bold = True
+    doc.add_paragraph('Função: [FUNÇÃO] – Setor: [SETOR]')
+    doc.add_paragraph('[MEDIÇÕES]')
+    doc.add_paragraph('Texto fixo')
+    tabela = doc.add_table(rows=1, cols=2)
+    tabela.cell(0, 0).text = 'Riscos: [RISCOS]'
+    tabela.cell(0, 1).text = 'EPIs: [EPIS]'
+    doc.sections[0].header.paragraphs[0].text = 'Empresa [EMPRESA]'
+    return salvar(doc)
+
+@pytest.mark.parametrize('motor', [MOTOR_XML, MOTOR_DOCX])
+def test_desenho_fica_entre_os_placeholders(motor):
+    doc = Document()
+    p = doc.add_paragraph('Nome: [NOME] ')
+    p._p.append(parse_xml(RUN_COM_DESENHO.replace('[SETOR]', 'fixo')))
+    p.add_run(' Cargo: [CARGO]')
+    modelo = ModeloCompilado(salvar(doc), motor)
+    xml = xml_da_parte(modelo.gerar_docx({'[NOME]': 'Ana', '[CARGO]': 'Pedreira'}), 'word/document.xml')
+    assert xml.index('Ana') < xml.index('AlternateContent') < xml.index('Pedreira')
+
+@pytest.mark.parametrize('motor', [MOTOR_XML, MOTOR_DOCX])
+def test_caixa_de_texto_preenchida_fica_no_lugar(motor):
+    doc = Document()
+    p = doc.add_paragraph('Nome: [NOME] ')
+    p._p.append(parse_xml(RUN_COM_DESENHO))
+    p.add_run('fim')
+    modelo = ModeloCompilado(salvar(doc), motor)
+    xml = xml_da_parte(modelo.gerar_docx({'[NOME]': 'Ana', '[SETOR]': 'Obra'}), 'word/document.xml')
+    assert xml.index('Ana') < xml.index('Obra') < xml.index('fim')
+
+@pytest.mark.parametrize('motor', [MOTOR_XML, MOTOR_DOCX])
+def test_notas_de_rodape_sao_preenchidas(motor):
+    doc = Document()
+    doc.add_paragraph('Nome: [NOME]')
+    modelo = ModeloCompilado(com_notas_de_rodape(salvar(doc)), motor)
+    gerado = modelo.gerar_docx({'[NOME]': 'Ana'})
+    assert 'Ana' in xml_da_parte(gerado, 'word/footnotes.xml')
+    assert not re.search(r'\[NOME\]', xml_da_parte(gerado, 'word/footnotes.xml'))
+
+def test_documento_unico_sem_funcionarios():
+    doc = Document()
+    doc.add_paragraph('Nome: [NOME]')
+    with pytest.raises(ValueError):
+        ModeloCompilado(salvar(doc)).gerar_docx_unico([])
+
+def test_documento_unico_renumera_ids_de_marcadores():
+    doc = Document()
+    doc.add_paragraph('Nome: [NOME]')
+    p = doc.add_paragraph('Assinatura')
+    p._p.append(parse_xml(f'<w:bookmarkStart {nsdecls("w")} w:id="0" w:name="inicio"/>'))
+    p._p.append(parse_xml(f'<w:bookmarkEnd {nsdecls("w")} w:id="0"/>'))
+    gerado = ModeloCompilado(salvar(doc)).gerar_docx_unico([{'[NOME]': nome} for nome in ('Ana', 'Bia', 'Caio')])
+    ids = re.findall(r'<w:bookmarkStart w:id="(\d+)"', xml_da_parte(gerado, 'word/document.xml'))
+    assert len(ids) == len(set(ids)) == 3
+
+def test_motor_xml_gera_o_mesmo_xml_que_o_python_docx():
+    conteudo = modelo_completo()
+    gerado_xml = ModeloCompilado(conteudo, MOTOR_XML).gerar_docx(CONTEXTO)
+    gerado_docx = ModeloCompilado(conteudo, MOTOR_DOCX).gerar_docx(CONTEXTO)
+    for parte in ('word/document.xml', 'word/header1.xml'):
+        assert xml_da_parte(gerado_xml, parte) == xml_da_parte(gerado_docx, parte)
+
+@pytest.mark.parametrize('motor', [MOTOR_XML, MOTOR_DOCX])
+def test_contexto_do_lote_gera_o_mesmo_documento(motor):
+    modelo = ModeloCompilado(modelo_completo(), motor)
+    lote = {chave: CONTEXTO[chave] for chave in ('[EMPRESA]', '[RISCOS]', '[EPIS]', '[MEDIÇÕES]')}
+    pessoal = {chave: valor for chave, valor in CONTEXTO.items() if chave not in lote}
+    gerado_lote = ModeloDoLote(modelo, lote).gerar_docx(pessoal)
+    gerado = modelo.gerar_docx(CONTEXTO)
+    for parte in ('word/document.xml', 'word/header1.xml'):
+        assert xml_da_parte(gerado_lote, parte) == xml_da_parte(gerado, parte)
@@ -0,0 +1,39 @@
+import zipfile
+from io import BytesIO
+
+from gerador_os import pacote
+from gerador_os.arquivamento import DEFLATE_PARALELO, EstrategiaArquivo
+from gerador_os.pacote import EntradaZip, gravar_zip
+
+DATA = (2024, 1, 2, 3, 4, 6)
+
+def ler_zip(dados):
+    with zipfile.ZipFile(BytesIO(dados)) as zip_file:
+        assert zip_file.testzip() is None
+        return {info.filename: zip_file.read(info) for info in zip_file.infolist()}
+
+def test_gravar_zip_e_lido_pelo_zipfile():
+    dados = gravar_zip([
+        EntradaZip.comprimir('word/document.xml', b'<w:document/>' * 100, DATA),
+        EntradaZip.comprimir('Seção/Função/OS_Ana.docx', b'docx', DATA),
+    ])
+    assert ler_zip(dados) == {
+        'word/document.xml': b'<w:document/>' * 100,
+        'Seção/Função/OS_Ana.docx': b'docx',
+    }
+
+def test_mais_de_65535_entradas_usa_zip64():
+    documentos = ((f'OS_{n}.docx', b'') for n in range(70000))
+    dados = EstrategiaArquivo(DEFLATE_PARALELO, trabalhadores=2).criar_zip(documentos)
+    with zipfile.ZipFile(BytesIO(dados)) as zip_file:
+        nomes = zip_file.namelist()
+    assert len(nomes) == 70000
+    assert nomes[-1] == 'OS_69999.docx'
+
+def test_tamanhos_e_posicoes_acima_do_limite_usam_zip64(monkeypatch):
+    # Limite reduzido para exercitar os registros ZIP64 sem gravar 4 GiB
+    monkeypatch.setattr(pacote, '_LIMITE_ZIP32', 64)
+    conteudos = {f'parte{n}.xml': bytes(range(256)) * (n + 1) for n in range(3)}
+    dados = gravar_zip(EntradaZip.comprimir(nome, conteudo, DATA, nivel=0) for nome, conteudo in conteudos.items())
+    assert zipfile.stringEndArchive64 in dados
+    assert ler_zip(dados) == conteudos
@@ -0,0 +1,116 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from gerador_os.contextos import contextos_dos_funcionarios, mapear_e_renomear_colunas_funcionarios
+from gerador_os.planilhas import (
+    MOTOR_STREAMING, FormatoNaoSuportado, detectar_cabecalho, ler_planilha_funcionarios, ler_xlsx,
+)
+from gerador_os.validacao import DATA_INVALIDA, validar_funcionarios
+
+def test_csv_com_datas_dia_mes(tmp_path):
+    caminho = tmp_path / 'funcionarios.csv'
+    caminho.write_text(
+        "Nome;Setor;Função;Data de Admissão\n"
+        "Ana;Obra;Pedreira;05/03/2023\n"
+        "Bia;Obra;Servente;25/03/2023\n",
+        encoding='utf-8',
+    )
+    df = mapear_e_renomear_colunas_funcionarios(ler_planilha_funcionarios(str(caminho)))
+    datas = [contexto["[DATA DE ADMISSÃO]"] for contexto in contextos_dos_funcionarios(df)]
+    assert datas == ['05/03/2023', '25/03/2023']
+    assert not validar_funcionarios(df)[DATA_INVALIDA].any()
+
+def test_datas_iso_e_timestamps_nao_sao_lidas_dia_primeiro():
+    df = pd.DataFrame({
+        'nome_do_funcionario': ['Ana', 'Bia', 'Caio'],
+        'data_de_admissao': pd.Series(['2023-03-05', pd.Timestamp('2023-03-05'), '5/3/23'], dtype=object),
+    })
+    datas = [contexto["[DATA DE ADMISSÃO]"] for contexto in contextos_dos_funcionarios(df)]
+    assert datas == ['05/03/2023', '05/03/2023', '05/03/2023']
+
+def salvar_xlsx(caminho, abas):
+    """Pasta de trabalho com openpyxl: {nome da aba: linhas}"""
+    pasta = Workbook()
+    pasta.remove(pasta.active)
+    for nome, linhas in abas.items():
+        aba = pasta.create_sheet(nome)
+        for linha in linhas:
+            aba.append(linha)
+    pasta.save(caminho)
+    return str(caminho)
+
+def test_xlsx_em_streaming_igual_ao_read_excel(tmp_path):
+    caminho = salvar_xlsx(tmp_path / 'funcionarios.xlsx', {'Funcionários': [
+        ['Nome', 'Observação', 'Setor', 'Função', 'Data de Admissão', 'Matrícula'],
+        ['Ana', 'não lida', 'Obra', 'Pedreira', datetime(2023, 3, 5), 101],
+        [None, None, None, None, None, None],
+        ['Bia', None, 'Obra', None, '25/03/2023', 102],
+        ['Caio', 'x', 'N/A', 'Vigia', None, None],
+    ]})
+    df = ler_xlsx(caminho, motor=MOTOR_STREAMING)
+    esperado = pd.read_excel(caminho, usecols=['Nome', 'Setor', 'Função', 'Data de Admissão'])
+    pd.testing.assert_frame_equal(df, esperado)
+
+def test_csv_latin1_separado_por_virgula(tmp_path):
+    caminho = tmp_path / 'funcionarios.csv'
+    caminho.write_bytes(
+        "Nome,Observação,Setor,Função\n"
+        "Ana,não lida,Manutenção,Eletricista\n"
+        "João,,Obra,0042\n".encode('latin-1')
+    )
+    df = ler_planilha_funcionarios(str(caminho))
+    assert list(df.columns) == ['Nome', 'Setor', 'Função']
+    assert df['Setor'].tolist() == ['Manutenção', 'Obra']
+    # Lido como texto: o zero à esquerda não se perde
+    assert df['Função'].tolist() == ['Eletricista', '0042']
+
+def test_parquet_le_so_as_colunas_usadas(tmp_path):
+    caminho = tmp_path / 'funcionarios.parquet'
+    pd.DataFrame({
+        'Nome': ['Ana', 'Bia'], 'Matrícula': [101, 102], 'Setor': ['Obra', 'Obra'], 'Função': ['Pedreira', 'Servente'],
+    }).to_parquet(caminho)
+    df = mapear_e_renomear_colunas_funcionarios(ler_planilha_funcionarios(str(caminho)))
+    assert list(df.columns) == ['nome_do_funcionario', 'setor', 'funcao']
+    assert [c["[NOME FUNCIONÁRIO]"] for c in contextos_dos_funcionarios(df)] == ['Ana', 'Bia']
+
+def test_ods_pelo_mesmo_mapeamento(tmp_path):
+    pytest.importorskip('odf')
+    caminho = tmp_path / 'funcionarios.ods'
+    pd.DataFrame({
+        'Nome': ['Ana', 'Bia'], 'Observação': ['x', 'y'], 'Setor': ['Obra', 'Escritório'], 'Função': ['Pedreira', 'Analista'],
+    }).to_excel(caminho, engine='odf', index=False)
+    df = mapear_e_renomear_colunas_funcionarios(ler_planilha_funcionarios(str(caminho)))
+    assert list(df.columns) == ['nome_do_funcionario', 'setor', 'funcao']
+    assert [c["[SETOR]"] for c in contextos_dos_funcionarios(df)] == ['Obra', 'Escritório']
+
+def test_formato_nao_suportado():
+    with pytest.raises(FormatoNaoSuportado):
+        ler_planilha_funcionarios('funcionarios.txt')
+
+def test_detectar_cabecalho_abaixo_do_titulo():
+    amostras = {
+        'Capa': [['Relatório de funcionários'], []],
+        'Dados': [['Empresa ACME'], [], ['Nome', 'Setor', 'Função'], ['Ana', 'Obra', 'Pedreira']],
+    }
+    assert detectar_cabecalho(amostras) == ('Dados', 2)
+    # Sem coluna reconhecida: primeira linha da primeira aba, como o pd.read_excel
+    assert detectar_cabecalho({'Capa': [['Relatório']], 'Outra': [['x']]}) == ('Capa', 0)
+
+def test_xlsx_com_titulo_e_tabela_na_segunda_aba(tmp_path):
+    caminho = salvar_xlsx(tmp_path / 'funcionarios.xlsx', {
+        'Capa': [['Relatório de funcionários']],
+        'Dados': [
+            ['Empresa ACME'],
+            [],
+            ['Nome', 'Setor', 'Função'],
+            ['Ana', 'Obra', 'Pedreira'],
+            ['Bia', 'Escritório', 'Analista'],
+        ],
+    })
+    df = ler_xlsx(caminho, motor=MOTOR_STREAMING)
+    assert df.attrs['origem'] == {'aba': 'Dados', 'linha': 3, 'detectada': True}
+    esperado = pd.read_excel(caminho, sheet_name='Dados', header=2)
+    pd.testing.assert_frame_equal(df, esperado)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from gerador_os.validacao import (
+    DATA_INVALIDA, DUPLICADO, FUNCAO_VAZIA, NOME_AUSENTE, SETOR_VAZIO, VERIFICACOES,
+    descricao_dos_problemas, linhas_sinalizadas, resumo_da_validacao, validar_funcionarios,
+)
+
+def funcionarios():
+    # Índice que não começa em 0, como depois de um filtro
+    return pd.DataFrame({
+        'nome_do_funcionario': ['Ana', '  ', 'Bia', 'Ana', 'Caio'],
+        'data_de_admissao': ['05/03/2023', '2023-03-05', '31/02/2023', np.nan, 'sem data'],
+        'setor': ['Obra', 'Obra', np.nan, 'Obra', 'Escritório'],
+        'funcao': ['Pedreira', 'Servente', 'Vigia', 'Pedreira', ''],
+    }, index=[3, 4, 5, 6, 7])
+
+def test_cada_verificacao_sinaliza_suas_linhas():
+    problemas = validar_funcionarios(funcionarios())
+    assert list(problemas.columns) == list(VERIFICACOES)
+    assert list(problemas.index) == [3, 4, 5, 6, 7]
+    sinalizadas = {verificacao: problemas.index[problemas[verificacao]].tolist() for verificacao in VERIFICACOES}
+    assert sinalizadas == {
+        NOME_AUSENTE: [4],
+        # Data vazia não é inválida: sai como "Não informado"
+        DATA_INVALIDA: [5, 7],
+        SETOR_VAZIO: [5],
+        FUNCAO_VAZIA: [7],
+        # A primeira ocorrência não é sinalizada
+        DUPLICADO: [6],
+    }
+
+def test_colunas_ausentes():
+    problemas = validar_funcionarios(pd.DataFrame({'nome_do_funcionario': ['Ana', 'Bia']}))
+    assert problemas[SETOR_VAZIO].all() and problemas[FUNCAO_VAZIA].all()
+    assert not problemas[DATA_INVALIDA].any()
+
+def test_resumo_filtro_e_descricao():
+    problemas = validar_funcionarios(funcionarios())
+    resumo = resumo_da_validacao(problemas)
+    assert dict(zip(resumo['Verificação'], resumo['Linhas'])) == {
+        NOME_AUSENTE: 1, DATA_INVALIDA: 2, SETOR_VAZIO: 1, FUNCAO_VAZIA: 1, DUPLICADO: 1,
+    }
+    assert problemas.index[linhas_sinalizadas(problemas)].tolist() == [4, 5, 6, 7]
+    assert problemas.index[linhas_sinalizadas(problemas, [DUPLICADO])].tolist() == [6]
+    assert not linhas_sinalizadas(problemas, []).any()
+    assert descricao_dos_problemas(problemas).tolist() == [
+        '', NOME_AUSENTE, f'{DATA_INVALIDA}; {SETOR_VAZIO}', DUPLICADO, f'{DATA_INVALIDA}; {FUNCAO_VAZIA}',
+    ]